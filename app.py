@@ -1,10 +1,15 @@
 import streamlit as st
-import json
-from models import Manifest
-from erd_generator import create_erd, create_interactive_erd
-import tempfile
-import os
+from manifest_cache import content_hash, get_manifest_cache
+from erd_generator import ORTHO_MAX_EDGES, ORTHO_MAX_NODES, create_clustered_erd, create_interactive_erd, iter_erd_dot
+from clustering import CLUSTER_KEYS, parse_cluster_node_id
+from layout import get_layout
+from render_jobs import DONE, RENDER_FORMATS, RENDER_MIME_TYPES, artifact_key, get_render_manager
+from instrumentation import instrumented, measure, start_run
+from manifest_diff import refresh_manifest
+from workspace import get_workspace
+from manifest_watcher import get_manifest_watcher
 import pathlib
+import uuid
 import pandas as pd
 from streamlit_agraph import agraph
 
@@ -14,58 +19,248 @@ st.set_page_config(
     layout="wide"
 )
 
-def get_connected_nodes(manifest, selected_node_id):
-    """Get all nodes connected to the selected node (parents and children)."""
-    connected_nodes = set()
-    if selected_node_id:
-        # Add the selected node
-        connected_nodes.add(selected_node_id)
-        # Add parent nodes
-        parents = manifest.parent_map.get(selected_node_id, [])
-        connected_nodes.update(parents)
-        # Add child nodes
-        children = manifest.child_map.get(selected_node_id, [])
-        connected_nodes.update(children)
-    return connected_nodes
-
-def create_column_dataframe(node):
-    """Create a DataFrame from node columns."""
+@instrumented('get_connected_nodes')
+def get_connected_nodes(manifest, selected_node_id, upstream_depth=1, downstream_depth=1, max_nodes=None):
+    """Get all models within the given upstream and downstream hops of the selected node."""
+    if not selected_node_id:
+        return set()
+    return manifest.lineage_graph.lineage(selected_node_id, upstream_depth, downstream_depth, max_nodes)
+
+@instrumented('manifest_cache')
+def load_cached_manifest(source_id, read_bytes):
+    """Load a manifest through the process-wide cache, hashing each source once per session."""
+    cache = get_manifest_cache()
+    known_hashes = st.session_state.setdefault('manifest_hashes', {})
+    if source_id in known_hashes:
+        manifest = cache.get(known_hashes[source_id])
+        if manifest is not None:
+            return manifest
+    
+    data = read_bytes()
+    known_hashes[source_id] = content_hash(data)
+    return cache.get_or_load(data, key=known_hashes[source_id])
+
+def display_cache_stats():
+    """Show manifest cache counters in the sidebar."""
+    stats = get_manifest_cache().stats()
+    with st.sidebar.expander("Manifest Cache"):
+        st.write(f"**Hits:** {stats['hits']} (from disk: {stats['disk_hits']})")
+        st.write(f"**Misses:** {stats['misses']}")
+        st.write(f"**Evictions:** {stats['evictions']}")
+        st.write(f"**Memory:** {stats['total_bytes'] / 1024 / 1024:.1f} / {stats['max_bytes'] / 1024 / 1024:.0f} MB")
+        if stats['entries']:
+            st.dataframe(pd.DataFrame(stats['entries']), hide_index=True)
+
+def display_workspace(workspace):
+    """Show which workspace projects are in memory in the sidebar."""
+    with st.sidebar.expander("Workspace"):
+        status = workspace.status()
+        resident = sum(project['resident'] for project in status)
+        st.write(f"**Projects in memory:** {resident} of {len(status)}")
+        st.write(f"**Loads:** {workspace.loads}")
+        st.dataframe(pd.DataFrame(status), hide_index=True)
+
+# How often sessions in watch mode check for a reloaded manifest
+WATCH_CHECK_SECONDS = 2
+
+@st.fragment(run_every=WATCH_CHECK_SECONDS)
+def check_watched_manifest(watcher):
+    """Rerun the app once the watcher has applied a newer manifest than this session shows."""
+    shown = st.session_state.get('watch_version')
+    if shown is not None and watcher.version != shown:
+        st.rerun()
+
+def display_watch_status(watcher):
+    """Show the watched file and recent reload latencies in the sidebar."""
+    with st.sidebar.expander("Watch", expanded=True):
+        st.write(f"**Watching:** `{watcher.path}` ({watcher.mode})")
+        last = watcher.last_reload
+        if last is not None and last['status'] == 'loaded':
+            st.write(f"**Last reload:** {last['latency_ms']:.0f} ms after the write, parsing took {last['parse_ms']:.0f} ms")
+        elif last is not None:
+            st.warning(f"Last reload failed, showing version {last['version']}: {last['error']}")
+        reloads = watcher.reloads()
+        if reloads:
+            history = pd.DataFrame(reversed(reloads))
+            history['at'] = pd.to_datetime(history['at'], unit='s')
+            st.dataframe(history[['at', 'version', 'status', 'latency_ms', 'parse_ms', 'changes']], hide_index=True)
+
+def display_timings(recorder):
+    """Show the stage timings of this rerun in the sidebar."""
+    run = recorder.finish() if recorder is not None else None
+    with st.sidebar.expander("Debug"):
+        st.checkbox("Show stage timings", key='debug_timings')
+        if run is None or not st.session_state['debug_timings']:
+            return
+        if 'gc_objects' in run:
+            st.write(f"**Rerun:** {run['wall_ms']:.0f} ms, {run['gc_objects']:,} GC-tracked objects")
+        else:
+            st.write(f"**Rerun:** {run['wall_ms']:.0f} ms, GC generation counts {run['gc_counts']}")
+        if run['stages']:
+            st.dataframe(pd.DataFrame(run['stages']).round(2), hide_index=True)
+
+# A fragment lets the export status poll itself without rerunning the whole app
+@st.fragment(run_every=2)
+def poll_render_job(job_id):
+    """Show progress of a running export, rerunning the app once it finishes."""
+    manager = get_render_manager()
+    job = manager.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    
+    st.info(f"Rendering {job.format.upper()}... {job.elapsed:.0f}s")
+    if st.button("✖ Cancel export"):
+        manager.cancel(job_id)
+        st.rerun()
+
+def display_render_job(job_id):
+    """Show the status of a background export and offer the file once it is ready."""
+    job = get_render_manager().get(job_id)
+    if job is None:
+        return
+    
+    if job.status == DONE:
+        st.download_button(
+            label=f"Save {job.format.upper()}",
+            data=job.read(),
+            file_name=f"dbt_erd.{job.format}",
+            mime=RENDER_MIME_TYPES[job.format]
+        )
+    elif job.done:
+        st.error(f"Export {job.status.replace('_', ' ')}: {job.error or 'no details'}")
+    else:
+        poll_render_job(job_id)
+
+def select_search_hit():
+    """Select the model picked from the search results."""
+    if st.session_state.get('search_pick'):
+        st.session_state['selected_model'] = st.session_state['search_pick']
+
+def select_hot_spot():
+    """Select the model picked from the hot spots."""
+    if st.session_state.get('hot_spot_pick'):
+        st.session_state['selected_model'] = st.session_state['hot_spot_pick']
+
+def display_hot_spots(manifest):
+    """Show the most connected models, longest dependency chains and cycles in the sidebar."""
+    analytics = manifest.graph_analytics
+    graph = manifest.lineage_graph
+    with st.sidebar.expander("Hot Spots"):
+        st.write(f"**Longest chain:** {analytics.max_level + 1} models")
+        if analytics.cycles:
+            st.warning(f"{len(analytics.cycles)} dependency cycles: " + "; ".join(
+                " ↔ ".join(graph.display_names[i] for i in cycle) for cycle in analytics.cycles
+            ))
+        hot_spots = analytics.hot_spots()
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'Model': graph.display_names[i],
+                    'Fan-in': analytics.fan_in[i],
+                    'Fan-out': analytics.fan_out[i],
+                    'Level': analytics.level[i],
+                    'Height': analytics.height[i]
+                }
+                for i in hot_spots
+            ]),
+            hide_index=True
+        )
+        st.selectbox(
+            "Select a hot spot",
+            options=[graph.display_names[i] for i in hot_spots],
+            index=None,
+            placeholder="Pick a model to select it",
+            key='hot_spot_pick',
+            on_change=select_hot_spot
+        )
+        st.markdown("**Longest dependency chains:**")
+        for chain in analytics.longest_chains:
+            st.write(" → ".join(graph.display_names[i] for i in chain))
+
+def create_column_dataframe(manifest, node_id):
+    """Create a DataFrame from node columns, with keys from the column index.
+
+    Foreign keys declared in meta whose target does not resolve keep the
+    meta `references` text, as before the column index.
+    """
+    column_index = manifest.column_index
     data = []
-    for col_name, info in node.columns.items():
+    for col_name, info in manifest.node_details(node_id).columns.items():
+        references = column_index.references(node_id, col_name)
+        referenced_by = column_index.referenced_by(node_id, col_name)
+        if references:
+            reference_text = ', '.join(f"{manifest.display_name(link.to_id)}.{link.to_column}" for link in references)
+        elif info.meta.get('is_foreign_key'):
+            reference_text = f"{info.meta.get('references', '')}.{info.meta.get('references_field', '')}"
+        else:
+            reference_text = ''
         data.append({
             'Column': col_name,
             'Type': info.data_type or 'unknown',
             'Description': info.description or '',
-            'Key': 'PK' if info.meta.get('is_key') else ('FK' if info.meta.get('is_foreign_key') else ''),
-            'References': f"{info.meta.get('references', '')}.{info.meta.get('references_field', '')}" if info.meta.get('is_foreign_key') else ''
+            'Key': 'PK' if info.meta.get('is_key') else ('FK' if references or info.meta.get('is_foreign_key') else ''),
+            'References': reference_text,
+            'Referenced by': ', '.join(f"{manifest.display_name(link.from_id)}.{link.from_column}" for link in referenced_by)
         })
     return pd.DataFrame(data)
 
+def format_column_link(manifest, link):
+    return f"{manifest.display_name(link.from_id)}.{link.from_column} → {manifest.display_name(link.to_id)}.{link.to_column}"
+
+def display_column_trace(manifest, node_id):
+    """Let the user pick a key column and list the column path it is part of."""
+    column_index = manifest.column_index
+    linked_columns = [
+        col_name for col_name in manifest.node_details(node_id).columns
+        if column_index.references(node_id, col_name) or column_index.referenced_by(node_id, col_name)
+    ]
+    if not linked_columns:
+        return
+    
+    # The graph reads the traced column on the next rerun to highlight its path
+    traced = st.session_state.get('traced_column')
+    current = traced[1] if traced and traced[0] == node_id and traced[1] in linked_columns else None
+    column = st.selectbox(
+        "Trace column across models",
+        options=[None, *linked_columns],
+        index=0 if current is None else linked_columns.index(current) + 1,
+        format_func=lambda col: 'None' if col is None else col
+    )
+    if column != current:
+        st.session_state['traced_column'] = (node_id, column) if column else None
+        st.rerun()
+    if column:
+        for link in column_index.trace(node_id, column):
+            st.write(f"- {format_column_link(manifest, link)}")
+
 def display_model_details(manifest, selected_model):
     """Display details for the selected model."""
     # Find the actual node ID from the selected model name
-    selected_node_id = None
-    for node_id, node in manifest.nodes.items():
-        if node_id.startswith('model.') and f"{node.schema}.{node.name}" == selected_model:
-            selected_node_id = node_id
-            break
+    selected_node_id = manifest.get_model_id(selected_model)
     
-    if selected_node_id and selected_node_id in manifest.nodes:
-        node = manifest.nodes[selected_node_id]
-        st.markdown(f"### {node.schema}.{node.name}")
+    if selected_node_id:
+        node = manifest.node_details(selected_node_id)
+        st.markdown(f"### {manifest.display_names[selected_node_id]}")
         
         # Show table metadata
         with st.expander("Table Metadata", expanded=True):
             st.write(f"**Description:** {node.description or 'No description available'}")
             st.write(f"**Database:** {node.database or 'Default'}")
             st.write(f"**Schema:** {node.schema}")
+            analytics = manifest.graph_analytics
+            i = manifest.lineage_graph.index[selected_node_id]
+            st.write(
+                f"**Lineage:** level {analytics.level[i]} of {analytics.max_level}, "
+                f"{analytics.fan_in[i]} parents, {analytics.fan_out[i]} children, "
+                f"{analytics.height[i]} levels downstream"
+            )
             if node.meta:
                 st.write("**Metadata:**")
                 st.json(node.meta)
         
         # Show column information
         st.markdown("### Columns")
-        df = create_column_dataframe(node)
+        df = create_column_dataframe(manifest, selected_node_id)
         st.dataframe(
             df,
             column_config={
@@ -73,30 +268,49 @@ def display_model_details(manifest, selected_model):
                 "Type": st.column_config.TextColumn("Type", width="small"),
                 "Description": st.column_config.TextColumn("Description", width="large"),
                 "Key": st.column_config.TextColumn("Key", width="small"),
-                "References": st.column_config.TextColumn("References", width="medium")
+                "References": st.column_config.TextColumn("References", width="medium"),
+                "Referenced by": st.column_config.TextColumn("Referenced by", width="medium")
             },
             hide_index=True,
             use_container_width=True
         )
+        display_column_trace(manifest, selected_node_id)
         
         # Show relationships
         with st.expander("Relationships", expanded=True):
-            incoming = manifest.parent_map.get(selected_node_id, [])
-            outgoing = manifest.child_map.get(selected_node_id, [])
+            # Relationship tests are children too, they are listed separately below
+            incoming = [ref for ref in manifest.parent_map.get(selected_node_id, []) if ref in manifest.model_ids]
+            outgoing = [ref for ref in manifest.child_map.get(selected_node_id, []) if ref in manifest.model_ids]
             
             if incoming:
                 st.markdown("**Referenced by:**")
                 for ref in incoming:
-                    ref_node = manifest.nodes.get(ref)
-                    if ref_node:
-                        st.write(f"- {ref_node.schema}.{ref_node.name}")
+                    ref_name = manifest.display_name(ref)
+                    if ref_name:
+                        st.write(f"- {ref_name}")
             
             if outgoing:
                 st.markdown("**References:**")
                 for ref in outgoing:
-                    ref_node = manifest.nodes.get(ref)
-                    if ref_node:
-                        st.write(f"- {ref_node.schema}.{ref_node.name}")
+                    ref_name = manifest.display_name(ref)
+                    if ref_name:
+                        st.write(f"- {ref_name}")
+            
+            # Foreign keys resolved from relationship tests
+            foreign_keys = manifest.relationship_index.edges_from(selected_node_id)
+            if foreign_keys:
+                st.markdown("**Relationship tests:**")
+                for relationship in foreign_keys:
+                    st.write(
+                        f"- {relationship.from_column} → "
+                        f"{manifest.display_name(relationship.to_id)}.{relationship.to_column}"
+                    )
+
+# Record stage timings of this rerun when the debug panel asks for them
+timings = start_run(
+    st.session_state.get('debug_timings', False),
+    run_id=st.session_state.setdefault('timings_session_id', uuid.uuid4().hex[:12])
+)
 
 st.title("DBT ERD Viewer")
 st.markdown("""
@@ -104,33 +318,70 @@ Upload your dbt manifest.json file to generate an interactive ERD diagram.
 The diagram will show relationships between your models based on refs and relationship tests.
 """)
 
-# Add option to use example manifest
-use_example = st.checkbox("Use example manifest", help="Use a sample manifest.json file to explore the features")
-
-# File uploader (only show if not using example)
-if not use_example:
-    uploaded_file = st.file_uploader("Upload your manifest.json file", type=['json'])
+# A watched target directory, or projects configured for the server, replace uploads.
+# Both are parsed once and shared by every session.
+watcher = get_manifest_watcher()
+workspace = get_workspace() if watcher is None else None
+project = use_example = uploaded_file = None
+if watcher is not None:
+    display_watch_status(watcher)
+elif workspace is not None:
+    project = st.selectbox("Project", options=workspace.names(), key='workspace_project')
 else:
-    uploaded_file = None
-    st.info("Using example manifest file with a simple e-commerce data model")
+    # Add option to use example manifest
+    use_example = st.checkbox("Use example manifest", help="Use a sample manifest.json file to explore the features")
+    
+    # File uploader (only show if not using example)
+    if not use_example:
+        uploaded_file = st.file_uploader("Upload your manifest.json file", type=['json'])
+    else:
+        st.info("Using example manifest file with a simple e-commerce data model")
 
 try:
-    # Load manifest data
-    if uploaded_file is not None:
-        manifest_data = json.load(uploaded_file)
+    # Load manifest data, keeping only the models and relationship tests the ERD needs.
+    # Parsed manifests are cached by content hash, so reruns skip parsing entirely.
+    if watcher is not None:
+        version, manifest = watcher.latest()
+        st.session_state['watch_version'] = version
+        check_watched_manifest(watcher)
+        if manifest is None:
+            st.info(f"Waiting for dbt to write {watcher.path}")
+            st.stop()
+        source = 'watch'
+    elif project is not None:
+        manifest = workspace.get(project)
+        source = f"project:{project}"
+    elif uploaded_file is not None:
+        manifest = load_cached_manifest(uploaded_file.file_id, uploaded_file.getvalue)
+        source = 'upload'
     elif use_example:
-        with open('manifest_example.json', 'r') as f:
-            manifest_data = json.load(f)
+        example_path = pathlib.Path('manifest_example.json')
+        manifest = load_cached_manifest(f"example:{example_path.stat().st_mtime}", example_path.read_bytes)
+        source = 'example'
     else:
         st.info("Please upload a manifest.json file or use the example to begin")
         st.stop()
     
-    # Create manifest object
-    manifest = Manifest(
-        nodes=manifest_data.get('nodes', {}),
-        parent_map=manifest_data.get('parent_map', {}),
-        child_map=manifest_data.get('child_map', {})
-    )
+    # A new version of the same manifest reuses the indexes and layouts of the previous one
+    previous_hash = st.session_state.get('manifest_hash')
+    if source == 'watch' and previous_hash and previous_hash != manifest.content_hash:
+        # The watcher has refreshed the new manifest from the previous one already
+        reload = watcher.reload_of(version)
+        if reload is not None:
+            st.toast(f"Reloaded manifest.json in {reload['latency_ms']:.0f} ms: {reload['changes']}")
+    elif previous_hash and previous_hash != manifest.content_hash and st.session_state.get('manifest_source') == source:
+        previous = get_manifest_cache().get(previous_hash)
+        if previous is not None:
+            diff = refresh_manifest(previous, manifest)
+            st.toast(f"Manifest updated: {diff.summary()}")
+    st.session_state['manifest_hash'] = manifest.content_hash
+    st.session_state['manifest_source'] = source
+    
+    if workspace is not None:
+        display_workspace(workspace)
+    
+    display_hot_spots(manifest)
+    display_cache_stats()
     
     # Initialize session state for selected model if not exists
     if 'selected_model' not in st.session_state:
@@ -140,6 +391,24 @@ try:
     col1, col2 = st.columns([2, 1])
     
     with col1:
+        # Search models by name, columns, types, descriptions and meta keys
+        search_col1, search_col2 = st.columns([1, 2])
+        with search_col1:
+            query = st.text_input("🔎 Search models", placeholder="name, column, type or description")
+        with search_col2:
+            if query:
+                hits = manifest.search_index.search(query)
+                matched = {hit.display_name: hit.matched for hit in hits}
+                st.selectbox(
+                    f"{len(hits)} matches" if hits else "No matches",
+                    options=list(matched),
+                    format_func=lambda name: f"{name} ({matched[name]})",
+                    index=None,
+                    placeholder="Pick a model to select it",
+                    key='search_pick',
+                    on_change=select_search_hit
+                )
+        
         # Create a horizontal layout for controls
         controls_col1, controls_col2, controls_col3 = st.columns([3, 1, 1])
         
@@ -165,31 +434,37 @@ try:
                     horizontal=True
                 )
                 selected_layers = [selected_layer]
+            
+            # Precomputed layouts are placed server side once and skip browser physics
+            layout_mode = st.radio(
+                "Layout:",
+                options=['physics', 'precomputed'],
+                format_func=lambda x: {'physics': 'Browser physics', 'precomputed': 'Precomputed'}[x],
+                horizontal=True
+            )
+            
+            # Level of detail: individual models, or clusters that expand on click
+            cluster_by = st.selectbox(
+                "Detail level:",
+                options=[None, *CLUSTER_KEYS],
+                format_func=lambda x: 'Individual models' if x is None else f"Cluster by {CLUSTER_KEYS[x].lower()}"
+            )
+            if cluster_by and st.session_state.get('expanded_clusters') and st.button("Collapse all clusters"):
+                st.session_state['expanded_clusters'] = set()
         
         with controls_col2:
-            # Add download button
-            if st.button("📥 Download PDF"):
-                # Create static ERD for PDF export
-                dot = create_erd(manifest)
-                
-                # Create a temporary directory that will be cleaned up automatically
-                with tempfile.TemporaryDirectory() as tmp_dir:
-                    # Create full paths for our files
-                    tmp_path = pathlib.Path(tmp_dir)
-                    pdf_path = tmp_path / "erd_diagram.pdf"
-                    
-                    # Render the graph
-                    dot.render(pdf_path, format='pdf', cleanup=True)
-                    
-                    # Add download button for PDF
-                    with open(f"{pdf_path}.pdf", "rb") as pdf_file:
-                        pdf_bytes = pdf_file.read()
-                        st.download_button(
-                            label="Save PDF",
-                            data=pdf_bytes,
-                            file_name="dbt_erd.pdf",
-                            mime="application/pdf"
-                        )
+            # Exports render in the background so the session stays responsive
+            export_format = st.selectbox(
+                "Export format",
+                options=RENDER_FORMATS,
+                format_func=str.upper,
+                label_visibility="collapsed"
+            )
+            if st.button("📥 Download"):
+                # Queue the static ERD, its DOT source is streamed into Graphviz by the render worker
+                key = artifact_key('erd', manifest.content_hash, ORTHO_MAX_NODES, ORTHO_MAX_EDGES)
+                job = get_render_manager().submit_stream(key, lambda: iter_erd_dot(manifest), export_format)
+                st.session_state['render_job_id'] = job.id
         
         with controls_col3:
             # Add clear selection button
@@ -197,39 +472,74 @@ try:
                 st.session_state['selected_model'] = None
                 st.rerun()
         
+        # Show the status of the latest export
+        if st.session_state.get('render_job_id'):
+            display_render_job(st.session_state['render_job_id'])
+        
+        # Add lineage depth controls for the focused view
+        with st.expander("Lineage Depth"):
+            depth_col1, depth_col2, depth_col3 = st.columns(3)
+            with depth_col1:
+                upstream_depth = st.number_input("Upstream hops", min_value=0, max_value=50, value=1)
+            with depth_col2:
+                downstream_depth = st.number_input("Downstream hops", min_value=0, max_value=50, value=1)
+            with depth_col3:
+                max_nodes = st.number_input("Max models (0 = no limit)", min_value=0, value=0, step=50)
+        
         # Create container for the graph
         graph_container = st.container()
         
         with graph_container:
             # Get the current selected model's node ID
             current_model = st.session_state.get('selected_model')
-            selected_node_id = None
-            if current_model:
-                for node_id, node in manifest.nodes.items():
-                    if node_id.startswith('model.') and f"{node.schema}.{node.name}" == current_model:
-                        selected_node_id = node_id
-                        break
+            selected_node_id = manifest.get_model_id(current_model) if current_model else None
             
             # Get connected nodes if a node is selected
-            connected_nodes = get_connected_nodes(manifest, selected_node_id) if selected_node_id else set()
-            
-            # Show graph for selected layer
-            nodes, edges, config = create_interactive_erd(
-                manifest, 
-                selected_layers,
-                filter_nodes=connected_nodes if connected_nodes else None
+            connected_nodes = get_connected_nodes(
+                manifest,
+                selected_node_id,
+                upstream_depth=upstream_depth,
+                downstream_depth=downstream_depth,
+                max_nodes=max_nodes or None
             )
             
-            clicked = agraph(
-                nodes=nodes,
-                edges=edges,
-                config=config
-            )
+            if cluster_by:
+                # Show clusters, with the ones clicked so far expanded into models
+                expanded = {
+                    value for group_by, value in map(parse_cluster_node_id, st.session_state.get('expanded_clusters', set()))
+                    if group_by == cluster_by
+                }
+                nodes, edges, config = create_clustered_erd(manifest, cluster_by, selected_layers, expanded)
+            else:
+                # Show graph for selected layer, focused views reuse the full layer layout
+                positions = get_layout(manifest, selected_layers) if layout_mode == 'precomputed' else None
+                # Highlight the column path traced in the model details
+                traced = st.session_state.get('traced_column')
+                highlight_links = manifest.column_index.trace(*traced) if traced and traced[0] == selected_node_id else ()
+                nodes, edges, config = create_interactive_erd(
+                    manifest, 
+                    selected_layers,
+                    filter_nodes=connected_nodes if connected_nodes else None,
+                    positions=positions,
+                    highlight_links=highlight_links
+                )
+            
+            # Covers serializing the payload to the component, not drawing it in the browser
+            with measure('agraph'):
+                clicked = agraph(
+                    nodes=nodes,
+                    edges=edges,
+                    config=config
+                )
             
             # Update selected model based on clicked node or clear if background clicked
             if clicked == "background":
                 st.session_state['selected_model'] = None
                 st.rerun()
+            elif parse_cluster_node_id(clicked):
+                # Clicking a cluster expands only that cluster
+                st.session_state.setdefault('expanded_clusters', set()).add(clicked)
+                st.rerun()
             elif clicked:
                 st.session_state['selected_model'] = clicked
                 st.rerun()
@@ -246,4 +556,6 @@ except Exception as e:
     st.error(f"Error processing manifest file: {str(e)}")
     # Add more detailed error information in an expander
     with st.expander("Error Details"):
-        st.exception(e) 
\ No newline at end of file
+        st.exception(e)
+
+display_timings(timings) 
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""Load test of the HTTP API in erd_api.py with concurrent keep-alive clients.
+
+Starts `erd_api.py` in its own process on a synthetic or given manifest, then
+runs every scenario for `--duration` seconds with `--clients` threads, each
+holding one keep-alive connection and requesting the scenario's URLs for a
+random sample of models in turn. The first request of every URL misses the
+response cache; the `cold` rows time exactly that pass. `revalidate` sends
+the ETag of an earlier response in If-None-Match, as a polling client would,
+and is answered with 304 and no body.
+
+    python benchmarks/bench_api.py --models 5000 --clients 8
+    python benchmarks/bench_api.py --url http://127.0.0.1:8600 --clients 16
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Scenario -> URL template, {model} is replaced by sampled display names
+SCENARIOS = {
+    'model': '/models/{model}',
+    'lineage': '/models/{model}/lineage?upstream=2&downstream=2',
+    'relationships': '/models/{model}/relationships',
+    'erd_json': '/erd.json?model={model}&upstream=1&downstream=1',
+    'erd_dot': '/erd.dot?model={model}&upstream=1&downstream=1',
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(connection: http.client.HTTPConnection, path: str,
+         etag: Optional[str] = None) -> Tuple[int, Optional[str], bytes]:
+    connection.request('GET', path, headers={'If-None-Match': etag} if etag else {})
+    response = connection.getresponse()
+    return response.status, response.getheader('ETag'), response.read()
+
+
+def _wait_for(host: str, port: int, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=timeout)
+            _get(connection, '/projects')
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"erd_api.py did not start on {host}:{port}")
+
+
+def run_clients(host: str, port: int, paths: List[str], clients: int, duration: Optional[float],
+                etags: Optional[Dict[str, str]] = None) -> Dict:
+    """Request `paths` from `clients` threads; each path once when `duration` is None."""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    queue = list(paths)
+    random.shuffle(queue)
+
+    def client(n: int) -> None:
+        connection = http.client.HTTPConnection(host, port, timeout=600)
+        own, failed = [], 0
+        deadline = time.monotonic() + duration if duration is not None else None
+        k = n
+        while True:
+            if deadline is None:
+                with lock:
+                    if not queue:
+                        break
+                    path = queue.pop()
+            else:
+                if time.monotonic() >= deadline:
+                    break
+                path = paths[k % len(paths)]
+                k += clients
+            start = time.perf_counter()
+            status, _, _ = _get(connection, path, etags.get(path) if etags else None)
+            own.append(time.perf_counter() - start)
+            if status not in (200, 304):
+                failed += 1
+        connection.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'req_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2) if latencies else None
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Load test a running server instead of starting one')
+    parser.add_argument('--manifest', help='Existing manifest.json to serve instead of a synthetic one')
+    parser.add_argument('--models', type=int, default=5000, help='Model count of the synthetic manifest')
+    parser.add_argument('--sample', type=int, default=200, help='Number of models requested per scenario')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent client connections')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per warm scenario')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    server = tmp_path = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        path = args.manifest
+        if path is None:
+            from synthetic_manifest import write_manifest
+            fd, tmp_path = tempfile.mkstemp(suffix='.json')
+            os.close(fd)
+            path = write_manifest(tmp_path, n_models=args.models)
+        host, port = '127.0.0.1', _free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'erd_api.py'), f"bench={path}", '--port', str(port), '--quiet'],
+            stderr=subprocess.DEVNULL
+        )
+
+    try:
+        _wait_for(host, port)
+        connection = http.client.HTTPConnection(host, port, timeout=600)
+        start = time.perf_counter()
+        _, _, body = _get(connection, '/models')
+        print(f"first request, loading the manifest: {time.perf_counter() - start:.2f}s")
+        names = [model['name'] for model in json.loads(body)['models']]
+        sample = random.Random(0).sample(names, min(args.sample, len(names)))
+
+        results = {}
+        print(f"{'scenario':<24} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+        for scenario, template in SCENARIOS.items():
+            paths = [template.format(model=quote(name)) for name in sample]
+            for phase, duration in (('cold', None), ('warm', args.duration)):
+                row = run_clients(host, port, paths, args.clients, duration)
+                results[f"{scenario}_{phase}"] = row
+                print(f"{scenario + ' ' + phase:<24} {row['requests']:>9} {row['errors']:>7} {row['req_per_s']:>9} "
+                      f"{row['p50_ms']:>9} {row['p99_ms']:>9}")
+
+        paths = [SCENARIOS['erd_json'].format(model=quote(name)) for name in sample]
+        etags = {path: _get(connection, path)[1] for path in paths}
+        row = run_clients(host, port, paths, args.clients, args.duration, etags)
+        results['revalidate'] = row
+        print(f"{'revalidate':<24} {row['requests']:>9} {row['errors']:>7} {row['req_per_s']:>9} "
+              f"{row['p50_ms']:>9} {row['p99_ms']:>9}")
+        connection.close()
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'clients': args.clients, 'models': len(names), 'results': results}, f, indent=2)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
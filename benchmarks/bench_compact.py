@@ -0,0 +1,66 @@
+"""Memory of the compact node table against the pydantic model nodes.
+
+For each model count the Python heap retained by the validated `ManifestNode`
+objects of all models is compared with the `CompactNodes` table the ERD
+builders read. The compact table leans on the `LineageGraph` for schema, layer
+and dv_type codes; the graph is built anyway for lineage queries and is
+reported separately.
+
+    python benchmarks/bench_compact.py --models 10000 50000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compact_nodes import CompactNodes  # noqa: E402
+from lineage_graph import LineageGraph  # noqa: E402
+from manifest_loader import manifest_from_dict  # noqa: E402
+from models import ManifestNode  # noqa: E402
+from synthetic_manifest import generate_manifest  # noqa: E402
+
+
+def _retained(build):
+    """(result, retained MB, seconds) of building something under tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, retained / 1024 / 1024, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--columns', type=int, default=15, help='Columns per model')
+    args = parser.parse_args()
+
+    print(f"{'models':>8} {'pydantic MB':>12} {'compact MB':>11} {'graph MB':>9} {'ratio':>6} {'compact build s':>16}")
+    for n_models in args.models:
+        data = generate_manifest(n_models=n_models, columns_per_model=args.columns, code_size=0, noise_ratio=0)
+        model_data = {node_id: node for node_id, node in data['nodes'].items() if node_id.startswith('model.')}
+
+        _, pydantic_mb, _ = _retained(lambda: {
+            node_id: ManifestNode.model_validate(node) for node_id, node in model_data.items()
+        })
+
+        manifest = manifest_from_dict(data)
+        graph, graph_mb, _ = _retained(lambda: LineageGraph.from_manifest(manifest))
+        manifest._lineage_graph = graph
+        _, compact_mb, compact_s = _retained(lambda: CompactNodes.from_manifest(manifest))
+
+        print(f"{n_models:>8} {pydantic_mb:>12.1f} {compact_mb:>11.1f} {graph_mb:>9.1f} "
+              f"{pydantic_mb / max(compact_mb + graph_mb, 0.01):>5.1f}x {compact_s:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
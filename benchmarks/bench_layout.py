@@ -0,0 +1,70 @@
+"""Server-side cost of the physics and precomputed layout modes.
+
+Reports, per mode, the time to build the agraph payload (including the layout
+when it is not cached yet) and the payload size sent to the browser. In physics
+mode the browser still has to run up to 2000 stabilization iterations before
+the first settled frame; in precomputed mode the first frame is final, so the
+numbers below are the whole server-side part of time to first interactive frame.
+Browser-side time is not measured here.
+
+    python benchmarks/bench_layout.py --models 2000 --engine layered
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import layout  # noqa: E402
+from erd_generator import create_interactive_erd  # noqa: E402
+from manifest_loader import manifest_from_dict  # noqa: E402
+from synthetic_manifest import generate_manifest  # noqa: E402
+
+LAYERS = ['raw', 'staging', 'core', 'mart']
+
+
+def _payload_bytes(nodes, edges, config) -> int:
+    """Size of the JSON streamlit-agraph sends to the component."""
+    return len(json.dumps({
+        'nodes': [node.to_dict() for node in nodes],
+        'edges': [edge.to_dict() for edge in edges],
+        'config': config.__dict__
+    }, default=str))
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', type=int, default=2000)
+    parser.add_argument('--engine', default='auto', choices=('auto', 'dot', 'layered'))
+    args = parser.parse_args()
+
+    manifest = manifest_from_dict(generate_manifest(n_models=args.models, code_size=0, noise_ratio=0))
+    manifest.lineage_graph  # Built once per manifest in the app as well
+
+    payload, physics_s = _timed(lambda: create_interactive_erd(manifest, LAYERS))
+    physics_bytes = _payload_bytes(*payload)
+
+    layout._layouts.clear()
+    positions, layout_cold_s = _timed(lambda: layout.get_layout(manifest, LAYERS, args.engine))
+    payload, precomputed_s = _timed(lambda: create_interactive_erd(manifest, LAYERS, positions=positions))
+    precomputed_bytes = _payload_bytes(*payload)
+    _, layout_warm_s = _timed(lambda: layout.get_layout(manifest, LAYERS, args.engine))
+
+    print(f"models: {len(manifest.lineage_graph)}  edges: {manifest.lineage_graph.edge_count}  engine: {args.engine}")
+    print(f"{'mode':<24} {'server ms':>10} {'payload KiB':>12} {'browser stabilization':>22}")
+    print(f"{'physics':<24} {physics_s * 1000:>10.1f} {physics_bytes / 1024:>12.0f} {'up to 2000 iterations':>22}")
+    print(f"{'precomputed (cold)':<24} {(layout_cold_s + precomputed_s) * 1000:>10.1f} {precomputed_bytes / 1024:>12.0f} {'none':>22}")
+    print(f"{'precomputed (cached)':<24} {(layout_warm_s + precomputed_s) * 1000:>10.1f} {precomputed_bytes / 1024:>12.0f} {'none':>22}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Lineage query latency on a synthetic graph, cold and memoized.
+
+    python benchmarks/bench_lineage.py --models 10000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from manifest_loader import manifest_from_dict  # noqa: E402
+from synthetic_manifest import generate_manifest  # noqa: E402
+
+DEPTHS = ((1, 1), (3, 3), (10, 10), (None, None))
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return (
+        statistics.median(samples) * 1000,
+        samples[int(len(samples) * 0.95) - 1] * 1000
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', type=int, default=10000)
+    parser.add_argument('--fan-in', type=int, default=3)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--max-nodes', type=int, default=None)
+    args = parser.parse_args()
+
+    manifest = manifest_from_dict(generate_manifest(n_models=args.models, fan_in=args.fan_in, code_size=0, noise_ratio=0))
+    graph = manifest.lineage_graph
+    rng = random.Random(0)
+    targets = [rng.choice(graph.node_ids) for _ in range(args.queries)]
+
+    print(f"models: {len(graph)}  edges: {graph.edge_count}  queries: {args.queries}  budget: {args.max_nodes}")
+    print(f"{'up/down':<12} {'avg size':>9} {'cold p50 ms':>12} {'cold p95 ms':>12} {'memo p50 ms':>12}")
+    for upstream, downstream in DEPTHS:
+        cold, warm, sizes = [], [], []
+        for node_id in targets:
+            graph._lineage_cache.clear()
+            start = time.perf_counter()
+            result = graph.lineage(node_id, upstream, downstream, args.max_nodes)
+            cold.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            graph.lineage(node_id, upstream, downstream, args.max_nodes)
+            warm.append(time.perf_counter() - start)
+            sizes.append(len(result))
+        cold_p50, cold_p95 = _percentiles(cold)
+        warm_p50, _ = _percentiles(warm)
+        label = f"{upstream}/{downstream}"
+        print(f"{label:<12} {statistics.mean(sizes):>9.0f} {cold_p50:>12.3f} {cold_p95:>12.3f} {warm_p50:>12.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Compare edge iteration and memory of the CSR lineage graph with the dict maps.
+
+    python benchmarks/bench_lineage_graph.py --models 20000 --fan-in 5
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from manifest_loader import manifest_from_dict  # noqa: E402
+from synthetic_manifest import generate_manifest  # noqa: E402
+
+
+def _deep_size(edges: dict) -> int:
+    """Bytes held by a dict of string lists, counting every object once."""
+    seen = set()
+    total = sys.getsizeof(edges)
+    for key, values in edges.items():
+        total += sys.getsizeof(values)
+        for item in (key, *values):
+            if id(item) not in seen:
+                seen.add(id(item))
+                total += sys.getsizeof(item)
+    return total
+
+
+def _walk_maps(manifest, layers) -> int:
+    """Edge walk as the builders did it before the lineage graph existed."""
+    count = 0
+    for node_id, parents in manifest.parent_map.items():
+        if not node_id.startswith('model.'):
+            continue
+        node = manifest.nodes.get(node_id)
+        if not node or node.meta.get('layer', '') not in layers:
+            continue
+        for parent_id in parents:
+            if not parent_id.startswith('model.'):
+                continue
+            parent_node = manifest.nodes.get(parent_id)
+            if not parent_node or parent_node.meta.get('layer', '') not in layers:
+                continue
+            count += 1
+    return count
+
+
+def _walk_graph(manifest, layers) -> int:
+    graph = manifest.lineage_graph
+    return sum(1 for _ in graph.edges(graph.select(layers)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', type=int, default=10000)
+    parser.add_argument('--fan-in', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    manifest = manifest_from_dict(generate_manifest(n_models=args.models, fan_in=args.fan_in, code_size=0, noise_ratio=0))
+    layers = ['raw', 'staging', 'core', 'mart']
+
+    start = time.perf_counter()
+    graph = manifest.lineage_graph
+    build_s = time.perf_counter() - start
+
+    arrays = (graph.parent_offsets, graph.parent_indices, graph.child_offsets, graph.child_indices,
+              graph.layer_codes, graph.schema_codes, graph.dv_type_codes)
+    csr_bytes = sum(a.buffer_info()[1] * a.itemsize for a in arrays)
+    map_bytes = _deep_size(manifest.parent_map) + _deep_size(manifest.child_map)
+
+    print(f"models: {len(graph)}  model edges: {graph.edge_count}  graph build: {build_s * 1000:.1f} ms")
+    print(f"adjacency memory: dict maps {map_bytes / 1024:.0f} KiB, CSR arrays {csr_bytes / 1024:.0f} KiB")
+    for name, walk in (('dict maps', _walk_maps), ('CSR graph', _walk_graph)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            edges = walk(manifest, layers)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{name:<10} {edges} edges in {elapsed * 1000:.1f} ms per walk")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Compare peak RSS, wall time and throughput of the manifest loaders.
+
+Every loader runs in a fresh interpreter so peak RSS is not shared between runs.
+`resident_mb` is the RSS left once the manifest is loaded and its bytes are
+dropped, which for `indexed` leaves out the columns and descriptions it reads
+from the memory-mapped file on demand. `--check` first asserts that the
+streaming, msgspec, indexed and plain json + pydantic paths build identical
+Manifest objects, and that loaders reading the same encoding of a node, its
+bytes or its decoded value, agree on its content hash.
+
+    python benchmarks/bench_loader.py --models 20000
+    python benchmarks/bench_loader.py --manifest path/to/manifest.json --check
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LOADERS = ('eager', 'streaming', 'msgspec', 'indexed')
+
+
+def _resident_kb() -> int:
+    """Current RSS in KB, from /proc on Linux."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def _run_child(loader: str, path: str) -> None:
+    """Load the manifest once and print the measurements as JSON."""
+    import gc
+    import manifest_loader
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        if loader == 'eager':
+            manifest = manifest_loader.load_manifest_eager(f)
+        elif loader in ('msgspec', 'indexed'):
+            if manifest_loader.fast_decoder is None:
+                raise SystemExit('msgspec is not installed')
+            if loader == 'msgspec':
+                manifest = manifest_loader.load_manifest_fast(f)
+            else:
+                manifest = manifest_loader._decode_indexed(f.read(), tempfile.mkdtemp())
+        else:
+            manifest = manifest_loader.load_manifest(f)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    gc.collect()
+    resident_kb = _resident_kb()
+    if loader == 'indexed':
+        shutil.rmtree(os.path.dirname(manifest._node_store.path))
+
+    print(json.dumps({
+        'loader': loader,
+        'wall_s': round(elapsed, 3),
+        'mb_per_s': round(os.path.getsize(path) / (1024 * 1024) / elapsed, 1),
+        'peak_rss_mb': round(peak_kb / 1024, 1),
+        'peak_rss_delta_mb': round((peak_kb - baseline_kb) / 1024, 1),
+        'resident_mb': round(resident_kb / 1024, 1),
+        'nodes_kept': len(manifest.nodes)
+    }))
+
+
+def check_equivalence(path: str) -> None:
+    """Assert every model-only loader builds the same Manifest from `path`."""
+    import manifest_loader
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    reference = manifest_loader.manifest_from_dict(json.loads(data))
+    candidates = {'streaming': manifest_loader.load_manifest(io.BytesIO(data))}
+    indexed = None
+    if manifest_loader.fast_decoder is not None:
+        candidates['msgspec'] = manifest_loader._decode_fast(data)
+        store_dir = tempfile.mkdtemp()
+        indexed = manifest_loader._decode_indexed(data, store_dir)
+    for name, manifest in candidates.items():
+        assert manifest == reference, f"{name} loader differs from json + pydantic"
+    if indexed is not None:
+        assert list(indexed.nodes) == list(reference.nodes), "indexed loader keeps other nodes"
+        assert (indexed.parent_map, indexed.child_map, indexed.sources) == \
+            (reference.parent_map, reference.child_map, reference.sources), "indexed loader differs"
+        for node_id, node in reference.nodes.items():
+            assert indexed.node_details(node_id) == node, f"indexed: details of {node_id} differ"
+        candidates['indexed'] = indexed
+    # msgspec hashes the bytes of every node, the other loaders its decoded value
+    pairs = [('streaming', reference)] + ([('indexed', candidates['msgspec'])] if indexed is not None else [])
+    for name, expected in pairs:
+        manifest = candidates[name]
+        for node_id in (*reference.nodes, *reference.sources):
+            assert manifest.node_hash(node_id) == expected.node_hash(node_id), f"{name}: hash of {node_id} differs"
+    if indexed is not None:
+        indexed._node_store.close()
+        shutil.rmtree(store_dir)
+    print(f"identical: json + pydantic, {', '.join(candidates)} ({len(reference.nodes)} nodes)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', help='Existing manifest.json to load instead of a synthetic one')
+    parser.add_argument('--models', type=int, default=10000, help='Model count of the synthetic manifest')
+    parser.add_argument('--check', action='store_true', help='Assert the loaders build identical manifests first')
+    parser.add_argument('--child', nargs=2, metavar=('LOADER', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        loader, child_path = args.child
+        if loader == 'check':
+            check_equivalence(child_path)
+        else:
+            _run_child(loader, child_path)
+        return
+
+    tmp_path = None
+    path = args.manifest
+    if path is None:
+        from synthetic_manifest import write_manifest
+        fd, tmp_path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        path = write_manifest(tmp_path, n_models=args.models)
+
+    try:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"manifest: {path} ({size_mb:.1f} MB)")
+        if args.check:
+            # In a child as well, so the loaded manifests do not count towards the measured peaks
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', 'check', path],
+                capture_output=True, text=True, check=True
+            )
+            print(result.stdout.strip())
+        print(f"{'loader':<10} {'wall (s)':>10} {'MB/s':>8} {'peak RSS (MB)':>15} {'RSS delta (MB)':>15} "
+              f"{'resident (MB)':>14} {'nodes':>8}")
+        for loader in LOADERS:
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', loader, path],
+                capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                print(f"{loader:<10} skipped: {result.stderr.strip().splitlines()[-1]}")
+                continue
+            row = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{row['loader']:<10} {row['wall_s']:>10} {row['mb_per_s']:>8} {row['peak_rss_mb']:>15} "
+                  f"{row['peak_rss_delta_mb']:>15} {row['resident_mb']:>14} {row['nodes_kept']:>8}")
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
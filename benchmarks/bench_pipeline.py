@@ -0,0 +1,204 @@
+"""Time and memory of every ERD pipeline stage on synthetic manifests.
+
+Stages run in the order the app runs them, on a freshly decoded manifest each
+repetition so no lazily built index or layout cache is shared between runs:
+
+    json_decode            json.loads of the manifest bytes
+    manifest_validation    filtering and pydantic validation into a Manifest
+    extract_relationships  first call, which builds the relationship index
+    create_interactive_erd streamlit-agraph nodes and edges for all layers
+    create_networkx_erd    NetworkX graph plus the cached server-side layout
+    create_pyvis_erd       Pyvis network written to an HTML file
+    create_erd_dot         DOT source of the static ERD
+
+Wall time is the median over `--repeat` untraced runs. Memory is measured in
+one extra run under tracemalloc: `peak_alloc_mb` is the highest Python heap
+use above the start of the stage and `retained_mb` what is still allocated
+when it ends. Results are written as JSON; with `--baseline` every stage that
+got slower or bigger than `--threshold` is flagged and the exit status is 1.
+
+    python benchmarks/bench_pipeline.py --models 1000 10000 --output results.json
+    python benchmarks/bench_pipeline.py --models 1000 10000 --baseline results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import layout  # noqa: E402
+from erd_generator import (  # noqa: E402
+    create_erd, create_interactive_erd, create_networkx_erd, create_pyvis_erd, extract_relationships
+)
+from manifest_loader import manifest_from_dict  # noqa: E402
+from synthetic_manifest import generate_manifest  # noqa: E402
+
+STAGES = (
+    'json_decode', 'manifest_validation', 'extract_relationships', 'create_interactive_erd',
+    'create_networkx_erd', 'create_pyvis_erd', 'create_erd_dot'
+)
+# Metrics compared against a baseline, and the smallest change worth flagging
+COMPARED_METRICS = {'wall_s': 0.005, 'peak_alloc_mb': 1.0}
+
+
+def _pyvis(manifest):
+    path = create_pyvis_erd(manifest)
+    os.remove(path)
+
+
+def _stage_functions(raw: bytes):
+    """Stage name -> function of the previous stage's result."""
+    def run_on_manifest(fn):
+        def stage(manifest):
+            fn(manifest)
+            return manifest
+        return stage
+
+    def networkx(manifest):
+        layout._layouts.clear()
+        create_networkx_erd(manifest)
+
+    return {
+        'json_decode': lambda _: json.loads(raw),
+        'manifest_validation': manifest_from_dict,
+        'extract_relationships': run_on_manifest(extract_relationships),
+        'create_interactive_erd': run_on_manifest(create_interactive_erd),
+        'create_networkx_erd': run_on_manifest(networkx),
+        'create_pyvis_erd': run_on_manifest(_pyvis),
+        'create_erd_dot': run_on_manifest(lambda manifest: create_erd(manifest).source)
+    }
+
+
+def _run_pipeline(raw: bytes, stages, traced: bool = False):
+    """Run the stages once, returning {stage: measurements}."""
+    functions = _stage_functions(raw)
+    result = None
+    measurements = {}
+    for name in STAGES:
+        # Decoding and validation feed every later stage, so they always run
+        if name not in stages and name not in ('json_decode', 'manifest_validation'):
+            continue
+        gc.collect()
+        if traced:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = functions[name](result)
+        elapsed = time.perf_counter() - start
+        if traced:
+            current, peak = tracemalloc.get_traced_memory()
+            measurements[name] = {
+                'peak_alloc_mb': round((peak - before) / (1024 * 1024), 2),
+                'retained_mb': round((current - before) / (1024 * 1024), 2)
+            }
+        else:
+            measurements[name] = {'wall_s': elapsed}
+    return measurements
+
+
+def benchmark(params: dict, stages, repeat: int) -> dict:
+    # The ERD builders import their libraries lazily, keep that out of the first run
+    import networkx, pyvis.network, streamlit_agraph  # noqa: F401,E401
+    raw = json.dumps(generate_manifest(**params)).encode('utf-8')
+    runs = [_run_pipeline(raw, stages) for _ in range(repeat)]
+
+    tracemalloc.start()
+    try:
+        memory = _run_pipeline(raw, stages, traced=True)
+    finally:
+        tracemalloc.stop()
+
+    results = {}
+    for name in STAGES:
+        if name not in stages:
+            continue
+        samples = [run[name]['wall_s'] for run in runs]
+        results[name] = {
+            'wall_s': round(statistics.median(samples), 4),
+            'wall_min_s': round(min(samples), 4),
+            **memory[name]
+        }
+    return {'params': params, 'manifest_mb': round(len(raw) / (1024 * 1024), 2), 'stages': results}
+
+
+def compare(current: dict, baseline: dict, threshold: float):
+    """Regressions as (models, stage, metric, baseline value, current value)."""
+    previous = {str(run['params']['n_models']): run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in current['runs']:
+        old_run = previous.get(str(run['params']['n_models']))
+        if old_run is None or old_run['params'] != run['params']:
+            continue
+        for stage, values in run['stages'].items():
+            old = old_run['stages'].get(stage)
+            if old is None:
+                continue
+            for metric, min_change in COMPARED_METRICS.items():
+                if values[metric] - old[metric] > max(old[metric] * threshold, min_change):
+                    regressions.append((run['params']['n_models'], stage, metric, old[metric], values[metric]))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--columns', type=int, default=10, help='Columns per model')
+    parser.add_argument('--fan-in', type=int, default=2)
+    parser.add_argument('--fan-out', type=int, default=0)
+    parser.add_argument('--layer-mix', type=json.loads, default=None,
+                        help='JSON object of layer fractions, e.g. \'{"raw": 0.1, "core": 0.9}\'')
+    parser.add_argument('--relationship-density', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Earlier results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative increase flagged as a regression')
+    args = parser.parse_args()
+
+    current = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': []
+    }
+    print(f"{'models':>8} {'stage':<24} {'wall (s)':>10} {'peak alloc (MB)':>16} {'retained (MB)':>14}")
+    for n_models in args.models:
+        params = {
+            'n_models': n_models,
+            'columns_per_model': args.columns,
+            'fan_in': args.fan_in,
+            'fan_out': args.fan_out,
+            'layer_mix': args.layer_mix,
+            'relationship_density': args.relationship_density,
+            'seed': args.seed
+        }
+        run = benchmark(params, set(args.stages), args.repeat)
+        current['runs'].append(run)
+        for stage, values in run['stages'].items():
+            print(f"{n_models:>8} {stage:<24} {values['wall_s']:>10.4f} {values['peak_alloc_mb']:>16.1f} {values['retained_mb']:>14.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        for n_models, stage, metric, old, new in regressions:
+            print(f"REGRESSION {n_models} models {stage} {metric}: {old} -> {new}")
+        if regressions:
+            return 1
+        print(f"No regressions above {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
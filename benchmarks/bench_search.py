@@ -0,0 +1,79 @@
+"""Build cost and query latency of the model search index.
+
+Reports the time and Python heap needed to build the index once per manifest,
+then median and p95 latency of exact, prefix and misspelled queries, cold and
+answered from the query memo.
+
+    python benchmarks/bench_search.py --models 6000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from manifest_loader import manifest_from_dict  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from synthetic_manifest import generate_manifest  # noqa: E402
+
+
+def _queries(index: SearchIndex, count: int, seed: int = 0):
+    """Exact names, name prefixes and names with one character dropped."""
+    rng = random.Random(seed)
+    names = [name.split('.', 1)[1] for name in index.display_names]
+    exact = [rng.choice(names) for _ in range(count)]
+    prefix = [name[:max(3, len(name) // 2)] for name in exact]
+    typo = []
+    for name in exact:
+        position = rng.randrange(1, len(name))
+        typo.append(name[:position] + name[position + 1:])
+    return {'exact': exact, 'prefix': prefix, 'typo': typo, 'column': [f"col_{rng.randrange(1, 10)}" for _ in range(count)]}
+
+
+def _latencies(index: SearchIndex, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95) - 1] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', type=int, default=6000)
+    parser.add_argument('--columns', type=int, default=20, help='Columns per model')
+    parser.add_argument('--queries', type=int, default=100)
+    args = parser.parse_args()
+
+    manifest = manifest_from_dict(generate_manifest(
+        n_models=args.models, columns_per_model=args.columns, code_size=0, noise_ratio=0
+    ))
+
+    start = time.perf_counter()
+    SearchIndex.from_manifest(manifest)
+    build_s = time.perf_counter() - start
+
+    tracemalloc.start()
+    index = SearchIndex.from_manifest(manifest)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"models: {args.models}  columns per model: {args.columns}  vocabulary: {len(index.vocabulary)} tokens")
+    print(f"build: {build_s * 1000:.0f} ms  retained: {retained / 1024 / 1024:.1f} MB  peak: {peak / 1024 / 1024:.1f} MB")
+    print(f"{'queries':<10} {'cold p50 ms':>12} {'cold p95 ms':>12} {'memo p50 ms':>12}")
+    for kind, queries in _queries(index, args.queries).items():
+        index._queries.clear()
+        cold_p50, cold_p95 = _latencies(index, queries)
+        memo_p50, _ = _latencies(index, queries)
+        print(f"{kind:<10} {cold_p50:>12.3f} {cold_p95:>12.3f} {memo_p50:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""Deterministic generator for synthetic dbt manifests used by the benchmarks."""
+import json
+import random
+from typing import Dict, Optional
+
+LAYERS = ('raw', 'staging', 'core', 'mart')
+DV_TYPES = ('hub', 'link', 'satellite')
+DEFAULT_LAYER_MIX = {'raw': 0.15, 'staging': 0.25, 'core': 0.4, 'mart': 0.2}
+PACKAGE = 'synthetic'
+
+
+def _layer_for(index: int, n_models: int, layer_mix: Dict[str, float]) -> str:
+    """Assign layers in contiguous blocks so parents always come from earlier layers."""
+    position = index / max(n_models, 1)
+    cumulative = 0.0
+    for layer in LAYERS:
+        cumulative += layer_mix.get(layer, 0.0)
+        if position < cumulative:
+            return layer
+    return LAYERS[-1]
+
+
+def generate_manifest(
+    n_models: int = 1000,
+    columns_per_model: int = 10,
+    fan_in: int = 2,
+    fan_out: int = 0,
+    layer_mix: Optional[Dict[str, float]] = None,
+    relationship_density: float = 0.3,
+    code_size: int = 2000,
+    noise_ratio: float = 1.0,
+    seed: int = 42
+) -> dict:
+    """Generate a manifest.json-shaped dict.
+
+    Args:
+        n_models: Number of model nodes.
+        columns_per_model: Columns on every model.
+        fan_in: Maximum number of parents per non-raw model.
+        fan_out: Maximum number of child models per model, 0 for no limit.
+        layer_mix: Fraction of models in each layer.
+        relationship_density: Probability that a parent edge also gets a relationships test.
+        code_size: Characters of raw/compiled SQL per node, which the ERD never reads.
+        noise_ratio: Non-model nodes (seeds, generic tests) generated per model.
+        seed: Random seed, the same arguments always produce the same manifest.
+    """
+    rng = random.Random(seed)
+    layer_mix = layer_mix or DEFAULT_LAYER_MIX
+    filler = 'select 1 as x ' * max(code_size // 14, 0)
+
+    nodes = {}
+    parent_map = {}
+    child_map = {}
+    model_ids = []
+    first_in_layer = {}
+    child_counts = {}
+
+    for index in range(n_models):
+        layer = _layer_for(index, n_models, layer_mix)
+        first_in_layer.setdefault(layer, index)
+        name = f"{layer}_model_{index}"
+        unique_id = f"model.{PACKAGE}.{name}"
+        meta = {'layer': layer}
+        if layer == 'core':
+            meta['dv_type'] = DV_TYPES[index % len(DV_TYPES)]
+
+        columns = {'id': {'name': 'id', 'description': f"Primary key of {name}", 'data_type': 'varchar', 'meta': {'is_key': True}}}
+        for col in range(1, columns_per_model):
+            col_name = f"col_{col}"
+            columns[col_name] = {
+                'name': col_name,
+                'description': f"Column {col} of {name}",
+                'data_type': rng.choice(('varchar', 'integer', 'timestamp', 'decimal', 'boolean')),
+                'meta': {}
+            }
+
+        # Parents are drawn from earlier models, which keeps the graph acyclic
+        parents = []
+        if layer != LAYERS[0] and index > 0:
+            upper = first_in_layer[layer] if first_in_layer[layer] > 0 else index
+            for _ in range(rng.randint(1, max(fan_in, 1))):
+                parent_id = model_ids[rng.randrange(0, upper)]
+                if fan_out and child_counts.get(parent_id, 0) >= fan_out:
+                    continue
+                if parent_id not in parents:
+                    child_counts[parent_id] = child_counts.get(parent_id, 0) + 1
+                    parents.append(parent_id)
+
+        nodes[unique_id] = {
+            'unique_id': unique_id,
+            'resource_type': 'model',
+            'package_name': PACKAGE,
+            'name': name,
+            'schema': layer,
+            'database': 'analytics',
+            'description': f"Synthetic {layer} model number {index}",
+            'columns': columns,
+            'meta': meta,
+            'refs': [[nodes[p]['name']] for p in parents],
+            'depends_on': {'nodes': parents, 'macros': []},
+            'raw_code': filler,
+            'compiled_code': filler
+        }
+        parent_map[unique_id] = list(parents)
+        child_map[unique_id] = []
+        for parent_id in parents:
+            child_map[parent_id].append(unique_id)
+
+            if rng.random() < relationship_density:
+                parent_name = nodes[parent_id]['name']
+                test_id = f"test.{PACKAGE}.relationships_{name}_id__id__ref_{parent_name}_.{index:x}{len(nodes):x}"
+                nodes[test_id] = {
+                    'unique_id': test_id,
+                    'resource_type': 'test',
+                    'package_name': PACKAGE,
+                    'name': f"relationships_{name}_id__id__ref_{parent_name}_",
+                    'schema': f"{layer}_dbt_test__audit",
+                    'database': 'analytics',
+                    'column_name': 'id',
+                    'attached_node': unique_id,
+                    'test_metadata': {
+                        'name': 'relationships',
+                        'kwargs': {
+                            'to': f"ref('{parent_name}')",
+                            'field': 'id',
+                            'column_name': 'id',
+                            'model': f"{{{{ get_where_subquery(ref('{name}')) }}}}"
+                        },
+                        'namespace': None
+                    },
+                    'refs': [[parent_name], [name]],
+                    'depends_on': {'nodes': [parent_id, unique_id], 'macros': []},
+                    'raw_code': filler,
+                    'compiled_code': filler
+                }
+                parent_map[test_id] = [parent_id, unique_id]
+                child_map[test_id] = []
+                child_map[unique_id].append(test_id)
+                child_map[parent_id].append(test_id)
+
+        model_ids.append(unique_id)
+
+    # Resources the ERD ignores but which make up most of a real manifest
+    for index in range(int(n_models * noise_ratio)):
+        if index % 2:
+            unique_id = f"seed.{PACKAGE}.seed_{index}"
+            resource_type = 'seed'
+        else:
+            unique_id = f"test.{PACKAGE}.not_null_{index}.{index:x}"
+            resource_type = 'test'
+        nodes[unique_id] = {
+            'unique_id': unique_id,
+            'resource_type': resource_type,
+            'package_name': PACKAGE,
+            'name': unique_id.split('.')[2],
+            'schema': 'noise',
+            'database': 'analytics',
+            'raw_code': filler,
+            'compiled_code': filler,
+            'test_metadata': {'name': 'not_null', 'kwargs': {'column_name': 'id'}} if resource_type == 'test' else None
+        }
+        parent_map[unique_id] = []
+        child_map[unique_id] = []
+
+    return {
+        'metadata': {'dbt_version': '1.7.0', 'generator': 'synthetic'},
+        'nodes': nodes,
+        'sources': {},
+        'macros': {f"macro.{PACKAGE}.m_{i}": {'name': f"m_{i}", 'macro_sql': filler} for i in range(n_models // 10)},
+        'parent_map': parent_map,
+        'child_map': child_map
+    }
+
+
+def write_manifest(path: str, **kwargs) -> str:
+    """Generate a synthetic manifest and write it to `path`."""
+    with open(path, 'w') as f:
+        json.dump(generate_manifest(**kwargs), f)
+    return path
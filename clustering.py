@@ -0,0 +1,61 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CLUSTER_PREFIX = 'cluster:'
+# Attributes models can be clustered by, with their labels in the app
+CLUSTER_KEYS = {
+    'layer': 'Layer',
+    'schema': 'Schema',
+    'dv_type': 'Data Vault type'
+}
+
+
+def cluster_node_id(group_by: str, value: str) -> str:
+    return f"{CLUSTER_PREFIX}{group_by}:{value}"
+
+
+def parse_cluster_node_id(node_id: str) -> Optional[Tuple[str, str]]:
+    """(group_by, value) of a cluster node id, or None for model nodes."""
+    if not node_id or not node_id.startswith(CLUSTER_PREFIX):
+        return None
+    group_by, _, value = node_id[len(CLUSTER_PREFIX):].partition(':')
+    return group_by, value
+
+
+class ClusterSummary:
+    """Models of a lineage graph aggregated by layer, schema or dv_type.
+
+    `members` maps each cluster value to its model indices and `edge_counts`
+    maps (child cluster, parent cluster) to the number of model edges between
+    them. Both are derived from the code arrays and CSR adjacency of the
+    `LineageGraph`, without touching the manifest.
+    """
+
+    def __init__(self, graph, group_by: str, selected: List[int]):
+        codes = getattr(graph, f"{group_by}_codes")
+        values = getattr(graph, f"{group_by}s")
+        self.group_by = group_by
+        self.cluster_of: Dict[int, str] = {i: values[codes[i]] for i in selected}
+        self.members: Dict[str, List[int]] = {}
+        for i in selected:
+            self.members.setdefault(self.cluster_of[i], []).append(i)
+
+        self.edge_counts: Dict[Tuple[str, str], int] = {}
+        for child, parent in graph.edges(selected):
+            key = (self.cluster_of[child], self.cluster_of[parent])
+            if key[0] != key[1]:
+                self.edge_counts[key] = self.edge_counts.get(key, 0) + 1
+
+
+_summaries_lock = threading.Lock()
+
+
+def get_cluster_summary(graph, group_by: str, selected_layers: Optional[Iterable[str]] = None) -> ClusterSummary:
+    """Cluster summary cached on the graph per (group_by, layer selection)."""
+    if group_by not in CLUSTER_KEYS:
+        raise ValueError(f"Unsupported cluster key: {group_by}")
+    key = (group_by, tuple(sorted(selected_layers or ())))
+    with _summaries_lock:
+        if key not in graph._cluster_summaries:
+            graph._cluster_summaries[key] = ClusterSummary(graph, group_by, graph.select(key[1]))
+        return graph._cluster_summaries[key]
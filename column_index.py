@@ -0,0 +1,100 @@
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# (model unique_id, column name)
+ColumnKey = Tuple[str, str]
+
+
+class ColumnLink(NamedTuple):
+    """A foreign key column pointing at a column of another model or source."""
+    from_id: str
+    from_column: str
+    to_id: str
+    to_column: str
+    # 'test' for relationship tests, 'meta' for is_foreign_key/references meta
+    origin: str
+
+
+class ColumnIndex:
+    """Column-level foreign key graph keyed by (model, column).
+
+    Merges the relationship tests resolved by `RelationshipIndex` with the
+    `meta.is_foreign_key`, `references` and `references_field` convention on
+    columns. `outgoing` answers where a foreign key points and `incoming` who
+    references a column, both with a single dictionary lookup. A link found by
+    both a test and meta is kept once, as a test link.
+    """
+
+    def __init__(self):
+        self.outgoing: Dict[ColumnKey, List[ColumnLink]] = {}
+        self.incoming: Dict[ColumnKey, List[ColumnLink]] = {}
+        self._links: Set[Tuple[str, str, str, str]] = set()
+
+    @classmethod
+    def from_manifest(cls, manifest) -> 'ColumnIndex':
+        index = cls()
+        relationship_index = manifest.relationship_index
+        for relationship in relationship_index.edges:
+            index._add(ColumnLink(
+                relationship.from_id, relationship.from_column,
+                relationship.to_id, relationship.to_column, 'test'
+            ))
+
+        for node_id in manifest.display_names:
+            node = manifest.node_details(node_id)
+            for column_name, info in node.columns.items():
+                if not info.meta.get('is_foreign_key') or not info.meta.get('references'):
+                    continue
+                reference = info.meta['references']
+                # `references` is a display name like `mart.dim_date`, or a bare model name
+                to_id = manifest.get_model_id(reference) or relationship_index.resolve(
+                    f"ref('{reference}')", node.package_name
+                )
+                if to_id:
+                    index._add(ColumnLink(node_id, column_name, to_id, info.meta.get('references_field', ''), 'meta'))
+        return index
+
+    def _add(self, link: ColumnLink) -> None:
+        endpoints = link[:4]
+        if endpoints in self._links:
+            return
+        self._links.add(endpoints)
+        self.outgoing.setdefault((link.from_id, link.from_column), []).append(link)
+        self.incoming.setdefault((link.to_id, link.to_column), []).append(link)
+
+    def references(self, model_id: str, column: str) -> List[ColumnLink]:
+        """Where a foreign key column points."""
+        return self.outgoing.get((model_id, column), [])
+
+    def referenced_by(self, model_id: str, column: str) -> List[ColumnLink]:
+        """Foreign key columns pointing at a column."""
+        return self.incoming.get((model_id, column), [])
+
+    def is_foreign_key(self, model_id: str, column: str) -> bool:
+        return (model_id, column) in self.outgoing
+
+    def trace(self, model_id: str, column: str, max_hops: Optional[int] = None) -> List[ColumnLink]:
+        """Links reachable from a column following foreign keys in both directions.
+
+        Walks breadth first up to `max_hops` links away (unlimited when None), so
+        a key can be followed through every model that joins on it.
+        """
+        start = (model_id, column)
+        depth = {start: 0}
+        queue = deque([start])
+        found: List[ColumnLink] = []
+        seen: Set[ColumnLink] = set()
+        while queue:
+            key = queue.popleft()
+            if max_hops is not None and depth[key] >= max_hops:
+                continue
+            for link in (*self.outgoing.get(key, ()), *self.incoming.get(key, ())):
+                if link in seen:
+                    continue
+                seen.add(link)
+                found.append(link)
+                for neighbour in ((link.from_id, link.from_column), (link.to_id, link.to_column)):
+                    if neighbour not in depth:
+                        depth[neighbour] = depth[key] + 1
+                        queue.append(neighbour)
+        return found
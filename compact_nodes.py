@@ -0,0 +1,131 @@
+import sys
+from array import array
+from types import MappingProxyType
+from typing import Dict, List, Optional
+
+# Column meta is reduced to the primary key flag, the only key the ERD builders read
+KEY_META = MappingProxyType({'is_key': True})
+NO_META = MappingProxyType({})
+
+
+class CompactColumn:
+    """A column as the ERD builders see it; equal columns are shared between models."""
+    __slots__ = ('name', 'data_type', 'meta')
+
+    def __init__(self, name: str, data_type: Optional[str], meta):
+        self.name = name
+        self.data_type = data_type
+        self.meta = meta
+
+
+class CompactNode:
+    """Read-only view of one model in a `CompactNodes` table.
+
+    Has the attributes of `ManifestNode` that the ERD builders read, so it can be
+    passed to `create_table_html` and `get_node_color`.
+    """
+    __slots__ = ('_table', '_i')
+
+    def __init__(self, table: 'CompactNodes', i: int):
+        self._table = table
+        self._i = i
+
+    @property
+    def name(self) -> str:
+        return self._table.names[self._i]
+
+    @property
+    def schema(self) -> str:
+        return self._table.graph.schema(self._i)
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._table.descriptions[self._i]
+
+    @property
+    def meta(self) -> Dict[str, str]:
+        graph = self._table.graph
+        meta = {}
+        if graph.layer(self._i):
+            meta['layer'] = graph.layer(self._i)
+        if graph.dv_type(self._i):
+            meta['dv_type'] = graph.dv_type(self._i)
+        return meta
+
+    @property
+    def columns(self) -> Dict[str, CompactColumn]:
+        return self._table.columns_of(self._i)
+
+
+class CompactNodes:
+    """Column-oriented table of the model fields the ERD builders need.
+
+    Rows follow the model order of the manifest's `LineageGraph`, which already
+    holds schema, layer and dv_type as integer codes. This adds interned model
+    names and descriptions, a color code per model, and columns as one flat
+    array of codes into a table of distinct (name, data_type, is_key) columns
+    shared by every model, so the ubiquitous `id varchar` column exists once.
+    """
+
+    def __init__(self, graph, names: List[str], descriptions: List[Optional[str]],
+                 color_codes: array, colors: List[str],
+                 column_offsets: array, column_codes: array, column_table: List[CompactColumn]):
+        self.graph = graph
+        self.names = names
+        self.descriptions = descriptions
+        self.color_codes = color_codes
+        self.colors = colors
+        self.column_offsets = column_offsets
+        self.column_codes = column_codes
+        self.column_table = column_table
+
+    @classmethod
+    def from_manifest(cls, manifest) -> 'CompactNodes':
+        from erd_generator import get_node_color
+
+        graph = manifest.lineage_graph
+        names, descriptions = [], []
+        color_codes, colors, color_index = array('B'), [], {}
+        column_offsets, column_codes = array('i', [0]), array('i')
+        column_table, column_index = [], {}
+        for node_id in graph.node_ids:
+            node = manifest.node_details(node_id)
+            names.append(sys.intern(node.name))
+            descriptions.append(sys.intern(node.description) if node.description else None)
+
+            color = get_node_color(node)
+            if color not in color_index:
+                color_index[color] = len(colors)
+                colors.append(color)
+            color_codes.append(color_index[color])
+
+            for column_name, info in node.columns.items():
+                key = (column_name, info.data_type, bool(info.meta.get('is_key')))
+                code = column_index.get(key)
+                if code is None:
+                    code = column_index[key] = len(column_table)
+                    column_table.append(CompactColumn(
+                        sys.intern(column_name),
+                        sys.intern(info.data_type) if info.data_type else None,
+                        KEY_META if key[2] else NO_META
+                    ))
+                column_codes.append(code)
+            column_offsets.append(len(column_codes))
+
+        return cls(graph, names, descriptions, color_codes, colors, column_offsets, column_codes, column_table)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def node(self, i: int) -> CompactNode:
+        return CompactNode(self, i)
+
+    def color(self, i: int) -> str:
+        return self.colors[self.color_codes[i]]
+
+    def columns_of(self, i: int) -> Dict[str, CompactColumn]:
+        table = self.column_table
+        return {
+            table[code].name: table[code]
+            for code in self.column_codes[self.column_offsets[i]:self.column_offsets[i + 1]]
+        }
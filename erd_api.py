@@ -0,0 +1,428 @@
+"""Serve the lineage and ERD data of dbt manifests over HTTP.
+
+Other tools get the same models, lineage, column relationships and ERDs the
+viewer shows, without running Streamlit:
+
+    python erd_api.py target/manifest.json --port 8600
+    python erd_api.py shop=shop/target/manifest.json finance=finance/target/manifest.json
+
+Endpoints, all GET. `<model>` is a unique id or a `schema.name` display name,
+and `project=` picks the project when several are served (the first by default):
+
+    /projects                        served projects and whether they are loaded
+    /models?q=orders&limit=20        models, or search results when q is given
+    /models/<model>                  columns, tests, references and lineage of a model
+    /models/<model>/lineage          models and edges within ?upstream=1&downstream=1 hops,
+                                     a depth of `all` is unlimited, ?max_nodes= caps the result
+    /models/<model>/relationships    column relationships from and to a model
+    /relationships                   all column relationships
+    /erd.dot, /erd.svg, /erd.json    static ERD of every model, of ?layer= (repeatable)
+                                     or of the lineage of ?model= with the hops above
+
+Manifests are loaded through a `Workspace`, so a manifest file that changes
+is reloaded on the next request. While a manifest fails to parse, as it does
+while dbt is rewriting it, the last version that parsed is served, or 503
+before any has. Every response carries an ETag derived from
+the content hash of the manifest and the request, and a request whose
+If-None-Match matches is answered with 304 without building anything. Bodies
+are cached in memory, least recently used first out once ERD_API_CACHE_MB is
+exceeded, so repeated requests, SVG renders included, are served from memory
+until the manifest changes.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from erd_cli import _project_name
+from erd_generator import extract_relationships, iter_erd_dot
+from manifest_cache import get_manifest_cache
+from manifest_loader import LoadError
+from models import Manifest
+from render_jobs import DEFAULT_TIMEOUT, render_dot_stream
+from static_site import model_shard
+from workspace import Workspace
+
+DEFAULT_PORT = 8600
+DEFAULT_CACHE_MB = 64
+DEFAULT_SEARCH_LIMIT = 20
+ERD_CONTENT_TYPES = {
+    'dot': 'text/vnd.graphviz; charset=utf-8',
+    'svg': 'image/svg+xml',
+    'json': 'application/json'
+}
+JSON_CONTENT_TYPE = 'application/json'
+
+
+class ApiError(Exception):
+    """A request that cannot be answered, sent to the client as a JSON error."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_bytes(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _depth(query: Dict[str, List[str]], name: str, default: Optional[int] = 1) -> Optional[int]:
+    """A hop count parameter; `all` means unlimited."""
+    value = query.get(name, [None])[-1]
+    if value is None:
+        return default
+    if value == 'all':
+        return None
+    try:
+        depth = int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be a number or 'all', got {value!r}")
+    if depth < 0:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must not be negative")
+    return depth
+
+
+class ResponseCache:
+    """Response bodies keyed by ETag, evicted least recently used first past `max_bytes`."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return entry
+
+    def put(self, etag: str, content_type: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if etag in self._entries:
+                return
+            self._entries[etag] = (content_type, body)
+            self.total_bytes += len(body)
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'mb': round(self.total_bytes / (1024 * 1024), 1),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class ErdApi:
+    """Answers API requests for the projects of a workspace, independent of the HTTP server."""
+
+    def __init__(self, workspace: Workspace, cache_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024,
+                 render_timeout: float = DEFAULT_TIMEOUT):
+        self.workspace = workspace
+        self.responses = ResponseCache(cache_bytes)
+        self.render_timeout = render_timeout
+        self._warm: set = set()
+        self._warm_lock = threading.Lock()
+        # Project -> content hash of the last manifest that parsed
+        self._last_good: Dict[str, str] = {}
+
+    def _manifest(self, query: Dict[str, List[str]]) -> Tuple[str, Manifest]:
+        names = self.workspace.names()
+        project = query.get('project', [names[0]])[-1]
+        if project not in self.workspace.projects:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown project {project!r}, serving {', '.join(names)}")
+        try:
+            manifest = self.workspace.get(project)
+            self._last_good[project] = manifest.content_hash
+        except OSError as e:
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, f"Cannot read the manifest of {project}: {e}")
+        except LoadError as e:
+            manifest = self.workspace.cache.get(self._last_good.get(project, ''))
+            if manifest is None:
+                raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE,
+                               f"Cannot parse the manifest of {project}, it may be being rewritten: {e}")
+        with self._warm_lock:
+            if manifest.content_hash not in self._warm:
+                # Built once here rather than concurrently by the first request threads
+                manifest.lineage_graph, manifest.relationship_index, manifest.column_index
+                self._warm.add(manifest.content_hash)
+        return project, manifest
+
+    def etag(self, manifest: Manifest, path: str, query: Dict[str, List[str]]) -> str:
+        request = path + '?' + '&'.join(f"{name}={value}" for name in sorted(query) for value in query[name])
+        digest = hashlib.blake2b(f"{manifest.content_hash}\0{request}".encode('utf-8'), digest_size=16)
+        return f'"{digest.hexdigest()}"'
+
+    def handle(self, path: str, query: Dict[str, List[str]],
+               if_none_match: Optional[str] = None) -> Tuple[HTTPStatus, Dict[str, str], bytes]:
+        """Status, headers and body of a GET request."""
+        try:
+            if path == '/projects':
+                return HTTPStatus.OK, {'Content-Type': JSON_CONTENT_TYPE}, _json_bytes(self.projects())
+
+            project, manifest = self._manifest(query)
+            etag = self.etag(manifest, path, query)
+            headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+            if if_none_match and etag in (tag.strip() for tag in if_none_match.split(',')):
+                return HTTPStatus.NOT_MODIFIED, headers, b''
+
+            cached = self.responses.get(etag)
+            if cached is None:
+                cached = self._route(manifest, path, query)
+                self.responses.put(etag, *cached)
+            content_type, body = cached
+            headers['Content-Type'] = content_type
+            return HTTPStatus.OK, headers, body
+        except ApiError as e:
+            return e.status, {'Content-Type': JSON_CONTENT_TYPE}, _json_bytes({'error': str(e)})
+        except Exception as e:
+            # Still a JSON error for the client; the traceback goes to the server log
+            traceback.print_exc()
+            return (HTTPStatus.INTERNAL_SERVER_ERROR, {'Content-Type': JSON_CONTENT_TYPE},
+                    _json_bytes({'error': f"{type(e).__name__}: {e}"}))
+
+    def projects(self) -> dict:
+        return {'projects': self.workspace.status(), 'responses': self.responses.stats()}
+
+    def _route(self, manifest: Manifest, path: str, query: Dict[str, List[str]]) -> Tuple[str, bytes]:
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts == ['models']:
+            return JSON_CONTENT_TYPE, _json_bytes(self.models(manifest, query))
+        if len(parts) == 2 and parts[0] == 'models':
+            return JSON_CONTENT_TYPE, _json_bytes(model_shard(manifest, self._model_id(manifest, parts[1])))
+        if len(parts) == 3 and parts[0] == 'models' and parts[2] == 'lineage':
+            return JSON_CONTENT_TYPE, _json_bytes(self.lineage(manifest, self._model_id(manifest, parts[1]), query))
+        if len(parts) == 3 and parts[0] == 'models' and parts[2] == 'relationships':
+            node_id = self._model_id(manifest, parts[1])
+            return JSON_CONTENT_TYPE, _json_bytes(self.relationships(manifest, manifest.display_name(node_id)))
+        if parts == ['relationships']:
+            return JSON_CONTENT_TYPE, _json_bytes(self.relationships(manifest))
+        if len(parts) == 1 and parts[0].startswith('erd.'):
+            fmt = parts[0][len('erd.'):]
+            if fmt not in ERD_CONTENT_TYPES:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Unsupported ERD format {fmt!r}, use dot, svg or json")
+            return ERD_CONTENT_TYPES[fmt], self.erd(manifest, fmt, query)
+        raise ApiError(HTTPStatus.NOT_FOUND, f"No endpoint {path}")
+
+    @staticmethod
+    def _model_id(manifest: Manifest, model: str) -> str:
+        if model in manifest.model_ids:
+            return model
+        node_id = manifest.get_model_id(model)
+        if node_id is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"No model {model!r}")
+        return node_id
+
+    def models(self, manifest: Manifest, query: Dict[str, List[str]]) -> dict:
+        graph = manifest.lineage_graph
+        search = query.get('q', [''])[-1]
+        if search:
+            limit = _depth(query, 'limit', DEFAULT_SEARCH_LIMIT) or DEFAULT_SEARCH_LIMIT
+            hits = manifest.search_index.search(search, limit)
+            indices = [graph.index[hit.node_id] for hit in hits]
+        else:
+            indices = range(len(graph))
+        return {
+            'models': [
+                {
+                    'id': graph.node_ids[i],
+                    'name': graph.display_names[i],
+                    'schema': graph.schema(i),
+                    'layer': graph.layer(i)
+                }
+                for i in indices
+            ]
+        }
+
+    def _lineage_members(self, manifest: Manifest, node_id: str, query: Dict[str, List[str]]) -> List[int]:
+        graph = manifest.lineage_graph
+        members = graph.lineage(
+            node_id, _depth(query, 'upstream'), _depth(query, 'downstream'), _depth(query, 'max_nodes', None)
+        )
+        return sorted(graph.index[member] for member in members)
+
+    def lineage(self, manifest: Manifest, node_id: str, query: Dict[str, List[str]]) -> dict:
+        graph = manifest.lineage_graph
+        selected = self._lineage_members(manifest, node_id, query)
+        return {
+            'model': node_id,
+            'nodes': [
+                {'id': graph.node_ids[i], 'name': graph.display_names[i], 'layer': graph.layer(i)}
+                for i in selected
+            ],
+            'edges': [
+                {'parent': graph.node_ids[parent], 'child': graph.node_ids[child]}
+                for child, parent in graph.edges(selected)
+            ]
+        }
+
+    def relationships(self, manifest: Manifest, model_name: Optional[str] = None) -> dict:
+        """Column relationships as `extract_relationships` finds them, optionally of one model."""
+        _, _, column_relationships = extract_relationships(manifest)
+        return {
+            'relationships': [
+                {'from_model': from_model, 'from_column': from_column, 'to_model': to_model, 'to_column': to_column}
+                for (from_model, from_column), (to_model, to_column) in column_relationships
+                if model_name is None or model_name in (from_model, to_model)
+            ]
+        }
+
+    def _erd_selection(self, manifest: Manifest, query: Dict[str, List[str]]) -> Optional[set]:
+        graph = manifest.lineage_graph
+        if 'model' in query:
+            node_id = self._model_id(manifest, query['model'][-1])
+            return {graph.node_ids[i] for i in self._lineage_members(manifest, node_id, query)}
+        if 'layer' in query:
+            return {graph.node_ids[i] for i in graph.select(query['layer'])}
+        return None
+
+    def erd(self, manifest: Manifest, fmt: str, query: Dict[str, List[str]]) -> bytes:
+        node_ids = self._erd_selection(manifest, query)
+        if fmt == 'dot':
+            return ''.join(iter_erd_dot(manifest, node_ids)).encode('utf-8')
+        if fmt == 'svg':
+            fd, path = tempfile.mkstemp(suffix='.svg')
+            os.close(fd)
+            try:
+                render_dot_stream(iter_erd_dot(manifest, node_ids), 'svg', path, self.render_timeout)
+                with open(path, 'rb') as f:
+                    return f.read()
+            except subprocess.TimeoutExpired:
+                raise ApiError(HTTPStatus.GATEWAY_TIMEOUT,
+                               f"Rendering the ERD took longer than {self.render_timeout:g} seconds")
+            except (OSError, RuntimeError) as e:
+                raise ApiError(HTTPStatus.INTERNAL_SERVER_ERROR, f"Rendering the ERD failed: {e}")
+            finally:
+                os.remove(path)
+        return _json_bytes(self.erd_tables(manifest, node_ids))
+
+    def erd_tables(self, manifest: Manifest, node_ids: Optional[set]) -> dict:
+        """The tables and relationships a static ERD of `node_ids` draws."""
+        column_index = manifest.column_index
+        tables = []
+        for node_id, name in manifest.display_names.items():
+            if node_ids is not None and node_id not in node_ids:
+                continue
+            node = manifest.node_details(node_id)
+            tables.append({
+                'id': node_id,
+                'name': name,
+                'columns': [
+                    {
+                        'name': column_name,
+                        'data_type': info.data_type,
+                        'is_key': bool(info.meta.get('is_key')),
+                        'references': [
+                            f"{manifest.display_name(link.to_id)}.{link.to_column}"
+                            for link in column_index.references(node_id, column_name)
+                        ]
+                    }
+                    for column_name, info in node.columns.items()
+                ]
+            })
+        names = {table['name'] for table in tables}
+        relationships = [
+            relationship for relationship in self.relationships(manifest)['relationships']
+            if relationship['from_model'] in names and relationship['to_model'] in names
+        ]
+        return {'tables': tables, 'relationships': relationships}
+
+
+class ErdApiHandler(BaseHTTPRequestHandler):
+    server_version = 'dbt-erd-api'
+    # Keep-alive, so clients polling with If-None-Match reuse their connection
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle the body waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+    api: ErdApi = None
+    quiet = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, headers, body = self.api.handle(
+            url.path, parse_qs(url.query), self.headers.get('If-None-Match')
+        )
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(api: ErdApi, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                quiet: bool = False) -> ThreadingHTTPServer:
+    """An HTTP server answering with `api`, one thread per connection."""
+    handler = type('Handler', (ErdApiHandler,), {'api': api, 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _projects(manifests: List[str]) -> Dict[str, str]:
+    """`name=path` arguments, or plain paths named after their dbt project directory."""
+    projects = {}
+    for argument in manifests:
+        name, separator, path = argument.partition('=')
+        if not separator:
+            name, path = _project_name(argument), argument
+        projects[name] = os.path.abspath(path)
+    return projects
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifests', nargs='*',
+                        help='manifest.json paths, optionally as name=path; defaults to the ERD_WORKSPACE projects')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--quiet', action='store_true', help='Do not log every request')
+    args = parser.parse_args(argv)
+
+    if args.manifests:
+        workspace = Workspace(_projects(args.manifests), get_manifest_cache())
+    elif os.environ.get('ERD_WORKSPACE'):
+        workspace = Workspace.from_file(os.environ['ERD_WORKSPACE'])
+    else:
+        parser.error('pass manifest paths or set ERD_WORKSPACE')
+
+    api = ErdApi(workspace, cache_bytes=int(float(os.environ.get('ERD_API_CACHE_MB', DEFAULT_CACHE_MB)) * 1024 * 1024))
+    server = make_server(api, args.host, args.port, args.quiet)
+    print(f"Serving {', '.join(workspace.names())} on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
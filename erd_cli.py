@@ -0,0 +1,221 @@
+"""Export ERD diagrams of dbt manifests without starting the Streamlit app.
+
+Each manifest is split into partitions (one diagram for everything, or one per
+layer, schema or model lineage neighbourhood), every partition is rendered with
+Graphviz and an index.json describing the artifacts is written to the output
+directory:
+
+    python erd_cli.py target/manifest.json other/target/manifest.json \\
+        --out erd/ --split layer --format svg --workers 4
+
+Graphviz renders run as separate `dot` processes, so a thread pool is enough to
+keep several CPU cores busy. DOT sources are generated on the render threads
+and piped into `dot` as they are written, so no diagram is ever held in memory
+as one string. The exit status is 1 when any render failed.
+
+With `--paginate` every partition becomes a page of one PDF per manifest,
+preceded by a table of contents. Relationships with models on other pages are
+drawn as dashed stubs naming the page, so each page costs as much to render as
+its partition rather than the whole graph:
+
+    python erd_cli.py target/manifest.json --out erd/ --split component --paginate
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from erd_generator import ORTHO_MAX_EDGES, ORTHO_MAX_NODES, iter_contents_dot, iter_erd_dot
+from manifest_loader import load_manifest_fast
+from partitioning import PARTITION_KINDS, partition_models
+from pdf_document import merge_pdf_pages
+from render_jobs import DEFAULT_TIMEOUT, RENDER_FORMATS, render_dot_stream
+
+EXPORT_FORMATS = RENDER_FORMATS + ('dot',)
+INDEX_FILE = 'index.json'
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('._') or 'unnamed'
+
+
+def _project_name(manifest_path: str) -> str:
+    """Directory name of the dbt project a manifest belongs to."""
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    if os.path.basename(directory) == 'target':
+        directory = os.path.dirname(directory)
+    return _safe_name(os.path.basename(directory))
+
+
+def build_jobs(manifest_path: str, out_dir: str, split: str, fmt: str,
+               depth: int = 1, select: List[str] = None,
+               max_ortho_nodes: int = None, max_ortho_edges: int = None,
+               paginate: bool = False) -> List[Dict]:
+    """DOT generators and output paths of every partition of one manifest.
+
+    With `paginate` the partitions are pages of one document, the first page
+    being its table of contents, and relationships leaving a partition end in
+    stubs naming the page of the other model.
+    """
+    with open(manifest_path, 'rb') as f:
+        manifest = load_manifest_fast(f)
+    manifest_hash = _file_hash(manifest_path)
+    graph = manifest.lineage_graph
+    # Built here once rather than concurrently by the first render threads
+    manifest.relationship_index, manifest.compact_nodes
+    target_dir = os.path.join(out_dir, _project_name(manifest_path), split)
+    os.makedirs(target_dir, exist_ok=True)
+
+    partitions = partition_models(manifest, split, depth, select)
+    stubs = None
+    if paginate:
+        stubs = {
+            node_id: f"{name}, page {page}"
+            for page, (name, node_ids) in enumerate(partitions.items(), start=2)
+            for node_id in node_ids
+        }
+
+    jobs = []
+    for name, node_ids in partitions.items():
+        members = set(node_ids)
+        selected = [graph.index[node_id] for node_id in node_ids]
+        jobs.append({
+            'manifest': os.path.abspath(manifest_path),
+            'manifest_hash': manifest_hash,
+            'split': split,
+            'partition': name,
+            'models': len(node_ids),
+            'edges': sum(1 for _ in graph.edges(selected)),
+            'format': fmt,
+            'path': os.path.join(target_dir, f"{_safe_name(name)}.{fmt}"),
+            'dot_lines': iter_erd_dot(manifest, members, max_ortho_nodes, max_ortho_edges, stubs)
+        })
+    return jobs
+
+
+def write_document(pages: List[Dict], path: str, title: str, timeout: float) -> Dict:
+    """Combine rendered partition pages into one PDF behind a table of contents."""
+    start = time.perf_counter()
+    document = {
+        'manifest': pages[0]['manifest'],
+        'split': pages[0]['split'],
+        'path': path,
+        'pages': len(pages) + 1
+    }
+    failed = [page['partition'] for page in pages if page['status'] != 'done']
+    contents_path = os.path.join(os.path.dirname(pages[0]['path']), '_contents.pdf')
+    try:
+        if failed:
+            raise RuntimeError(f"Pages not rendered: {', '.join(failed)}")
+        entries = [(page['partition'], number, page['models']) for number, page in enumerate(pages, start=2)]
+        render_dot_stream(iter_contents_dot(title, entries), 'pdf', contents_path, timeout)
+        merge_pdf_pages([('Contents', contents_path)] + [(page['partition'], page['path']) for page in pages], path)
+        document.update(status='done', error=None)
+    except subprocess.TimeoutExpired:
+        document.update(status='timed_out', error=f"Rendering took longer than {timeout:g} seconds")
+    except (OSError, RuntimeError, ValueError) as e:
+        document.update(status='failed', error=str(e))
+    finally:
+        if os.path.exists(contents_path):
+            os.remove(contents_path)
+    document['seconds'] = round(time.perf_counter() - start, 3)
+    return document
+
+
+def render_job(job: Dict, timeout: float) -> Dict:
+    """Write one artifact and return its index entry."""
+    dot_lines = job.pop('dot_lines')
+    start = time.perf_counter()
+    try:
+        if job['format'] == 'dot':
+            with open(job['path'], 'w', encoding='utf-8') as f:
+                f.writelines(dot_lines)
+        else:
+            render_dot_stream(dot_lines, job['format'], job['path'], timeout)
+        job.update(status='done', error=None)
+    except subprocess.TimeoutExpired:
+        job.update(status='timed_out', error=f"Rendering took longer than {timeout:g} seconds")
+    except (OSError, RuntimeError) as e:
+        job.update(status='failed', error=str(e))
+    job['seconds'] = round(time.perf_counter() - start, 3)
+    return job
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifests', nargs='+', help='Paths to dbt manifest.json files')
+    parser.add_argument('--out', default='erd-export', help='Output directory')
+    parser.add_argument('--format', default='pdf', choices=EXPORT_FORMATS)
+    parser.add_argument('--split', default='all', choices=PARTITION_KINDS,
+                        help='One diagram per manifest, or one per layer, schema, connected component or '
+                             'model neighbourhood')
+    parser.add_argument('--depth', type=int, default=1,
+                        help='Hops up- and downstream included in each neighbourhood')
+    parser.add_argument('--select', action='append', default=[],
+                        help='Glob on model names for neighbourhood diagrams, can be repeated')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds allowed per render')
+    parser.add_argument('--max-ortho-nodes', type=int, default=ORTHO_MAX_NODES,
+                        help='Draw polylines instead of orthogonal edges above this many tables')
+    parser.add_argument('--max-ortho-edges', type=int, default=ORTHO_MAX_EDGES,
+                        help='Draw polylines instead of orthogonal edges above this many edges')
+    parser.add_argument('--paginate', action='store_true',
+                        help='Also combine the partitions of each manifest into one PDF with a table of contents')
+    args = parser.parse_args(argv)
+    if args.paginate and (args.format != 'pdf' or args.split == 'neighborhood'):
+        parser.error('--paginate needs --format pdf and a --split other than neighborhood')
+
+    os.makedirs(args.out, exist_ok=True)
+    artifacts = []
+    documents = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        # One manifest at a time, so only its parsed manifest is held while its diagrams render
+        for manifest_path in args.manifests:
+            jobs = build_jobs(manifest_path, args.out, args.split, args.format, args.depth, args.select,
+                              args.max_ortho_nodes, args.max_ortho_edges, args.paginate)
+            futures = [executor.submit(render_job, job, args.timeout) for job in jobs]
+            pages = [future.result() for future in futures]
+            finished = list(pages)
+            if args.paginate and pages:
+                project = _project_name(manifest_path)
+                document = write_document(
+                    pages, os.path.join(args.out, project, f"{args.split}.pdf"),
+                    f"{project} by {args.split}", args.timeout
+                )
+                documents.append(document)
+                finished.append(document)
+            for artifact in finished:
+                artifact['path'] = os.path.relpath(artifact['path'], args.out)
+                print(f"{artifact['status']:<10} {artifact['seconds']:>8.2f}s  {artifact['path']}", file=sys.stderr)
+            artifacts.extend(pages)
+
+    with open(os.path.join(args.out, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'format': args.format,
+            'split': args.split,
+            'artifacts': artifacts,
+            **({'documents': documents} if args.paginate else {})
+        }, f, indent=2)
+
+    failed = [a for a in artifacts if a['status'] != 'done']
+    print(f"{len(artifacts) - len(failed)} of {len(artifacts)} diagrams written to {args.out}", file=sys.stderr)
+    return 1 if failed or any(d['status'] != 'done' for d in documents) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,23 @@
 import graphviz
+from graphviz.quoting import a_list, attr_list, quote, quote_edge
 from models import Manifest
-import networkx as nx
-from typing import Dict, Set, Tuple, List
-from streamlit_agraph import agraph, Node, Edge, Config
-from pyvis.network import Network
-import streamlit.components.v1 as components
+from layout import get_layout, NODE_SEPARATION
+from clustering import cluster_node_id, get_cluster_summary
+from instrumentation import instrumented
+from typing import Dict, Iterator, Set, Tuple, List
+from collections import OrderedDict
+from html import escape
+import atexit
+import shutil
 import tempfile
+import threading
+import math
 import os
 
+# streamlit-agraph (which imports Streamlit), pyvis and networkx are imported in
+# the builders that use them, so the static create_erd path stays importable
+# from the command line without loading Streamlit.
+
 def get_column_type(info: dict, test_relationships: Dict[str, str] = None) -> str:
     """Get the type of column (PK, FK, or regular)."""
     if info.meta and info.meta.get('is_key'):
@@ -16,12 +26,13 @@ def get_column_type(info: dict, test_relationships: Dict[str, str] = None) -> st
         return '🔗 FK'  # Foreign Key
     return ''
 
-def create_table_html(table_name: str, node: dict) -> str:
+def create_table_html(table_name: str, node: dict, foreign_keys: Dict[str, str] = None) -> str:
     """Create HTML representation of a table with all columns."""
-    # Extract relationship tests to identify foreign keys
-    test_relationships = {}
-    if hasattr(node, 'tests'):
-        for test in node.tests:
+    # Use resolved foreign keys when given, otherwise read the relationship tests on the node
+    test_relationships = foreign_keys
+    if test_relationships is None:
+        test_relationships = {}
+        for test in getattr(node, 'tests', []):
             if test.test_metadata.name == "relationships" and test.column_name:
                 test_relationships[test.column_name] = test.test_metadata.kwargs.get('to', '')
 
@@ -51,43 +62,64 @@ def create_table_html(table_name: str, node: dict) -> str:
     html.append('</TABLE>>')
     return ''.join(html)
 
-def extract_relationships(manifest: Manifest) -> Tuple[Dict[str, Set[str]], Dict[str, Dict[str, str]], List[Tuple]]:
-    """Extract relationships between tables based on relationship tests."""
-    relationships = {}
-    relationship_labels = {}
-    column_relationships = []
+def create_erd_table_html(table_name: str, node: dict, foreign_keys: Dict[str, str] = None) -> str:
+    """HTML label of a table in the static ERD, with a port per column for the edges."""
+    table_html = [
+        '<<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" CELLPADDING="4">',
+        f'<TR><TD PORT="header" BGCOLOR="#4A90E2" COLSPAN="3"><FONT COLOR="white"><B>{table_name}</B></FONT></TD></TR>',
+        '<TR><TD BGCOLOR="#E3F2FD"><B>Column</B></TD><TD BGCOLOR="#E3F2FD"><B>Type</B></TD><TD BGCOLOR="#E3F2FD"><B>Key</B></TD></TR>'
+    ]
     
-    for node_id, node in manifest.nodes.items():
-        if not node_id.startswith('model.'):
-            continue
-            
-        model_name = f"{node.schema}.{node.name}"
-        if model_name not in relationships:
-            relationships[model_name] = set()
-            relationship_labels[model_name] = {}
+    # Add columns
+    for col_name, info in node.columns.items():
+        col_type = get_column_type(info, foreign_keys)
+        key_indicator = col_type if col_type else ""
         
-        # Process relationship tests
-        for test in node.tests:
-            if test.test_metadata.name == "relationships":
-                kwargs = test.test_metadata.kwargs
-                if "to" in kwargs and "field" in kwargs:
-                    # Extract the referenced model name from the ref function
-                    to_ref = kwargs["to"]
-                    if to_ref.startswith("ref('") and to_ref.endswith("')"):
-                        # Extract model name from ref('model_name')
-                        to_model = to_ref[5:-2]  # Remove ref(' and ')
-                        to_model = f"{node.schema}.{to_model}"  # Assume same schema
-                        from_field = test.column_name
-                        to_field = kwargs["field"]
-                        
-                        relationships[model_name].add(to_model)
-                        relationship_labels[model_name][to_model] = from_field
-                        column_relationships.append((
-                            (model_name, from_field),
-                            (to_model, to_field)
-                        ))
-    
-    return relationships, relationship_labels, column_relationships
+        table_html.append(
+            f'<TR><TD PORT="{col_name}" ALIGN="LEFT">{col_name}</TD>'
+            f'<TD ALIGN="LEFT">{info.data_type or "unknown"}</TD>'
+            f'<TD ALIGN="CENTER">{key_indicator}</TD></TR>'
+        )
+    
+    table_html.append('</TABLE>>')
+    return ''.join(table_html)
+
+# Border and edge color of highlighted column paths
+HIGHLIGHT_COLOR = "#D32F2F"
+
+# Rendered table labels keyed by builder, node content hash, name and foreign keys.
+# Unchanged models of a refreshed manifest hit the same entries.
+TABLE_LABEL_CACHE_SIZE = 20000
+_table_labels: 'OrderedDict[tuple, str]' = OrderedDict()
+_table_labels_lock = threading.Lock()
+
+def table_label(manifest: Manifest, node_id: str, builder=create_table_html) -> str:
+    """HTML label of a model built by `builder`, memoized by the model's content hash."""
+    model_name = manifest.display_names[node_id]
+    foreign_keys = manifest.relationship_index.foreign_keys(node_id)
+    key = (builder.__name__, manifest.node_hash(node_id), model_name, tuple(sorted(foreign_keys.items())))
+    with _table_labels_lock:
+        label = _table_labels.get(key)
+        if label is not None:
+            _table_labels.move_to_end(key)
+            return label
+    
+    graph = manifest.lineage_graph
+    label = builder(model_name, manifest.compact_nodes.node(graph.index[node_id]), foreign_keys)
+    with _table_labels_lock:
+        _table_labels[key] = label
+        if len(_table_labels) > TABLE_LABEL_CACHE_SIZE:
+            _table_labels.popitem(last=False)
+    return label
+
+def extract_relationships(manifest: Manifest) -> Tuple[Dict[str, Set[str]], Dict[str, Dict[str, str]], List[Tuple]]:
+    """Extract relationships between tables based on relationship tests.
+    
+    The tests are resolved once per manifest by `Manifest.relationship_index`,
+    this returns the cached results.
+    """
+    index = manifest.relationship_index
+    return index.relationships, index.relationship_labels, index.column_relationships
 
 def get_node_color(node: dict) -> str:
     """Get the color for a node based on its layer and type."""
@@ -109,113 +141,20 @@ def get_node_color(node: dict) -> str:
             return "#FFD54F"  # Yellow
     return "#E3F2FD"  # Default light blue
 
-def create_interactive_erd(manifest: Manifest, selected_layers=None, filter_nodes=None):
-    """Create an interactive ERD using streamlit-agraph."""
-    nodes = []
-    edges = []
+def create_interactive_config(positioned: bool = False, pinned_levels: bool = False):
+    """Shared streamlit-agraph configuration of the interactive ERD views.
     
-    # Create layer groups if showing multiple layers
-    if selected_layers and len(selected_layers) > 1:
-        # Add group nodes for each layer
-        layer_groups = {}
-        for layer in selected_layers:
-            group_id = f"group_{layer}"
-            layer_groups[layer] = group_id
-            nodes.append(Node(
-                id=group_id,
-                label=layer.upper(),
-                size=1,  # Minimal size
-                color="rgba(245, 245, 245, 0.3)",  # Very light gray with high transparency
-                shape="box",
-                borderWidth=1,
-                font={'size': 14, 'color': '#999999', 'face': 'Arial'},
-                margin=20,
-                group=layer,
-                fixed=True,
-                physics=False
-            ))
+    With `pinned_levels` every node carries its hierarchical `level`, so vis.js
+    skips sorting the graph into levels itself.
+    """
+    from streamlit_agraph import Config
     
-    # Create nodes for all dbt models in selected layers
-    for node_id, node in manifest.nodes.items():
-        if not node_id.startswith('model.'):
-            continue
-            
-        model_name = f"{node.schema}.{node.name}"
-        layer = node.meta.get('layer', '')
-        
-        # Skip if node's layer is not selected
-        if selected_layers and layer not in selected_layers:
-            continue
-            
-        # Skip if we're filtering nodes and this node is not in the filter
-        if filter_nodes is not None and node_id not in filter_nodes:
-            continue
-            
-        # Get node color based on layer and type
-        node_color = get_node_color(node)
-        
-        # Create node with table information
-        node_config = {
-            'id': model_name,
-            'label': model_name,
-            'size': 75,
-            'color': node_color,
-            'shape': "box",
-            'borderWidth': 2,
-            'font': {'size': 16, 'color': 'black', 'face': 'Arial'},
-            'margin': 20,
-            'title': node.description or ""
-        }
-        
-        # Add group information if showing multiple layers
-        if selected_layers and len(selected_layers) > 1:
-            node_config['group'] = layer
-        
-        nodes.append(Node(**node_config))
-    
-    # Create edges based on parent/child relationships
-    for node_id, parents in manifest.parent_map.items():
-        if not node_id.startswith('model.'):
-            continue
-            
-        node = manifest.nodes.get(node_id)
-        if not node or (selected_layers and node.meta.get('layer', '') not in selected_layers):
-            continue
-            
-        # Skip if we're filtering nodes and this node is not in the filter
-        if filter_nodes is not None and node_id not in filter_nodes:
-            continue
-            
-        source_model = f"{node.schema}.{node.name}"
-        
-        for parent_id in parents:
-            if not parent_id.startswith('model.'):
-                continue
-                
-            parent_node = manifest.nodes.get(parent_id)
-            if not parent_node or (selected_layers and parent_node.meta.get('layer', '') not in selected_layers):
-                continue
-                
-            # Skip if we're filtering nodes and the parent node is not in the filter
-            if filter_nodes is not None and parent_id not in filter_nodes:
-                continue
-                
-            target_model = f"{parent_node.schema}.{parent_node.name}"
-            
-            edges.append(Edge(
-                source=source_model,
-                target=target_model,
-                color="#4A90E2",
-                width=2,
-                arrows={"to": {"enabled": True}}
-            ))
-    
-    # Configuration for the graph
-    config = Config(
-        width=1500,
-        height=1000,
-        directed=True,
-        physics={
+    if positioned:
+        # Nodes are already placed, so the browser has nothing to lay out
+        physics = {"enabled": False}
+        hierarchical = {"enabled": False}
+    else:
+        physics = {
             "enabled": True,
             "hierarchicalRepulsion": {
                 "centralGravity": 0.1,
@@ -231,8 +170,8 @@ def create_interactive_erd(manifest: Manifest, selected_layers=None, filter_node
                 "updateInterval": 50,
                 "fit": True
             }
-        },
-        hierarchical={
+        }
+        hierarchical = {
             "enabled": True,
             "levelSeparation": 400,
             "nodeSpacing": 400,
@@ -242,7 +181,18 @@ def create_interactive_erd(manifest: Manifest, selected_layers=None, filter_node
             "blockShifting": True,
             "edgeMinimization": True,
             "parentCentralization": True
-        },
+        }
+        if pinned_levels:
+            del hierarchical["sortMethod"]
+    
+    # Configuration for the graph
+    return Config(
+        width=1500,
+        height=1000,
+        directed=True,
+        physics=physics,
+        # Config nests a `hierarchical` argument under `enabled`, the full layout replaces its defaults
+        layout={"hierarchical": hierarchical},
         groups={
             'raw': {'color': {'background': 'rgba(245, 245, 245, 0.2)', 'border': 'rgba(224, 224, 224, 0.3)'}},
             'staging': {'color': {'background': 'rgba(245, 245, 245, 0.2)', 'border': 'rgba(224, 224, 224, 0.3)'}},
@@ -268,61 +218,369 @@ def create_interactive_erd(manifest: Manifest, selected_layers=None, filter_node
             'background': True
         }
     )
+
+def _layer_label_position(graph, layer: str, positions: Dict[str, Tuple[float, float]]):
+    """Place a layer label above the laid out models of that layer."""
+    points = [positions[graph.node_ids[i]] for i in graph.select([layer]) if graph.node_ids[i] in positions]
+    if not points:
+        return {}
+    return {
+        'x': sum(x for x, _ in points) / len(points),
+        'y': min(y for _, y in points) - NODE_SEPARATION
+    }
+
+@instrumented('create_interactive_erd')
+def create_interactive_erd(manifest: Manifest, selected_layers=None, filter_nodes=None, positions=None,
+                           highlight_links=()):
+    """Create an interactive ERD using streamlit-agraph.
+    
+    With `positions` (unique_id -> (x, y), see `layout.get_layout`) nodes are
+    placed server side and browser physics is switched off. `highlight_links`
+    (`column_index.ColumnLink`s, e.g. from `ColumnIndex.trace`) are drawn as
+    labelled column-to-column edges and their models are outlined.
+    """
+    from streamlit_agraph import Node, Edge
+    
+    nodes = []
+    edges = []
+    graph = manifest.lineage_graph
+    
+    # Select models in the chosen layers, restricted to the filter if one is given
+    highlighted = {link.from_id for link in highlight_links} | {link.to_id for link in highlight_links}
+    if filter_nodes is not None and highlighted:
+        filter_nodes = set(filter_nodes) | highlighted
+    selected = graph.select(selected_layers, filter_nodes)
+    compact = manifest.compact_nodes
+    
+    # Without positions, pin hierarchical levels from the analytics computed once per manifest
+    levels = None if positions else dict(zip(selected, manifest.graph_analytics.vis_levels(selected)))
+    
+    # Create layer groups if showing multiple layers
+    if selected_layers and len(selected_layers) > 1:
+        # Add group nodes for each layer
+        layer_groups = {}
+        for layer in selected_layers:
+            group_id = f"group_{layer}"
+            layer_groups[layer] = group_id
+            nodes.append(Node(
+                id=group_id,
+                label=layer.upper(),
+                size=1,  # Minimal size
+                color="rgba(245, 245, 245, 0.3)",  # Very light gray with high transparency
+                shape="box",
+                borderWidth=1,
+                font={'size': 14, 'color': '#999999', 'face': 'Arial'},
+                margin=20,
+                group=layer,
+                fixed=True,
+                physics=False,
+                **(_layer_label_position(graph, layer, positions) if positions else {}),
+                # vis.js requires a level on every node once any has one
+                **({'level': min((levels[i] for i in selected if graph.layer(i) == layer), default=0)}
+                   if levels is not None else {})
+            ))
+    
+    # Create nodes for all dbt models in selected layers
+    for i in selected:
+        node = compact.node(i)
+        model_name = graph.display_names[i]
+        layer = graph.layer(i)
+        
+        # Get node color based on layer and type
+        node_color = compact.color(i)
+        
+        # Create node with table information
+        node_config = {
+            'id': model_name,
+            'label': model_name,
+            'size': 75,
+            'color': node_color,
+            'shape': "box",
+            'borderWidth': 2,
+            'font': {'size': 16, 'color': 'black', 'face': 'Arial'},
+            'margin': 20,
+            'title': node.description or ""
+        }
+        
+        # Add group information if showing multiple layers
+        if selected_layers and len(selected_layers) > 1:
+            node_config['group'] = layer
+        
+        # Use the precomputed position if there is one
+        if positions and graph.node_ids[i] in positions:
+            node_config['x'], node_config['y'] = positions[graph.node_ids[i]]
+        elif levels is not None:
+            node_config['level'] = levels[i]
+        
+        # Outline models on a highlighted column path
+        if graph.node_ids[i] in highlighted:
+            node_config['color'] = {'background': node_color, 'border': HIGHLIGHT_COLOR}
+            node_config['borderWidth'] = 4
+        
+        nodes.append(Node(**node_config))
+    
+    # Create edges based on parent/child relationships between selected models
+    for child, parent in graph.edges(selected):
+        edges.append(Edge(
+            source=graph.display_names[child],
+            target=graph.display_names[parent],
+            color="#4A90E2",
+            width=2,
+            arrows={"to": {"enabled": True}}
+        ))
+    
+    # Column-to-column edges of the highlighted path, between models shown above
+    shown = {graph.node_ids[i] for i in selected}
+    for link in highlight_links:
+        if link.from_id in shown and link.to_id in shown:
+            edges.append(Edge(
+                source=manifest.display_names[link.from_id],
+                target=manifest.display_names[link.to_id],
+                label=f"{link.from_column} → {link.to_column}",
+                color=HIGHLIGHT_COLOR,
+                width=3,
+                dashes=True,
+                arrows={"to": {"enabled": True}}
+            ))
+    
+    config = create_interactive_config(positioned=bool(positions), pinned_levels=levels is not None)
     
     return nodes, edges, config
 
-def create_erd(manifest: Manifest) -> graphviz.Digraph:
-    """Create a static ERD diagram using graphviz (for PDF export)."""
-    dot = graphviz.Digraph(comment='DBT ERD', format='pdf')
-    dot.attr(rankdir='LR', nodesep='1.0', ranksep='2.0', splines='ortho')
-    dot.attr('node', shape='plain', style='filled', fillcolor='#E8F4F9')
+@instrumented('create_clustered_erd')
+def create_clustered_erd(manifest: Manifest, group_by: str, selected_layers=None, expanded=()):
+    """Create a level-of-detail ERD with models aggregated into expandable clusters.
     
-    # Add nodes (tables)
-    for node_id, node in manifest.nodes.items():
-        if not node_id.startswith('model.'):
+    Models are grouped by layer, schema or dv_type (see `clustering.CLUSTER_KEYS`).
+    Clusters in `expanded` are drawn model by model, every other cluster is one
+    super-node, and edges between them are aggregated with their model edge count.
+    """
+    from streamlit_agraph import Node, Edge
+    
+    graph = manifest.lineage_graph
+    compact = manifest.compact_nodes
+    summary = get_cluster_summary(graph, group_by, selected_layers)
+    expanded = set(expanded) & set(summary.members)
+    nodes = []
+    edges = []
+    
+    def endpoint(i):
+        cluster = summary.cluster_of[i]
+        return graph.display_names[i] if cluster in expanded else cluster_node_id(group_by, cluster)
+    
+    for value, members in summary.members.items():
+        if value in expanded:
+            # Expanded clusters show their models
+            for i in members:
+                node = compact.node(i)
+                nodes.append(Node(
+                    id=graph.display_names[i],
+                    label=graph.display_names[i],
+                    size=75,
+                    color=compact.color(i),
+                    shape="box",
+                    borderWidth=2,
+                    font={'size': 16, 'color': 'black', 'face': 'Arial'},
+                    margin=20,
+                    title=node.description or "",
+                    group=value
+                ))
             continue
-            
-        model_name = f"{node.schema}.{node.name}"
         
-        # Start HTML table
-        table_html = [
-            '<<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" CELLPADDING="4">',
-            f'<TR><TD PORT="header" BGCOLOR="#4A90E2" COLSPAN="3"><FONT COLOR="white"><B>{model_name}</B></FONT></TD></TR>',
-            '<TR><TD BGCOLOR="#E3F2FD"><B>Column</B></TD><TD BGCOLOR="#E3F2FD"><B>Type</B></TD><TD BGCOLOR="#E3F2FD"><B>Key</B></TD></TR>'
-        ]
-        
-        # Add columns
-        for col_name, info in node.columns.items():
-            col_type = get_column_type(info)
-            key_indicator = col_type if col_type else ""
-            
-            table_html.append(
-                f'<TR><TD PORT="{col_name}" ALIGN="LEFT">{col_name}</TD>'
-                f'<TD ALIGN="LEFT">{info.data_type or "unknown"}</TD>'
-                f'<TD ALIGN="CENTER">{key_indicator}</TD></TR>'
-            )
-        
-        table_html.append('</TABLE>>')
-        dot.node(model_name, ''.join(table_html))
+        # Collapsed clusters become one super-node, colored like their first model
+        nodes.append(Node(
+            id=cluster_node_id(group_by, value),
+            label=f"{value or '(none)'}\n{len(members)} model{'s' if len(members) != 1 else ''}",
+            size=75,
+            color=compact.color(members[0]),
+            shape="box",
+            borderWidth=4,
+            font={'size': 22, 'color': 'black', 'face': 'Arial'},
+            margin=30,
+            title=f"Click to expand {len(members)} models"
+        ))
     
-    # Add edges for relationships
-    _, _, column_relationships = extract_relationships(manifest)
+    # Edge counts between collapsed clusters come straight from the cached summary
+    edge_counts = {
+        (cluster_node_id(group_by, child), cluster_node_id(group_by, parent)): count
+        for (child, parent), count in summary.edge_counts.items()
+        if child not in expanded and parent not in expanded
+    }
     
+    # Edges touching an expanded cluster are aggregated from its models' adjacency
+    for value in expanded:
+        for i in summary.members[value]:
+            for parent in graph.parents(i):
+                if parent in summary.cluster_of:
+                    key = (endpoint(i), endpoint(parent))
+                    if key[0] != key[1]:
+                        edge_counts[key] = edge_counts.get(key, 0) + 1
+            for child in graph.children(i):
+                # Children in expanded clusters were counted through their own parents
+                if child in summary.cluster_of and summary.cluster_of[child] not in expanded:
+                    key = (endpoint(child), endpoint(i))
+                    edge_counts[key] = edge_counts.get(key, 0) + 1
+    
+    for (source, target), count in edge_counts.items():
+        edge_config = {
+            'source': source,
+            'target': target,
+            'color': "#4A90E2",
+            'width': min(2 + math.log2(count), 10),
+            'arrows': {"to": {"enabled": True}}
+        }
+        if count > 1:
+            edge_config['label'] = str(count)
+        edges.append(Edge(**edge_config))
+    
+    return nodes, edges, create_interactive_config()
+
+# Above either count the static ERD drops `splines=ortho`, whose routing time
+# grows far faster than the graph, for polylines
+ORTHO_MAX_NODES = int(os.environ.get('ERD_ORTHO_MAX_NODES', 500))
+ORTHO_MAX_EDGES = int(os.environ.get('ERD_ORTHO_MAX_EDGES', 1000))
+LARGE_GRAPH_SPLINES = 'polyline'
+
+ERD_GRAPH_ATTRS = {'rankdir': 'LR', 'nodesep': '1.0', 'ranksep': '2.0'}
+ERD_NODE_ATTRS = {'shape': 'plain', 'style': 'filled', 'fillcolor': '#E8F4F9'}
+ERD_EDGE_ATTRS = {'dir': 'both', 'arrowhead': 'crow', 'arrowtail': 'none', 'color': '#4A90E2', 'penwidth': '1.5'}
+
+def erd_splines(node_count: int, edge_count: int, max_ortho_nodes: int = None, max_ortho_edges: int = None) -> str:
+    """Spline mode of a static ERD with this many tables and edges."""
+    max_ortho_nodes = ORTHO_MAX_NODES if max_ortho_nodes is None else max_ortho_nodes
+    max_ortho_edges = ORTHO_MAX_EDGES if max_ortho_edges is None else max_ortho_edges
+    if node_count > max_ortho_nodes or edge_count > max_ortho_edges:
+        return LARGE_GRAPH_SPLINES
+    return 'ortho'
+
+ERD_STUB_ATTRS = {'shape': 'note', 'fillcolor': '#FFFFFF', 'fontsize': '10'}
+ERD_STUB_EDGE_ATTRS = dict(ERD_EDGE_ATTRS, style='dashed')
+
+def _erd_elements(manifest: Manifest, node_ids=None, stubs: Dict[str, str] = None):
+    """Tables, stub references and edges of a static ERD.
+
+    Returns (node_id, table name) of the tables drawn, (node name, label) of
+    the stubs and (tail, head, is_stub) of the edges. An edge to a table outside
+    `node_ids` ends in a stub node when `stubs` has reference text for that
+    table's unique id, and is dropped otherwise.
+    """
+    tables = [
+        (node_id, model_name) for node_id, model_name in manifest.display_names.items()
+        if node_ids is None or node_id in node_ids
+    ]
+    names = {model_name for _, model_name in tables}
+    stub_nodes: Dict[str, str] = {}
+
+    def stub(model_name: str):
+        reference = stubs.get(manifest.get_model_id(model_name)) if stubs else None
+        if reference is None:
+            return None
+        node_name = f'ref {model_name}'
+        stub_nodes.setdefault(node_name, f'{model_name}\\n{reference}')
+        return node_name
+
+    _, _, column_relationships = extract_relationships(manifest)
+    edges = []
     for (source_table, source_col), (target_table, target_col) in column_relationships:
-        dot.edge(
-            f'{source_table}:{source_col}',
-            f'{target_table}:{target_col}',
-            dir='both',
-            arrowhead='crow',
-            arrowtail='none',
-            color='#4A90E2',
-            penwidth='1.5'
-        )
+        if source_table in names and target_table in names:
+            edges.append((f'{source_table}:{source_col}', f'{target_table}:{target_col}', False))
+        elif source_table in names:
+            target = stub(target_table)
+            if target:
+                edges.append((f'{source_table}:{source_col}', target, True))
+        elif target_table in names:
+            source = stub(source_table)
+            if source:
+                edges.append((source, f'{target_table}:{target_col}', True))
+    return tables, list(stub_nodes.items()), edges
+
+@instrumented('create_erd')
+def create_erd(manifest: Manifest, node_ids=None, max_ortho_nodes: int = None,
+               max_ortho_edges: int = None, stubs: Dict[str, str] = None) -> graphviz.Digraph:
+    """Create a static ERD diagram using graphviz (for PDF export).
+    
+    Draws every model, or only the models in `node_ids` when given; `stubs`
+    maps unique ids of other models to the reference text of a stub drawn for
+    their relationships with the drawn tables. See `iter_erd_dot` for graphs
+    too large to hold as one DOT string.
+    """
+    tables, stub_nodes, edges = _erd_elements(manifest, node_ids, stubs)
+    dot = graphviz.Digraph(comment='DBT ERD', format='pdf')
+    dot.attr(splines=erd_splines(len(tables), len(edges), max_ortho_nodes, max_ortho_edges), **ERD_GRAPH_ATTRS)
+    dot.attr('node', **ERD_NODE_ATTRS)
+    
+    # Add nodes (tables)
+    for node_id, model_name in tables:
+        dot.node(model_name, table_label(manifest, node_id, create_erd_table_html))
+    for node_name, label in stub_nodes:
+        dot.node(node_name, label, **ERD_STUB_ATTRS)
+    
+    # Add edges for relationships between the tables drawn above
+    for tail, head, is_stub in edges:
+        dot.edge(tail, head, **(ERD_STUB_EDGE_ATTRS if is_stub else ERD_EDGE_ATTRS))
     
     return dot 
 
-def create_pyvis_erd(manifest: Manifest, selected_layers=None):
-    """Create an interactive ERD using Pyvis."""
+def iter_erd_dot(manifest: Manifest, node_ids=None, max_ortho_nodes: int = None,
+                 max_ortho_edges: int = None, stubs: Dict[str, str] = None) -> Iterator[str]:
+    """DOT source of `create_erd`, one statement at a time.
+
+    Yields the same text as `create_erd(...).source` without building it, so it
+    can be written straight to a Graphviz process or file; table labels come
+    from the `table_label` memo.
+    """
+    tables, stub_nodes, edges = _erd_elements(manifest, node_ids, stubs)
+    graph_attrs = dict(ERD_GRAPH_ATTRS, splines=erd_splines(len(tables), len(edges), max_ortho_nodes, max_ortho_edges))
+    yield '// DBT ERD\n'
+    yield 'digraph {\n'
+    yield f'\t{a_list(kwargs=graph_attrs)}\n'
+    yield f'\tnode{attr_list(kwargs=ERD_NODE_ATTRS)}\n'
+    for node_id, model_name in tables:
+        yield f'\t{quote(model_name)}{attr_list(table_label(manifest, node_id, create_erd_table_html))}\n'
+    for node_name, label in stub_nodes:
+        yield f'\t{quote(node_name)}{attr_list(label, kwargs=ERD_STUB_ATTRS)}\n'
+    edge_attrs = attr_list(kwargs=ERD_EDGE_ATTRS)
+    stub_edge_attrs = attr_list(kwargs=ERD_STUB_EDGE_ATTRS)
+    for tail, head, is_stub in edges:
+        yield f'\t{quote_edge(tail)} -> {quote_edge(head)}{stub_edge_attrs if is_stub else edge_attrs}\n'
+    yield '}\n'
+
+def iter_contents_dot(title: str, entries: List[Tuple[str, int, int]]) -> Iterator[str]:
+    """DOT source of a table of contents page listing (title, page, models) entries."""
+    rows = ''.join(
+        f'<TR><TD ALIGN="LEFT">{escape(name)}</TD><TD ALIGN="RIGHT">{models}</TD><TD ALIGN="RIGHT">{page}</TD></TR>'
+        for name, page, models in entries
+    )
+    label = (
+        '<<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0" CELLPADDING="6">'
+        f'<TR><TD COLSPAN="3" BGCOLOR="#4A90E2"><FONT COLOR="white"><B>{escape(title)}</B></FONT></TD></TR>'
+        '<TR><TD BGCOLOR="#E3F2FD"><B>Partition</B></TD><TD BGCOLOR="#E3F2FD"><B>Models</B></TD>'
+        f'<TD BGCOLOR="#E3F2FD"><B>Page</B></TD></TR>{rows}</TABLE>>'
+    )
+    yield '// DBT ERD contents\n'
+    yield 'digraph {\n'
+    yield f'\tcontents{attr_list(label, kwargs={"shape": "plain"})}\n'
+    yield '}\n'
+
+# vis.js styling of the Pyvis ERD, shared with the static site export
+PYVIS_NODE_STYLE = {'shape': 'box', 'size': 50, 'font': {'size': 16}, 'borderWidth': 2, 'shadow': True}
+PYVIS_EDGE_STYLE = {'color': '#4A90E2', 'width': 2, 'arrows': {'to': {'enabled': True}}}
+
+# Pyvis pages load lib/bindings/utils.js relative to themselves
+PYVIS_BINDINGS = os.path.join('lib', 'bindings')
+
+# Temporary directory of `create_pyvis_erd` pages, removed when the process exits
+_pyvis_dir = None
+_pyvis_dir_lock = threading.Lock()
+
+def pyvis_network(manifest: Manifest = None, selected_layers=None):
+    """Pyvis network of the models in `selected_layers` with the ERD's physics and layout.
+
+    Without a manifest the network is empty but fully configured, for pages that
+    load their nodes separately.
+    """
+    from pyvis.network import Network
+    
     # Create a network
     net = Network(
         height="1000px",
@@ -342,61 +600,33 @@ def create_pyvis_erd(manifest: Manifest, selected_layers=None):
         overlap=0
     )
     
-    # Create nodes for all dbt models in selected layers
-    for node_id, node in manifest.nodes.items():
-        if not node_id.startswith('model.'):
-            continue
+    if manifest is not None:
+        # Create nodes for all dbt models in selected layers
+        graph = manifest.lineage_graph
+        compact = manifest.compact_nodes
+        selected = graph.select(selected_layers)
+        # Pinned levels spare the browser the hierarchical sort
+        levels = manifest.graph_analytics.vis_levels(selected)
+        for i, level in zip(selected, levels):
+            node = compact.node(i)
+            model_name = graph.display_names[i]
             
-        model_name = f"{node.schema}.{node.name}"
-        layer = node.meta.get('layer', '')
-        
-        # Skip if node's layer is not selected
-        if selected_layers and layer not in selected_layers:
-            continue
-            
-        # Get node color based on layer and type
-        node_color = get_node_color(node)
-        
-        # Add node with table information
-        net.add_node(
-            model_name,
-            label=model_name,
-            title=node.description or "",
-            color=node_color,
-            shape="box",
-            size=50,
-            font={'size': 16},
-            borderWidth=2,
-            shadow=True
-        )
-    
-    # Add edges based on parent/child relationships
-    for node_id, parents in manifest.parent_map.items():
-        if not node_id.startswith('model.'):
-            continue
-            
-        node = manifest.nodes.get(node_id)
-        if not node or (selected_layers and node.meta.get('layer', '') not in selected_layers):
-            continue
-            
-        source_model = f"{node.schema}.{node.name}"
+            # Add node with table information, colored by layer and type
+            net.add_node(
+                model_name,
+                label=model_name,
+                title=node.description or "",
+                color=compact.color(i),
+                level=level,
+                **PYVIS_NODE_STYLE
+            )
         
-        for parent_id in parents:
-            if not parent_id.startswith('model.'):
-                continue
-                
-            parent_node = manifest.nodes.get(parent_id)
-            if not parent_node or (selected_layers and parent_node.meta.get('layer', '') not in selected_layers):
-                continue
-                
-            target_model = f"{parent_node.schema}.{parent_node.name}"
-            
+        # Add edges based on parent/child relationships
+        for child, parent in graph.edges(selected):
             net.add_edge(
-                source=source_model,
-                to=target_model,
-                color="#4A90E2",
-                width=2,
-                arrows={'to': {'enabled': True}}
+                source=graph.display_names[child],
+                to=graph.display_names[parent],
+                **PYVIS_EDGE_STYLE
             )
     
     # Set layout options
@@ -432,30 +662,62 @@ def create_pyvis_erd(manifest: Manifest, selected_layers=None):
         }
     }
     """)
+    return net
+
+def write_pyvis_page(html_source: str, path: str) -> str:
+    """Write a Pyvis page with the script bundle it loads next to it.
+
+    Unlike `Network.save_graph` this never copies the bundle into the working
+    directory.
+    """
+    import pyvis
     
-    # Generate HTML file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.html') as tmp_file:
-        net.save_graph(tmp_file.name)
-        return tmp_file.name 
+    directory = os.path.dirname(os.path.abspath(path))
+    bindings = os.path.join(directory, PYVIS_BINDINGS)
+    if not os.path.exists(bindings):
+        shutil.copytree(os.path.join(os.path.dirname(pyvis.__file__), 'templates', PYVIS_BINDINGS), bindings)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_source)
+    return path
+
+def _remove_pyvis_dir():
+    if _pyvis_dir is not None:
+        shutil.rmtree(_pyvis_dir, ignore_errors=True)
+
+def create_pyvis_erd(manifest: Manifest, selected_layers=None, path: str = None) -> str:
+    """Create an interactive ERD using Pyvis and return the path of its HTML page.
+
+    Writes to `path`, or to a file in a temporary directory that is removed
+    when the process exits. See `static_site` for projects too large to inline.
+    """
+    global _pyvis_dir
+    if path is None:
+        with _pyvis_dir_lock:
+            if _pyvis_dir is None:
+                _pyvis_dir = tempfile.mkdtemp(prefix='dbt-erd-pyvis-')
+                atexit.register(_remove_pyvis_dir)
+        fd, path = tempfile.mkstemp(dir=_pyvis_dir, suffix='.html')
+        os.close(fd)
+    return write_pyvis_page(pyvis_network(manifest, selected_layers).generate_html(), path)
 
 def create_networkx_erd(manifest: Manifest, selected_layers=None):
-    """Create an interactive ERD using NetworkX with Graphviz layout."""
+    """Create an interactive ERD using NetworkX with a cached server-side layout."""
+    import networkx as nx
+    from streamlit_agraph import Node, Edge, Config
+    
     G = nx.DiGraph()
     
     # Add nodes
-    for node_id, node in manifest.nodes.items():
-        if not node_id.startswith('model.'):
-            continue
-            
-        model_name = f"{node.schema}.{node.name}"
-        layer = node.meta.get('layer', '')
+    graph = manifest.lineage_graph
+    compact = manifest.compact_nodes
+    selected = graph.select(selected_layers)
+    for i in selected:
+        node = compact.node(i)
+        model_name = graph.display_names[i]
+        layer = graph.layer(i)
         
-        # Skip if node's layer is not selected
-        if selected_layers and layer not in selected_layers:
-            continue
-            
         # Get node color based on layer and type
-        node_color = get_node_color(node)
+        node_color = compact.color(i)
         
         # Add node with attributes
         G.add_node(
@@ -463,40 +725,23 @@ def create_networkx_erd(manifest: Manifest, selected_layers=None):
             label=model_name,
             color=node_color,
             title=node.description or "",
-            layer=layer
+            layer=layer,
+            unique_id=graph.node_ids[i]
         )
     
     # Add edges
-    for node_id, parents in manifest.parent_map.items():
-        if not node_id.startswith('model.'):
-            continue
-            
-        node = manifest.nodes.get(node_id)
-        if not node or (selected_layers and node.meta.get('layer', '') not in selected_layers):
-            continue
-            
-        source_model = f"{node.schema}.{node.name}"
-        
-        for parent_id in parents:
-            if not parent_id.startswith('model.'):
-                continue
-                
-            parent_node = manifest.nodes.get(parent_id)
-            if not parent_node or (selected_layers and parent_node.meta.get('layer', '') not in selected_layers):
-                continue
-                
-            target_model = f"{parent_node.schema}.{parent_node.name}"
-            G.add_edge(source_model, target_model)
-    
-    # Use graphviz layout for better node positioning
-    pos = nx.nx_agraph.graphviz_layout(G, prog='dot', args='-Grankdir=LR -Gnodesep=1.0 -Granksep=2.0')
+    for child, parent in graph.edges(selected):
+        G.add_edge(graph.display_names[child], graph.display_names[parent])
+    
+    # Use the cached layout (Graphviz dot when available) for node positioning
+    positions = get_layout(manifest, selected_layers)
     
     # Convert to agraph nodes and edges
     nodes = []
     edges = []
     
-    for node, (x, y) in pos.items():
-        node_data = G.nodes[node]
+    for node, node_data in G.nodes(data=True):
+        x, y = positions[node_data['unique_id']]
         nodes.append(Node(
             id=node,
             label=node_data['label'],
@@ -507,8 +752,8 @@ def create_networkx_erd(manifest: Manifest, selected_layers=None):
             font={'size': 16, 'color': 'black', 'face': 'Arial'},
             margin=20,
             title=node_data['title'],
-            x=x * 0.5,  # Scale positions to fit better
-            y=y * 0.5
+            x=x,
+            y=y
         ))
     
     for source, target in G.edges():
@@ -0,0 +1,186 @@
+"""msgspec decoding of manifest.json straight into the schema of `models.py`.
+
+The structs below mirror the pydantic models field for field. msgspec skips
+every field they do not declare (compiled SQL, raw code, docs, macros, ...)
+inside the decoder, without materializing it, and type-checks the rest, so the
+pydantic objects can be built with `model_construct` instead of being
+validated a second time. Importing this module fails without msgspec, which
+`manifest_loader` treats as "use the pydantic path".
+"""
+from typing import Any, Dict, List, Optional, Union
+
+import msgspec
+
+from models import ColumnInfo, DependsOn, ManifestNode, SourceNode, TestMetadata, TestNode
+
+
+class _ColumnInfo(msgspec.Struct, gc=False):
+    name: str
+    description: Optional[str] = None
+    data_type: Optional[str] = None
+    meta: Dict[str, Any] = {}
+
+
+class _TestMetadata(msgspec.Struct, gc=False):
+    name: str
+    kwargs: Dict[str, Any]
+    namespace: Optional[str] = None
+
+
+class _TestNode(msgspec.Struct, gc=False):
+    test_metadata: _TestMetadata
+    column_name: Optional[str] = None
+    refs: List[Union[List[str], Dict[str, Any]]] = []
+
+
+class _DependsOn(msgspec.Struct, gc=False):
+    nodes: List[str] = []
+
+
+class _LightNode(msgspec.Struct, gc=False):
+    # Every node field except columns and description, which make up most of a model
+    name: str
+    schema: str
+    database: Optional[str] = None
+    resource_type: Optional[str] = None
+    package_name: Optional[str] = None
+    refs: List[Union[List[str], Dict[str, Any]]] = []
+    tests: List[_TestNode] = []
+    meta: Dict[str, Any] = {}
+    depends_on: _DependsOn = msgspec.field(default_factory=_DependsOn)
+    test_metadata: Optional[_TestMetadata] = None
+    column_name: Optional[str] = None
+    attached_node: Optional[str] = None
+
+
+class _ManifestNode(_LightNode, gc=False):
+    description: Optional[str] = None
+    columns: Dict[str, _ColumnInfo] = {}
+
+
+class _SourceNode(msgspec.Struct, gc=False):
+    name: str
+    source_name: str
+    schema: str
+    database: Optional[str] = None
+    description: Optional[str] = None
+    columns: Dict[str, _ColumnInfo] = {}
+    meta: Dict[str, Any] = {}
+
+
+class _Manifest(msgspec.Struct, gc=False):
+    # Nodes and sources stay raw so callers only decode the ones they keep and can
+    # hash their exact bytes, see `decode_node` and `decode_source`
+    nodes: Dict[str, msgspec.Raw] = {}
+    sources: Dict[str, msgspec.Raw] = {}
+    parent_map: Dict[str, List[str]] = {}
+    child_map: Dict[str, List[str]] = {}
+
+
+_manifest_decoder = msgspec.json.Decoder(_Manifest)
+_node_decoder = msgspec.json.Decoder(_ManifestNode)
+_light_node_decoder = msgspec.json.Decoder(_LightNode)
+_source_decoder = msgspec.json.Decoder(_SourceNode)
+
+# Raised for malformed JSON or a manifest that does not fit the schema
+DecodeError = (msgspec.DecodeError, msgspec.ValidationError)
+
+
+def decode(data: bytes) -> _Manifest:
+    """Decode the sections of manifest.json the ERD reads; nodes and sources are left raw."""
+    return _manifest_decoder.decode(data)
+
+
+def decode_node(raw: msgspec.Raw) -> _ManifestNode:
+    return _node_decoder.decode(raw)
+
+
+def decode_light_node(raw: msgspec.Raw) -> _LightNode:
+    """Decode a node without its columns and description, which are skipped unparsed."""
+    return _light_node_decoder.decode(raw)
+
+
+def decode_source(raw: msgspec.Raw) -> _SourceNode:
+    return _source_decoder.decode(raw)
+
+
+_set = object.__setattr__
+
+
+def _construct(cls, fields: Dict[str, Any]):
+    """`cls.model_construct(**fields)` for a complete set of fields.
+
+    Sets the instance state pydantic would set, minus the per-call default and
+    alias handling of `model_construct` that dominates when building a node
+    per column. Every field is passed, so `fields` is also the fields-set.
+    """
+    instance = cls.__new__(cls)
+    _set(instance, '__dict__', fields)
+    _set(instance, '__pydantic_fields_set__', set(fields))
+    _set(instance, '__pydantic_extra__', None)
+    _set(instance, '__pydantic_private__', None)
+    return instance
+
+
+def _columns(columns: Dict[str, _ColumnInfo]) -> Dict[str, ColumnInfo]:
+    return {
+        key: _construct(ColumnInfo, {
+            'name': column.name, 'description': column.description,
+            'data_type': column.data_type, 'meta': column.meta
+        })
+        for key, column in columns.items()
+    }
+
+
+def _test_metadata(metadata: Optional[_TestMetadata]) -> Optional[TestMetadata]:
+    if metadata is None:
+        return None
+    return _construct(TestMetadata, {'name': metadata.name, 'kwargs': metadata.kwargs, 'namespace': metadata.namespace})
+
+
+def to_node(node: _ManifestNode) -> ManifestNode:
+    """The pydantic node of a decoded node; msgspec already checked the types."""
+    return _node(node, node.description, _columns(node.columns))
+
+
+def to_light_node(node: _LightNode) -> ManifestNode:
+    """The pydantic node of a light node, with no description and no columns."""
+    return _node(node, None, {})
+
+
+def _node(node: _LightNode, description: Optional[str], columns: Dict[str, ColumnInfo]) -> ManifestNode:
+    return _construct(ManifestNode, {
+        'name': node.name,
+        'schema': node.schema,
+        'database': node.database,
+        'description': description,
+        'resource_type': node.resource_type,
+        'package_name': node.package_name,
+        'columns': columns,
+        'refs': node.refs,
+        'tests': [
+            _construct(TestNode, {
+                'test_metadata': _test_metadata(test.test_metadata),
+                'column_name': test.column_name,
+                'refs': test.refs
+            })
+            for test in node.tests
+        ],
+        'meta': node.meta,
+        'depends_on': _construct(DependsOn, {'nodes': node.depends_on.nodes}),
+        'test_metadata': _test_metadata(node.test_metadata),
+        'column_name': node.column_name,
+        'attached_node': node.attached_node
+    })
+
+
+def to_source(source: _SourceNode) -> SourceNode:
+    return _construct(SourceNode, {
+        'name': source.name,
+        'source_name': source.source_name,
+        'schema': source.schema,
+        'database': source.database,
+        'description': source.description,
+        'columns': _columns(source.columns),
+        'meta': source.meta
+    })
@@ -0,0 +1,163 @@
+import heapq
+from array import array
+from typing import List, Tuple
+
+# Number of longest dependency chains kept
+LONGEST_CHAINS = 5
+
+
+def _components(graph) -> Tuple[array, List[List[int]]]:
+    """Strongly connected components, in topological order from sources to leaves.
+
+    Iterative Tarjan over the child adjacency. Returns the component of every
+    node and the members of every component; a dbt project without cycles has
+    one component per model.
+    """
+    n = len(graph)
+    offsets, indices = graph.child_offsets, graph.child_indices
+    order = array('i', [-1]) * n
+    low = array('i', [0]) * n
+    on_stack = bytearray(n)
+    component_of = array('i', [-1]) * n
+    components: List[List[int]] = []
+    stack: List[int] = []
+    counter = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        # (node, next child position) frames replace recursion
+        work = [(root, offsets[root])]
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        while work:
+            i, k = work[-1]
+            if k < offsets[i + 1]:
+                work[-1] = (i, k + 1)
+                child = indices[k]
+                if order[child] == -1:
+                    order[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = 1
+                    work.append((child, offsets[child]))
+                elif on_stack[child] and order[child] < low[i]:
+                    low[i] = order[child]
+                continue
+            work.pop()
+            if work and low[i] < low[work[-1][0]]:
+                low[work[-1][0]] = low[i]
+            if low[i] == order[i]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component_of[member] = len(components)
+                    members.append(member)
+                    if member == i:
+                        break
+                components.append(members)
+
+    # Tarjan finishes leaves first, renumber from sources to leaves
+    last = len(components) - 1
+    for i in range(n):
+        component_of[i] = last - component_of[i]
+    components.reverse()
+    return component_of, components
+
+
+class GraphAnalytics:
+    """Structural measures of a lineage graph, computed once per manifest.
+
+    `level` is the length of the longest chain of parents above a model, so
+    sources are level 0 and every model sits right of all its parents, and
+    `height` the longest chain of children below it. Models on a cycle share
+    the level of the cycle, which is otherwise treated as one node. A model's
+    longest chain through it has `level + height + 1` models; the longest of
+    all are in `longest_chains`. `fan_in` and `fan_out` count direct parents
+    and children. Everything is derived from the CSR arrays of the
+    `LineageGraph` in linear time.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        n = len(graph)
+        parent_offsets, parent_indices = graph.parent_offsets, graph.parent_indices
+        child_offsets, child_indices = graph.child_offsets, graph.child_indices
+        self.fan_in = array('i', (parent_offsets[i + 1] - parent_offsets[i] for i in range(n)))
+        self.fan_out = array('i', (child_offsets[i + 1] - child_offsets[i] for i in range(n)))
+
+        component_of, components = _components(graph)
+        self.cycles: List[List[int]] = [
+            sorted(members) for members in components
+            if len(members) > 1 or any(parent_indices[k] == members[0]
+                                       for k in range(parent_offsets[members[0]], parent_offsets[members[0] + 1]))
+        ]
+
+        # Longest paths over the condensation, which is acyclic and topologically ordered
+        component_level = array('i', [0]) * len(components)
+        for c, members in enumerate(components):
+            level = 0
+            for i in members:
+                for k in range(parent_offsets[i], parent_offsets[i + 1]):
+                    parent = component_of[parent_indices[k]]
+                    if parent != c and component_level[parent] + 1 > level:
+                        level = component_level[parent] + 1
+            component_level[c] = level
+        component_height = array('i', [0]) * len(components)
+        for c in range(len(components) - 1, -1, -1):
+            height = 0
+            for i in components[c]:
+                for k in range(child_offsets[i], child_offsets[i + 1]):
+                    child = component_of[child_indices[k]]
+                    if child != c and component_height[child] + 1 > height:
+                        height = component_height[child] + 1
+            component_height[c] = height
+
+        self.level = array('i', (component_level[component_of[i]] for i in range(n)))
+        self.height = array('i', (component_height[component_of[i]] for i in range(n)))
+        self.max_level = max(self.level, default=0)
+        self.longest_chains = self._longest_chains(component_of, components)
+
+    def _longest_chains(self, component_of: array, components: List[List[int]]) -> List[List[int]]:
+        """Up to LONGEST_CHAINS longest source-to-leaf chains, ending at different leaves."""
+        graph = self.graph
+        ends = sorted(
+            (i for i in range(len(graph)) if self.height[i] == 0),
+            key=lambda i: (-self.level[i], graph.display_names[i])
+        )[:LONGEST_CHAINS]
+        chains = []
+        for end in ends:
+            chain = [end]
+            i = end
+            while self.level[i] > 0:
+                # Step to a parent one level up; on a cycle, a parent of any model of the cycle
+                c, level = component_of[i], self.level[i] - 1
+                i = next(
+                    parent for member in components[c] for parent in graph.parents(member)
+                    if component_of[parent] != c and self.level[parent] == level
+                )
+                chain.append(i)
+            chains.append(chain[::-1])
+        return chains
+
+    def hot_spots(self, limit: int = 10) -> List[int]:
+        """Models with the most direct parents and children together, most connected first."""
+        graph = self.graph
+        return heapq.nsmallest(
+            limit, range(len(graph)),
+            key=lambda i: (-(self.fan_in[i] + self.fan_out[i]), graph.display_names[i])
+        )
+
+    def vis_levels(self, selected: List[int]) -> List[int]:
+        """Hierarchical vis.js levels of `selected` models, numbered densely from 0.
+
+        The interactive ERD draws edges from child to parent, so sources get the
+        highest level and the layout reads like vis.js's own `directed` sort;
+        levels left empty by the selection are skipped.
+        """
+        mirrored = [self.max_level - self.level[i] for i in selected]
+        dense = {level: rank for rank, level in enumerate(sorted(set(mirrored)))}
+        return [dense[level] for level in mirrored]
@@ -0,0 +1,135 @@
+"""Timing hooks around the viewer's hot paths.
+
+Stages are wrapped with `instrumented` or `measure`. Nothing is recorded unless
+a `Recorder` is active on the current thread (the app starts one per rerun when
+the debug panel is on) or ERD_TIMINGS_LOG is set, which writes one JSON line
+per stage to the `erd.timings` logger. When both are off a hook costs a
+thread-local lookup.
+
+Each stage records wall time, the change in allocated memory blocks
+(`sys.getallocatedblocks`) and the number of garbage collections run during
+it. A rerun also records the collector's per-generation counts; counting every
+GC-tracked object walks the whole heap, so it is only done when
+ERD_TIMINGS_GC_OBJECTS is set. Time spent in the browser is not visible from here.
+"""
+import functools
+import gc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('erd.timings')
+LOG_ENABLED = os.environ.get('ERD_TIMINGS_LOG', '').lower() in ('1', 'true', 'yes')
+COUNT_OBJECTS = os.environ.get('ERD_TIMINGS_GC_OBJECTS', '').lower() in ('1', 'true', 'yes')
+
+if LOG_ENABLED and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_local = threading.local()
+
+
+def _gc_collections() -> int:
+    return sum(generation['collections'] for generation in gc.get_stats())
+
+
+class Recorder:
+    """Stage measurements of one app rerun."""
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id
+        self.started_at = time.perf_counter()
+        self.spans: List[Dict] = []
+
+    def summary(self) -> List[Dict]:
+        """Measurements aggregated per stage, in the order stages first ran."""
+        stages: Dict[str, Dict] = {}
+        for span in self.spans:
+            stage = stages.setdefault(span['stage'], {
+                'stage': span['stage'], 'calls': 0, 'wall_ms': 0.0, 'max_ms': 0.0,
+                'alloc_blocks': 0, 'gc_collections': 0
+            })
+            stage['calls'] += 1
+            stage['wall_ms'] += span['wall_ms']
+            stage['max_ms'] = max(stage['max_ms'], span['wall_ms'])
+            stage['alloc_blocks'] += span['alloc_blocks']
+            stage['gc_collections'] += span['gc_collections']
+        return list(stages.values())
+
+    def finish(self) -> Dict:
+        """Totals of the rerun, also written to the log when logging is on."""
+        result = {
+            'event': 'rerun',
+            'run_id': self.run_id,
+            'wall_ms': round((time.perf_counter() - self.started_at) * 1000, 2),
+            'gc_counts': list(gc.get_count()),
+            'stages': self.summary()
+        }
+        if COUNT_OBJECTS:
+            result['gc_objects'] = len(gc.get_objects())
+        if LOG_ENABLED:
+            logger.info(json.dumps(result))
+        return result
+
+
+def start_run(enabled: bool, run_id: Optional[str] = None) -> Optional[Recorder]:
+    """Start recording the current thread's stages when enabled or logging.
+
+    Replaces the recorder of the previous run on this thread, which may have
+    been left behind by a script that stopped early.
+    """
+    _local.recorder = Recorder(run_id) if enabled or LOG_ENABLED else None
+    return _local.recorder
+
+
+@contextmanager
+def measure(stage: str, **fields):
+    """Record the wrapped block as `stage`, with `fields` added to the log line."""
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None and not LOG_ENABLED:
+        yield
+        return
+
+    blocks = sys.getallocatedblocks()
+    collections = _gc_collections()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span = {
+            'stage': stage,
+            'wall_ms': round((time.perf_counter() - start) * 1000, 3),
+            'alloc_blocks': sys.getallocatedblocks() - blocks,
+            'gc_collections': _gc_collections() - collections
+        }
+        if recorder is not None:
+            recorder.spans.append(span)
+        if LOG_ENABLED:
+            logger.info(json.dumps({
+                'event': 'stage',
+                'run_id': recorder.run_id if recorder is not None else None,
+                'thread': threading.current_thread().name,
+                **span,
+                **fields
+            }))
+
+
+def instrumented(stage: str):
+    """Decorator recording every call of the function as `stage`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, 'recorder', None) is None and not LOG_ENABLED:
+                return fn(*args, **kwargs)
+            with measure(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,236 @@
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Pixel spacing between ranks (left to right) and between nodes in a rank
+RANK_SEPARATION = 450
+NODE_SEPARATION = 120
+# Graphviz dot gets slow on very large graphs, above this the layered layout is used
+DOT_MAX_NODES = 2000
+LAYOUT_CACHE_SIZE = 32
+BARYCENTER_SWEEPS = 4
+
+Positions = Dict[str, Tuple[float, float]]
+
+
+def _back_edges(graph, selected: List[int], members: set) -> Set[Tuple[int, int]]:
+    """(child, parent) edges that close a cycle, found by an iterative depth-first search."""
+    on_stack, finished = set(), set()
+    back_edges = set()
+    for root in selected:
+        if root in finished:
+            continue
+        on_stack.add(root)
+        stack = [(root, iter(graph.parents(root)))]
+        while stack:
+            child, parents = stack[-1]
+            for parent in parents:
+                if parent not in members or parent in finished:
+                    continue
+                if parent in on_stack:
+                    back_edges.add((child, parent))
+                    continue
+                on_stack.add(parent)
+                stack.append((parent, iter(graph.parents(parent))))
+                break
+            else:
+                stack.pop()
+                on_stack.discard(child)
+                finished.add(child)
+    return back_edges
+
+
+def _ranks(graph, selected: List[int]) -> Dict[int, int]:
+    """Longest-path ranks along child -> parent edges, so parents sit right of children.
+
+    Edges closing a cycle are ignored, dbt projects should not have any but
+    hand-written manifests can.
+    """
+    members = set(selected)
+    back_edges = _back_edges(graph, selected, members)
+    pending = {i: 0 for i in selected}
+    for child, parent in graph.edges(selected):
+        if (child, parent) not in back_edges:
+            pending[parent] += 1
+
+    rank = {i: 0 for i in selected}
+    queue = [i for i in selected if pending[i] == 0]
+    while queue:
+        child = queue.pop()
+        for parent in graph.parents(child):
+            if parent not in members or (child, parent) in back_edges:
+                continue
+            rank[parent] = max(rank[parent], rank[child] + 1)
+            pending[parent] -= 1
+            if pending[parent] == 0:
+                queue.append(parent)
+    return rank
+
+
+def layered_layout(graph, selected: List[int]) -> Positions:
+    """Pure-Python layered layout: longest-path ranking plus barycenter ordering."""
+    rank = _ranks(graph, selected)
+    ranks: Dict[int, List[int]] = {}
+    for i in selected:
+        ranks.setdefault(rank[i], []).append(i)
+
+    order = {}
+    for nodes in ranks.values():
+        for position, i in enumerate(nodes):
+            order[i] = position
+
+    # Alternate sweeps: order each rank by the mean position of its neighbours
+    members = set(selected)
+    rank_numbers = sorted(ranks)
+    for sweep in range(BARYCENTER_SWEEPS):
+        sequence = rank_numbers if sweep % 2 == 0 else list(reversed(rank_numbers))
+        for r in sequence:
+            def barycenter(i):
+                neighbours = [j for j in (*graph.parents(i), *graph.children(i)) if j in members]
+                if not neighbours:
+                    return order[i]
+                return sum(order[j] for j in neighbours) / len(neighbours)
+            ranks[r].sort(key=barycenter)
+            for position, i in enumerate(ranks[r]):
+                order[i] = position
+
+    positions = {}
+    for r, nodes in ranks.items():
+        offset = (len(nodes) - 1) / 2
+        for position, i in enumerate(nodes):
+            positions[graph.node_ids[i]] = (r * RANK_SEPARATION, (position - offset) * NODE_SEPARATION)
+    return positions
+
+
+def graphviz_layout(graph, selected: List[int], timeout: float = 120) -> Positions:
+    """Layout with Graphviz dot, read back through its plain text output."""
+    lines = ['digraph {', 'graph [rankdir=LR, nodesep=1.0, ranksep=2.0];', 'node [shape=box, width=3, height=0.6];']
+    lines.extend(f'n{i};' for i in selected)
+    lines.extend(f'n{child} -> n{parent};' for child, parent in graph.edges(selected))
+    lines.append('}')
+    result = subprocess.run(
+        ['dot', '-Tplain'],
+        input='\n'.join(lines).encode('utf-8'),
+        capture_output=True,
+        timeout=timeout,
+        check=True
+    )
+
+    # Plain output is in inches with y pointing up, vis.js uses pixels with y pointing down
+    positions = {}
+    for line in result.stdout.decode('utf-8').splitlines():
+        parts = line.split()
+        if parts and parts[0] == 'node':
+            i = int(parts[1][1:])
+            positions[graph.node_ids[i]] = (float(parts[2]) * 72 * 1.5, -float(parts[3]) * 72 * 1.5)
+    return positions
+
+
+def compute_layout(graph, selected: List[int], engine: str = 'auto') -> Positions:
+    """Positions for the selected models keyed by unique_id.
+
+    `engine` is 'dot', 'layered' or 'auto', which uses dot when it is installed
+    and the graph is small enough, and the layered layout otherwise.
+    """
+    if engine == 'auto':
+        engine = 'dot' if shutil.which('dot') and len(selected) <= DOT_MAX_NODES else 'layered'
+    if engine == 'dot':
+        try:
+            return graphviz_layout(graph, selected)
+        except (OSError, subprocess.SubprocessError):
+            pass
+    return layered_layout(graph, selected)
+
+
+_layouts: 'OrderedDict[tuple, Positions]' = OrderedDict()
+_layouts_lock = threading.Lock()
+
+
+def get_layout(manifest, selected_layers: Optional[Iterable[str]] = None, engine: str = 'auto') -> Positions:
+    """Cached positions of every model in the selected layers.
+
+    Computed once per (manifest hash, layer selection, engine). Filtered views
+    take their positions from the same layout, so nodes keep their place.
+    """
+    layers = tuple(sorted(selected_layers or ()))
+    key = (manifest.content_hash or id(manifest), layers, engine)
+    with _layouts_lock:
+        if key in _layouts:
+            _layouts.move_to_end(key)
+            return _layouts[key]
+
+    graph = manifest.lineage_graph
+    positions = compute_layout(graph, graph.select(layers), engine)
+    with _layouts_lock:
+        _layouts[key] = positions
+        if len(_layouts) > LAYOUT_CACHE_SIZE:
+            _layouts.popitem(last=False)
+    return positions
+
+
+def place_new_nodes(graph, selected: List[int], positions: Positions) -> Positions:
+    """Positions for the selected models missing from `positions`, next to their neighbours.
+
+    A new model goes one rank left of its leftmost placed parent, or one rank
+    right of its rightmost placed child, below the models already in that
+    column. Models without placed neighbours start a column at x = 0. Existing
+    positions are returned unchanged.
+    """
+    positions = dict(positions)
+    bottoms: Dict[float, float] = {}
+    for x, y in positions.values():
+        bottoms[x] = max(bottoms.get(x, y), y)
+
+    def place(i: int, x: float) -> None:
+        y = bottoms[x] + NODE_SEPARATION if x in bottoms else 0.0
+        bottoms[x] = y
+        positions[graph.node_ids[i]] = (x, y)
+
+    pending = [i for i in selected if graph.node_ids[i] not in positions]
+    while pending:
+        deferred = []
+        for i in pending:
+            parents = [positions[graph.node_ids[j]][0] for j in graph.parents(i) if graph.node_ids[j] in positions]
+            children = [positions[graph.node_ids[j]][0] for j in graph.children(i) if graph.node_ids[j] in positions]
+            if parents:
+                place(i, min(parents) - RANK_SEPARATION)
+            elif children:
+                place(i, max(children) + RANK_SEPARATION)
+            else:
+                deferred.append(i)
+        if len(deferred) == len(pending):
+            # Nothing left is connected to a placed model
+            place(deferred[0], 0.0)
+            deferred = deferred[1:]
+        pending = deferred
+    return positions
+
+
+def carry_over_layouts(old_manifest, new_manifest) -> None:
+    """Copy the cached layouts of `old_manifest` to `new_manifest`.
+
+    Models present in both keep their coordinates, removed models are dropped
+    and added ones are placed by `place_new_nodes`, so the cost depends on the
+    size of the change rather than on the size of the graph.
+    """
+    old_key = old_manifest.content_hash or id(old_manifest)
+    new_key = new_manifest.content_hash or id(new_manifest)
+    with _layouts_lock:
+        previous = [(key, positions) for key, positions in _layouts.items() if key[0] == old_key]
+    if not previous:
+        return
+
+    graph = new_manifest.lineage_graph
+    for (_, layers, engine), positions in previous:
+        selected = graph.select(layers)
+        kept = {graph.node_ids[i] for i in selected}
+        updated = place_new_nodes(
+            graph, selected,
+            {node_id: xy for node_id, xy in positions.items() if node_id in kept}
+        )
+        with _layouts_lock:
+            _layouts.setdefault((new_key, layers, engine), updated)
+            if len(_layouts) > LAYOUT_CACHE_SIZE:
+                _layouts.popitem(last=False)
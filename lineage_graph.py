@@ -0,0 +1,220 @@
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# Number of lineage query results memoized per graph
+LINEAGE_CACHE_SIZE = 256
+
+
+def _intern_code(value: str, codes: Dict[str, int], values: List[str]) -> int:
+    """Return the integer code of `value`, assigning the next free one if new."""
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(values)
+        values.append(value)
+    return code
+
+
+class LineageGraph:
+    """Compact, integer-indexed lineage graph of the model nodes in a manifest.
+
+    Models are numbered in manifest order. Parent and child adjacency are held in
+    CSR form: the neighbours of node `i` are `indices[offsets[i]:offsets[i + 1]]`,
+    both stored as flat int32 arrays. Layer, schema and `dv_type` are stored as
+    small integer codes into shared value tables.
+    """
+
+    def __init__(self, node_ids: List[str], display_names: List[str],
+                 parent_offsets: array, parent_indices: array,
+                 child_offsets: array, child_indices: array,
+                 layer_codes: array, layers: List[str],
+                 schema_codes: array, schemas: List[str],
+                 dv_type_codes: array, dv_types: List[str]):
+        self.node_ids = node_ids
+        self.display_names = display_names
+        self.index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.parent_offsets = parent_offsets
+        self.parent_indices = parent_indices
+        self.child_offsets = child_offsets
+        self.child_indices = child_indices
+        self.layer_codes = layer_codes
+        self.layers = layers
+        self.schema_codes = schema_codes
+        self.schemas = schemas
+        self.dv_type_codes = dv_type_codes
+        self.dv_types = dv_types
+        # Graphs are shared between sessions, so the memo is guarded by a lock
+        self._lineage_cache: 'OrderedDict[tuple, FrozenSet[str]]' = OrderedDict()
+        self._lineage_lock = threading.Lock()
+        # Per (group_by, layers) aggregations, see `clustering.get_cluster_summary`
+        self._cluster_summaries: Dict[tuple, object] = {}
+
+    @classmethod
+    def from_manifest(cls, manifest) -> 'LineageGraph':
+        """Build the graph from `manifest.parent_map`, keeping model-to-model edges only."""
+        node_ids = list(manifest.display_names)
+        display_names = list(manifest.display_names.values())
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+        layer_index, layers = {}, []
+        schema_index, schemas = {}, []
+        dv_type_index, dv_types = {}, []
+        layer_codes = array('H')
+        schema_codes = array('H')
+        dv_type_codes = array('H')
+
+        parent_offsets = array('i', [0])
+        parent_indices = array('i')
+        for node_id in node_ids:
+            node = manifest.nodes[node_id]
+            layer_codes.append(_intern_code(node.meta.get('layer', ''), layer_index, layers))
+            schema_codes.append(_intern_code(node.schema, schema_index, schemas))
+            dv_type_codes.append(_intern_code(node.meta.get('dv_type', ''), dv_type_index, dv_types))
+            for parent_id in manifest.parent_map.get(node_id, ()):
+                parent = index.get(parent_id)
+                if parent is not None:
+                    parent_indices.append(parent)
+            parent_offsets.append(len(parent_indices))
+
+        # Children are the transpose of the parent adjacency, filled by counting sort
+        n = len(node_ids)
+        counts = array('i', [0]) * (n + 1)
+        for parent in parent_indices:
+            counts[parent + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        child_offsets = array('i', counts)
+        child_indices = array('i', [0]) * len(parent_indices)
+        cursor = array('i', counts[:n])
+        for child in range(n):
+            for k in range(parent_offsets[child], parent_offsets[child + 1]):
+                parent = parent_indices[k]
+                child_indices[cursor[parent]] = child
+                cursor[parent] += 1
+
+        return cls(
+            node_ids, display_names,
+            parent_offsets, parent_indices,
+            child_offsets, child_indices,
+            layer_codes, layers,
+            schema_codes, schemas,
+            dv_type_codes, dv_types
+        )
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.parent_indices)
+
+    def parents(self, i: int) -> array:
+        """Indices of the parent models of node `i`."""
+        return self.parent_indices[self.parent_offsets[i]:self.parent_offsets[i + 1]]
+
+    def children(self, i: int) -> array:
+        """Indices of the child models of node `i`."""
+        return self.child_indices[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+    def layer(self, i: int) -> str:
+        return self.layers[self.layer_codes[i]]
+
+    def schema(self, i: int) -> str:
+        return self.schemas[self.schema_codes[i]]
+
+    def dv_type(self, i: int) -> str:
+        return self.dv_types[self.dv_type_codes[i]]
+
+    def select(self, layers: Optional[Iterable[str]] = None,
+               node_ids: Optional[Iterable[str]] = None) -> List[int]:
+        """Indices of models in `layers` and `node_ids`, in manifest order.
+
+        Either filter may be omitted; an empty `layers` selects every layer, as
+        in the ERD builders.
+        """
+        if node_ids is not None:
+            candidates = sorted(self.index[node_id] for node_id in node_ids if node_id in self.index)
+        else:
+            candidates = range(len(self.node_ids))
+        if not layers:
+            return list(candidates)
+        layer_codes = {self.layers.index(layer) for layer in layers if layer in self.layers}
+        return [i for i in candidates if self.layer_codes[i] in layer_codes]
+
+    def edges(self, selected: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, int]]:
+        """Yield (child, parent) index pairs with both ends in `selected`."""
+        if selected is None:
+            selected = range(len(self.node_ids))
+            mask = None
+        else:
+            selected = list(selected)
+            mask = bytearray(len(self.node_ids))
+            for i in selected:
+                mask[i] = 1
+
+        parent_offsets = self.parent_offsets
+        parent_indices = self.parent_indices
+        for child in selected:
+            for k in range(parent_offsets[child], parent_offsets[child + 1]):
+                parent = parent_indices[k]
+                if mask is None or mask[parent]:
+                    yield child, parent
+
+    def lineage(self, node_id: str, upstream_depth: Optional[int] = 1,
+                downstream_depth: Optional[int] = 1,
+                max_nodes: Optional[int] = None) -> FrozenSet[str]:
+        """Unique ids of the models within the given hops of `node_id`, itself included.
+
+        Upstream (parents) and downstream (children) are searched breadth first and
+        in lock step, one hop each per round, so when `max_nodes` cuts the search
+        short both directions are represented. A depth of None is unlimited.
+        Results are memoized per (node, depths, budget).
+        """
+        key = (node_id, upstream_depth, downstream_depth, max_nodes)
+        with self._lineage_lock:
+            if key in self._lineage_cache:
+                self._lineage_cache.move_to_end(key)
+                return self._lineage_cache[key]
+
+        start = self.index.get(node_id)
+        if start is None:
+            return frozenset()
+
+        visited = {start}
+        searches = [
+            [upstream_depth, self.parent_offsets, self.parent_indices, [start]],
+            [downstream_depth, self.child_offsets, self.child_indices, [start]]
+        ]
+        hop = 0
+        budget_left = max_nodes is None or len(visited) < max_nodes
+        while budget_left and any(search[3] for search in searches):
+            hop += 1
+            for search in searches:
+                depth, offsets, indices, frontier = search
+                if not frontier or (depth is not None and hop > depth):
+                    search[3] = []
+                    continue
+                next_frontier = []
+                for i in frontier:
+                    for k in range(offsets[i], offsets[i + 1]):
+                        neighbour = indices[k]
+                        if neighbour in visited:
+                            continue
+                        visited.add(neighbour)
+                        next_frontier.append(neighbour)
+                        if max_nodes is not None and len(visited) >= max_nodes:
+                            budget_left = False
+                            break
+                    if not budget_left:
+                        break
+                search[3] = next_frontier
+                if not budget_left:
+                    break
+
+        result = frozenset(self.node_ids[i] for i in visited)
+        with self._lineage_lock:
+            self._lineage_cache[key] = result
+            if len(self._lineage_cache) > LINEAGE_CACHE_SIZE:
+                self._lineage_cache.popitem(last=False)
+        return result
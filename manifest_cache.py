@@ -0,0 +1,267 @@
+import gzip
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, IO, Iterable, Optional
+
+from pydantic import BaseModel
+
+from manifest_loader import load_manifest_fast
+from models import Manifest
+
+# Bump when the snapshot layout changes so stale files on disk are ignored
+SNAPSHOT_VERSION = 5
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Nodes and sources measured per manifest to estimate its resident size
+SIZE_SAMPLE = 200
+# Derived indexes (lineage graph, relationship, column and search indexes, ...)
+# relative to the complete nodes they are built from. Measured with tracemalloc
+# on synthetic manifests at 0.2-0.4, and up to 0.6 with a node store, which
+# also keeps recently decoded nodes.
+INDEX_FACTOR = 0.6
+
+
+def content_hash(data: bytes) -> str:
+    """Content address of a manifest.json payload."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _snapshot(manifest: Manifest) -> bytes:
+    # Only the parsed fields and node hashes are stored, derived indexes are rebuilt
+    # lazily. A node store pickles as its file and byte spans.
+    return pickle.dumps(
+        (manifest.nodes, manifest.parent_map, manifest.child_map, manifest.sources, manifest._node_store,
+         manifest._node_hashes, manifest._hash_scheme),
+        protocol=pickle.HIGHEST_PROTOCOL
+    )
+
+
+def _deep_size(obj) -> int:
+    """`sys.getsizeof` of an object and everything it references, pydantic models included."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, BaseModel):
+            stack.append(item.__dict__)
+            stack.append(item.__pydantic_fields_set__)
+        elif isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+def _sampled_size(ids: Iterable[str], count: int, size_of: Callable[[str], int]) -> int:
+    """Total of `size_of` over `count` ids, extrapolated from up to SIZE_SAMPLE evenly spread ones."""
+    if not count:
+        return 0
+    sample = list(ids)[::max(count // SIZE_SAMPLE, 1)]
+    return sum(size_of(node_id) for node_id in sample) * count // len(sample)
+
+
+def estimate_size(manifest: Manifest) -> int:
+    """Estimated resident bytes of a manifest once its derived indexes are built.
+
+    Nodes are measured on a sample rather than one by one. With a node store
+    the resident nodes are light and the indexes are sized from the complete
+    nodes they are built from.
+    """
+    nodes, sources = manifest.nodes, manifest.sources
+    resident = _sampled_size(nodes, len(nodes), lambda node_id: _deep_size(nodes[node_id]))
+    complete = resident if manifest._node_store is None else _sampled_size(
+        nodes, len(nodes), lambda node_id: _deep_size(manifest.node_details(node_id))
+    )
+    source_size = _sampled_size(sources, len(sources), lambda source_id: _deep_size(sources[source_id]))
+    return int(resident + source_size + (complete + source_size) * INDEX_FACTOR)
+
+
+def _restore(snapshot: bytes, key: str) -> Optional[Manifest]:
+    nodes, parent_map, child_map, sources, node_store, node_hashes, hash_scheme = pickle.loads(snapshot)
+    if node_store is not None and not os.path.exists(node_store.path):
+        # Without the mapped manifest.json the light nodes cannot be completed
+        return None
+    manifest = Manifest.model_construct(nodes=nodes, parent_map=parent_map, child_map=child_map, sources=sources)
+    manifest._content_hash = key
+    manifest._node_store = node_store
+    manifest._node_hashes = node_hashes
+    manifest._hash_scheme = hash_scheme
+    return manifest
+
+
+class ManifestCache:
+    """Process-wide LRU cache of parsed manifests keyed by content hash.
+
+    Entries are sized by `estimate_size`, which covers the indexes built on a
+    manifest later, and evicted least recently used first once `max_bytes` is
+    exceeded. With a `spill_dir`, snapshots are also written to disk as gzipped
+    pickles so a restarted process can warm up without decoding and validating
+    the JSON again. Concurrent loads of the same manifest parse it once.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, spill_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._entries: 'OrderedDict[str, Manifest]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._entry_hits: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Held while a key is parsed, so other callers wait for it instead of parsing too
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.v{SNAPSHOT_VERSION}.pickle.gz")
+
+    def _read_spill(self, key: str) -> Optional[bytes]:
+        if not self.spill_dir:
+            return None
+        try:
+            with gzip.open(self._spill_path(key), 'rb') as f:
+                return f.read()
+        except (OSError, EOFError):
+            return None
+
+    def _write_spill(self, key: str, snapshot: bytes) -> None:
+        if not self.spill_dir or os.path.exists(self._spill_path(key)):
+            return
+        # Write to a temporary name first so readers never see a partial file
+        tmp_path = f"{self._spill_path(key)}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=1) as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self._spill_path(key))
+
+    def _store(self, key: str, manifest: Manifest, size: int) -> None:
+        self._entries[key] = manifest
+        self._sizes[key] = size
+        self._entry_hits.setdefault(key, 0)
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            evicted, _ = self._entries.popitem(last=False)
+            del self._sizes[evicted]
+            self._entry_hits.pop(evicted, None)
+            self.evictions += 1
+        # A single entry larger than the cap is returned but not kept
+        if self.total_bytes > self.max_bytes:
+            self.evict(key)
+
+    def get(self, key: str) -> Optional[Manifest]:
+        """Return a cached manifest from memory or disk without parsing."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._entry_hits[key] += 1
+                self.hits += 1
+                return self._entries[key]
+
+        snapshot = self._read_spill(key)
+        if snapshot is None:
+            return None
+        manifest = _restore(snapshot, key)
+        if manifest is None:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._store(key, manifest, estimate_size(manifest))
+        return manifest
+
+    def get_or_load(self, data: bytes, key: Optional[str] = None,
+                    loader: Callable[[IO], Manifest] = load_manifest_fast) -> Manifest:
+        """Return the parsed manifest for `data`, parsing it only on a cache miss."""
+        key = key or content_hash(data)
+        manifest = self.get(key)
+        if manifest is not None:
+            return manifest
+
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            # Another caller may have loaded it while this one waited
+            manifest = self.get(key)
+            if manifest is not None:
+                return manifest
+            try:
+                manifest = loader(io.BytesIO(data))
+                manifest._content_hash = key
+                if self.spill_dir:
+                    self._write_spill(key, _snapshot(manifest))
+                size = estimate_size(manifest)
+                with self._lock:
+                    self.misses += 1
+                    self._store(key, manifest, size)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return manifest
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a manifest is in memory, without counting a hit or refreshing its LRU position."""
+        with self._lock:
+            return key in self._entries
+
+    def evict(self, key: str) -> None:
+        """Drop an entry from memory, its disk snapshot is kept."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                del self._sizes[key]
+                self._entry_hits.pop(key, None)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters and per-entry sizes, most recently used last."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'entries': [
+                    {
+                        'key': key[:12],
+                        'nodes': len(self._entries[key].nodes),
+                        'size_bytes': self._sizes[key],
+                        'hits': self._entry_hits[key]
+                    }
+                    for key in self._entries
+                ]
+            }
+
+
+_cache: Optional[ManifestCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_manifest_cache() -> ManifestCache:
+    """Return the process-wide cache configured from the environment.
+
+    ERD_CACHE_MAX_MB sets the memory cap and ERD_CACHE_DIR enables disk spill.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_mb = os.environ.get('ERD_CACHE_MAX_MB')
+            _cache = ManifestCache(
+                max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES,
+                spill_dir=os.environ.get('ERD_CACHE_DIR') or None
+            )
+        return _cache
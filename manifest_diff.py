@@ -0,0 +1,122 @@
+from typing import FrozenSet, Iterable, Set, Tuple
+
+import layout
+from models import Manifest
+from relationship_index import RelationshipIndex
+
+Edge = Tuple[str, str]
+# Above this share of added models a fresh layout beats patching the old one
+MAX_ADDED_SHARE_FOR_LAYOUT = 0.5
+
+
+class ManifestDiff:
+    """Models, relationship tests and lineage edges that differ between two manifests.
+
+    Models are compared by `Manifest.node_hash`. Edges are (child, parent)
+    pairs of model unique ids, and only edges touching an added, removed or
+    changed model are compared since all others are equal by construction.
+    Manifests whose hashes are not comparable give a `full_rebuild` diff, in
+    which every shared model, test and source counts as changed.
+    """
+
+    def __init__(self, added_models: FrozenSet[str], removed_models: FrozenSet[str],
+                 changed_models: FrozenSet[str], added_edges: Set[Edge], removed_edges: Set[Edge],
+                 changed_tests: FrozenSet[str], sources_changed: bool, full_rebuild: bool = False):
+        self.added_models = added_models
+        self.removed_models = removed_models
+        self.changed_models = changed_models
+        self.added_edges = added_edges
+        self.removed_edges = removed_edges
+        # Relationship tests that are new or whose content changed
+        self.changed_tests = changed_tests
+        self.sources_changed = sources_changed
+        self.full_rebuild = full_rebuild
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added_models or self.removed_models or self.changed_models
+                    or self.added_edges or self.removed_edges or self.changed_tests or self.sources_changed)
+
+    def summary(self) -> str:
+        if self.full_rebuild:
+            return f"{len(self.added_models) + len(self.changed_models)} models, rebuilt in full"
+        return (
+            f"{len(self.added_models)} added, {len(self.changed_models)} changed, "
+            f"{len(self.removed_models)} removed models; "
+            f"{len(self.added_edges)} added, {len(self.removed_edges)} removed edges"
+        )
+
+
+def _edges_touching(manifest: Manifest, node_ids: Iterable[str]) -> Set[Edge]:
+    model_ids = manifest.model_ids
+    edges = set()
+    for node_id in node_ids:
+        edges.update((node_id, parent) for parent in manifest.parent_map.get(node_id, ()) if parent in model_ids)
+        edges.update((child, node_id) for child in manifest.child_map.get(node_id, ()) if child in model_ids)
+    return edges
+
+
+def _changed(old: Manifest, new: Manifest, node_ids: Iterable[str]) -> FrozenSet[str]:
+    """Nodes of both manifests whose hashes differ.
+
+    Loaded manifests carry the hash of every node, so this is a dictionary
+    lookup per node; `node_hash` only runs for nodes without one.
+    """
+    old_hashes, new_hashes = old._node_hashes, new._node_hashes
+    return frozenset(
+        node_id for node_id in node_ids
+        if (new_hashes.get(node_id) or new.node_hash(node_id)) != (old_hashes.get(node_id) or old.node_hash(node_id))
+    )
+
+
+def diff_manifests(old: Manifest, new: Manifest) -> ManifestDiff:
+    """Compare two manifests node by node through their content hashes.
+
+    Manifests loaded with different hash schemes, such as one decoded by
+    msgspec and the next by the streaming fallback, cannot be compared node by
+    node, so every node they share is reported as changed.
+    """
+    old_models, new_models = old.model_ids, new.model_ids
+    added = frozenset(new_models - old_models)
+    removed = frozenset(old_models - new_models)
+    new_tests = [node_id for node_id, node in new.nodes.items() if node.test_metadata is not None]
+    full_rebuild = old.hash_scheme != new.hash_scheme
+    if full_rebuild:
+        changed = frozenset(new_models & old_models)
+        changed_tests = frozenset(new_tests)
+        sources_changed = True
+    else:
+        changed = _changed(old, new, new_models & old_models)
+        changed_tests = frozenset(node_id for node_id in new_tests if node_id not in old.nodes) | _changed(
+            old, new, (node_id for node_id in new_tests if node_id in old.nodes)
+        )
+        sources_changed = old.sources.keys() != new.sources.keys() or bool(_changed(old, new, new.sources))
+
+    old_edges = _edges_touching(old, removed | changed)
+    new_edges = _edges_touching(new, added | changed)
+    return ManifestDiff(
+        added, removed, changed,
+        added_edges=new_edges - old_edges,
+        removed_edges=old_edges - new_edges,
+        changed_tests=changed_tests,
+        sources_changed=sources_changed,
+        full_rebuild=full_rebuild
+    )
+
+
+def refresh_manifest(old: Manifest, new: Manifest) -> ManifestDiff:
+    """Carry the derived structures of `old` over to `new` for everything unchanged.
+
+    The relationship index is updated from the previous one instead of being
+    rebuilt, and cached layouts of `old` are copied to `new` with every model
+    still present keeping its coordinates. Table labels are cached by node hash in
+    `erd_generator` and need no update. The lineage graph is rebuilt lazily,
+    which is a single linear pass over the model ids. After a `full_rebuild`
+    diff the relationship index is left to be built from scratch on first use.
+    """
+    diff = diff_manifests(old, new)
+    if not diff.full_rebuild and old._relationship_index is not None and new._relationship_index is None:
+        new._relationship_index = RelationshipIndex.updated(old._relationship_index, new, diff)
+    if len(diff.added_models) <= len(new.model_ids) * MAX_ADDED_SHARE_FOR_LAYOUT:
+        layout.carry_over_layouts(old, new)
+    return diff
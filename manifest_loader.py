@@ -0,0 +1,287 @@
+import gc
+import hashlib
+import io
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import IO, Dict, List, Optional
+
+from instrumentation import instrumented
+from models import Manifest, ManifestNode, SourceNode
+
+try:
+    import ijson
+except ImportError:  # Streaming is optional, fall back to json.load
+    ijson = None
+
+try:
+    import fast_decoder
+    import node_store
+except ImportError:  # msgspec is optional, fall back to the pydantic path
+    fast_decoder = node_store = None
+
+MODEL_PREFIX = 'model.'
+TEST_PREFIX = 'test.'
+
+# 'auto' decodes with msgspec when installed, 'pydantic' always validates with pydantic
+DECODER = os.environ.get('ERD_DECODER', 'auto')
+# Raised by the loaders for a manifest.json that is malformed, truncated or does not fit the schema
+LoadError = (ValueError,) + ((ijson.JSONError,) if ijson is not None else ())
+# When set, models keep only their graph fields in memory and the rest is read
+# on demand from a copy of manifest.json in this directory, see `_decode_indexed`
+NODE_STORE_DIR = os.environ.get('ERD_NODE_STORE_DIR')
+
+
+def is_relationship_test(node: dict) -> bool:
+    """Check whether a raw manifest node is a dbt relationships test."""
+    test_metadata = node.get('test_metadata') or {}
+    return test_metadata.get('name') == 'relationships'
+
+
+def _keep_node(node_id: str, node: dict) -> bool:
+    """Only model nodes and relationship tests are needed for the ERD."""
+    if node_id.startswith(MODEL_PREFIX):
+        return True
+    return node_id.startswith(TEST_PREFIX) and is_relationship_test(node)
+
+
+def _filter_map(edges: Dict[str, List[str]], kept_nodes: Dict[str, ManifestNode]) -> Dict[str, List[str]]:
+    """Restrict a parent/child map to model keys and kept nodes."""
+    return {
+        node_id: [other for other in others if other in kept_nodes]
+        for node_id, others in edges.items()
+        if node_id in kept_nodes and node_id.startswith(MODEL_PREFIX)
+    }
+
+
+def _raw_hash(raw) -> str:
+    """Content hash of the JSON bytes of one node, see `Manifest.node_hash`."""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _value_hash(value: dict) -> str:
+    """Content hash of one decoded node, for loaders that never see its bytes."""
+    return _raw_hash(json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+
+@instrumented('manifest_construct')
+def _build_manifest(nodes: Dict[str, ManifestNode], sources: Dict[str, SourceNode],
+                    parent_map: dict, child_map: dict,
+                    node_hashes: Optional[Dict[str, str]] = None, hash_scheme: str = 'model') -> Manifest:
+    # Nodes are validated one by one while loading, so skip revalidating them here
+    manifest = Manifest.model_construct(
+        nodes=nodes,
+        parent_map=_filter_map(parent_map, nodes),
+        child_map=_filter_map(child_map, nodes),
+        sources=sources
+    )
+    if node_hashes is not None:
+        manifest._node_hashes = node_hashes
+        manifest._hash_scheme = hash_scheme
+    return manifest
+
+
+def manifest_from_dict(manifest_data: dict) -> Manifest:
+    """Build a model-only Manifest from an already decoded manifest.json."""
+    nodes = {}
+    node_hashes = {}
+    for node_id, node in manifest_data.get('nodes', {}).items():
+        if _keep_node(node_id, node):
+            nodes[node_id] = ManifestNode.model_validate(node)
+            node_hashes[node_id] = _value_hash(node)
+    sources = {}
+    for source_id, source in manifest_data.get('sources', {}).items():
+        sources[source_id] = SourceNode.model_validate(source)
+        node_hashes[source_id] = _value_hash(source)
+    return _build_manifest(nodes, sources, manifest_data.get('parent_map', {}), manifest_data.get('child_map', {}),
+                           node_hashes, 'value')
+
+
+def load_manifest_eager(fp: IO) -> Manifest:
+    """Load a manifest the original way: decode everything, then validate every node."""
+    manifest_data = json.load(fp)
+    return Manifest(
+        nodes=manifest_data.get('nodes', {}),
+        parent_map=manifest_data.get('parent_map', {}),
+        child_map=manifest_data.get('child_map', {}),
+        sources=manifest_data.get('sources', {})
+    )
+
+
+@instrumented('manifest_load')
+def load_manifest(fp: IO) -> Manifest:
+    """Load a manifest keeping only model nodes, relationship tests and sources.
+
+    With ijson installed the file is walked once as a stream of parse events, so
+    only one node is materialized at a time and memory stays bounded by the size
+    of the kept nodes rather than the whole manifest.
+    """
+    if ijson is None:
+        return manifest_from_dict(json.load(fp))
+
+    nodes = {}
+    sources = {}
+    node_hashes = {}
+    maps = {'parent_map': {}, 'child_map': {}}
+    builder = None
+    depth = 0
+    section = None
+    node_id = None
+    map_key = None
+
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        # Feed the events of a node we decided to keep into its builder
+        if builder is not None:
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+                if depth == 0:
+                    if section == 'sources':
+                        sources[node_id] = SourceNode.model_validate(builder.value)
+                        node_hashes[node_id] = _value_hash(builder.value)
+                    elif _keep_node(node_id, builder.value):
+                        nodes[node_id] = ManifestNode.model_validate(builder.value)
+                        node_hashes[node_id] = _value_hash(builder.value)
+                    builder = None
+            continue
+
+        if prefix in ('nodes', 'sources') and event == 'map_key':
+            section = prefix
+            node_id = value
+            if section == 'sources' or node_id.startswith(MODEL_PREFIX) or node_id.startswith(TEST_PREFIX):
+                builder = ijson.ObjectBuilder()
+        elif event == 'map_key' and prefix in maps:
+            map_key = value
+            if map_key.startswith(MODEL_PREFIX):
+                maps[prefix][map_key] = []
+        elif event == 'string' and map_key is not None:
+            edges = maps.get(prefix.split('.', 1)[0], {}).get(map_key)
+            if edges is not None and (value.startswith(MODEL_PREFIX) or value.startswith(TEST_PREFIX)):
+                edges.append(value)
+
+    return _build_manifest(nodes, sources, maps['parent_map'], maps['child_map'], node_hashes, 'value')
+
+
+def _decode_sources(manifest, node_hashes: Dict[str, str]) -> Dict[str, SourceNode]:
+    sources = {}
+    for source_id, raw in manifest.sources.items():
+        sources[source_id] = fast_decoder.to_source(fast_decoder.decode_source(raw))
+        node_hashes[source_id] = _raw_hash(raw)
+    return sources
+
+
+def _decode_fast(data: bytes) -> Manifest:
+    manifest = fast_decoder.decode(data)
+    nodes = {}
+    node_hashes = {}
+    for node_id, raw in manifest.nodes.items():
+        if node_id.startswith(MODEL_PREFIX):
+            nodes[node_id] = fast_decoder.to_node(fast_decoder.decode_node(raw))
+        elif node_id.startswith(TEST_PREFIX):
+            node = fast_decoder.decode_node(raw)
+            if node.test_metadata is None or node.test_metadata.name != 'relationships':
+                continue
+            nodes[node_id] = fast_decoder.to_node(node)
+        else:
+            continue
+        node_hashes[node_id] = _raw_hash(raw)
+    sources = _decode_sources(manifest, node_hashes)
+    return _build_manifest(nodes, sources, manifest.parent_map, manifest.child_map, node_hashes, 'raw')
+
+
+def _decode_indexed(data: bytes, store_dir: str) -> Optional[Manifest]:
+    """`_decode_fast` keeping light nodes, with the byte span of every node recorded.
+
+    Columns and descriptions are skipped unparsed, so resident memory does not
+    grow with them; `Manifest.node_details` decodes a complete node from a
+    memory-mapped copy of `data`. The spans are found in the same scan: every
+    node starts at the first occurrence of its own opening bytes after the end
+    of the node before it, with only its key in between. Returns None when a
+    node is not found there, and the manifest is then decoded without a store.
+    """
+    manifest = fast_decoder.decode(data)
+    nodes = {}
+    node_hashes = {}
+    spans = {}
+    cursor = 0
+    for node_id, raw in manifest.nodes.items():
+        view = memoryview(raw)
+        try:
+            start = data.index(view[:64], cursor)
+        except ValueError:
+            return None
+        cursor = start + len(view)
+        if node_id.startswith(MODEL_PREFIX):
+            node = fast_decoder.decode_light_node(raw)
+        elif node_id.startswith(TEST_PREFIX):
+            node = fast_decoder.decode_light_node(raw)
+            if node.test_metadata is None or node.test_metadata.name != 'relationships':
+                continue
+        else:
+            continue
+        nodes[node_id] = fast_decoder.to_light_node(node)
+        node_hashes[node_id] = _raw_hash(raw)
+        spans[node_id] = (start, cursor)
+    sources = _decode_sources(manifest, node_hashes)
+    result = _build_manifest(nodes, sources, manifest.parent_map, manifest.child_map, node_hashes, 'raw')
+    result._node_store = node_store.NodeStore(node_store.store_file(data, store_dir), spans)
+    return result
+
+
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def _gc_paused():
+    """Run the block with the cyclic garbage collector disabled.
+
+    `gc.disable` affects the whole process, so other threads, such as other
+    sessions' scripts, also run without collections meanwhile. Overlapping
+    decodes share one pause, and the collector is enabled again when the last
+    of them ends, if it was enabled when the first one started.
+    """
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+@instrumented('manifest_decode')
+def decode_manifest(data: bytes) -> Manifest:
+    """Build the same Manifest as `load_manifest` from manifest.json bytes.
+
+    With msgspec installed the bytes are decoded against typed structs that
+    mirror the models, skipping every field the ERD never reads and every node
+    it drops without building Python objects for them. Anything msgspec rejects
+    goes through the pydantic path, which reports the error as before. With
+    NODE_STORE_DIR set, nodes are loaded light, see `_decode_indexed`.
+    """
+    if fast_decoder is not None and DECODER != 'pydantic':
+        # The decoded nodes form a tree without cycles, yet building one object per
+        # column keeps triggering collections that scan everything built so far
+        try:
+            with _gc_paused():
+                manifest = _decode_indexed(data, NODE_STORE_DIR) if NODE_STORE_DIR else None
+                return manifest if manifest is not None else _decode_fast(data)
+        except fast_decoder.DecodeError:
+            pass
+    return load_manifest(io.BytesIO(data))
+
+
+def load_manifest_fast(fp: IO) -> Manifest:
+    """`decode_manifest` for a file object, reading it whole."""
+    return decode_manifest(fp.read())
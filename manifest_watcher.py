@@ -0,0 +1,232 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from manifest_cache import ManifestCache, content_hash, get_manifest_cache
+from manifest_diff import refresh_manifest
+from models import Manifest
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Without watchdog the manifest file is polled
+    Observer = None
+    FileSystemEventHandler = object
+
+MANIFEST_FILE = 'manifest.json'
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+RELOAD_HISTORY = 20
+# watchdog event types that can change the file, 'closed' being closed after writing
+WRITE_EVENTS = ('created', 'modified', 'moved', 'closed')
+
+logger = logging.getLogger(__name__)
+
+
+class _ManifestEvents(FileSystemEventHandler):
+    """Forwards writes to manifest.json in the watched directory."""
+
+    def __init__(self, watcher: 'ManifestWatcher'):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # Opening and reading the file, which the watcher itself does, is not a write
+        if event.event_type not in WRITE_EVENTS:
+            return
+        paths = (getattr(event, 'src_path', ''), getattr(event, 'dest_path', ''))
+        # dbt may write the file in place or move a finished file over it
+        if any(os.path.basename(path) == MANIFEST_FILE for path in paths if path):
+            self.watcher.notify()
+
+
+class ManifestWatcher:
+    """Keeps the latest manifest.json of a dbt target directory parsed.
+
+    File system events come from watchdog (inotify on Linux) when it is
+    installed; otherwise, or when the observer cannot start, the file's mtime and
+    size are polled every `poll_interval` seconds. A burst of writes is
+    debounced: the file is read once nothing has touched it for `debounce`
+    seconds. Parsing happens on the watcher's own thread through the manifest
+    cache, and each new version is refreshed from the previous one with
+    `refresh_manifest`, so sessions pick up a manifest whose unchanged indexes
+    and layouts are already carried over. A file that fails to parse, such as
+    one dbt is still writing, leaves the current manifest in place.
+    """
+
+    def __init__(self, target_dir: str, cache: Optional[ManifestCache] = None,
+                 debounce: float = DEFAULT_DEBOUNCE, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.target_dir = os.path.abspath(target_dir)
+        self.path = os.path.join(self.target_dir, MANIFEST_FILE)
+        self.cache = cache or get_manifest_cache()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.mode = 'polling'
+        # Increases with every manifest applied, sessions compare it to the version they show
+        self.version = 0
+        self.current: Optional[Manifest] = None
+        self.history: Deque[Dict] = deque(maxlen=RELOAD_HISTORY)
+        self._condition = threading.Condition()
+        self._first_event: Optional[float] = None
+        self._last_event: Optional[float] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    def start(self) -> 'ManifestWatcher':
+        """Load the current manifest, if any, and start watching."""
+        if self._thread is not None:
+            return self
+        if Observer is not None:
+            try:
+                observer = Observer()
+                observer.schedule(_ManifestEvents(self), self.target_dir, recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                self.mode = 'events'
+            except OSError as e:
+                # e.g. the inotify watch limit is reached
+                logger.warning("Falling back to polling %s: %s", self.target_dir, e)
+        # The first load happens here, so the first page already shows the manifest
+        self._reload(time.monotonic())
+        self._thread = threading.Thread(target=self._run, name='erd-manifest-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+        if self._thread is not None:
+            self._thread.join()
+
+    def notify(self) -> None:
+        """Record a write to the manifest, restarting the debounce period."""
+        with self._condition:
+            now = time.monotonic()
+            if self._first_event is None:
+                self._first_event = now
+            self._last_event = now
+            self._condition.notify_all()
+
+    def latest(self) -> Tuple[int, Optional[Manifest]]:
+        """The current version number and manifest, read together."""
+        with self._condition:
+            return self.version, self.current
+
+    @property
+    def last_reload(self) -> Optional[Dict]:
+        return self.history[-1] if self.history else None
+
+    def reloads(self) -> List[Dict]:
+        """Recent reloads, newest last."""
+        return list(self.history)
+
+    def reload_of(self, version: int) -> Optional[Dict]:
+        """The successful reload that produced `version`, if it is still in the history.
+
+        Failed reloads after it keep the version number, so the newest entry
+        does not necessarily describe the manifest a session shows.
+        """
+        for reload in reversed(self.reloads()):
+            if reload['status'] == 'loaded' and reload['version'] == version:
+                return reload
+        return None
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._last_event is not None:
+                        quiet_for = time.monotonic() - self._last_event
+                        if quiet_for >= self.debounce:
+                            break
+                        self._condition.wait(self.debounce - quiet_for)
+                    else:
+                        self._condition.wait(self.poll_interval)
+                        if self._last_event is None and self._file_signature() != self._signature:
+                            # Polling: a changed signature counts as a write
+                            now = time.monotonic()
+                            self._first_event = self._last_event = now
+                if self._stopped:
+                    return
+                first_event = self._first_event
+                self._first_event = self._last_event = None
+            self._reload(first_event)
+
+    def _reload(self, first_event: float) -> None:
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return
+        started = time.monotonic()
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            key = content_hash(data)
+            if self.current is not None and key == self.current.content_hash:
+                self._signature = signature
+                return
+            manifest = self.cache.get_or_load(data, key=key)
+            parsed = time.monotonic()
+            diff = refresh_manifest(self.current, manifest) if self.current is not None else None
+        except Exception as e:
+            # A partial write fails to parse; the write that completes it triggers another reload
+            self._signature = signature
+            self.history.append({
+                'at': time.time(), 'version': self.version, 'status': 'failed', 'error': str(e),
+                'latency_ms': None, 'parse_ms': None, 'changes': None
+            })
+            logger.warning("Could not reload %s: %s", self.path, e)
+            return
+
+        finished = time.monotonic()
+        self._signature = signature
+        with self._condition:
+            self.current = manifest
+            self.version += 1
+        self.history.append({
+            'at': time.time(),
+            'version': self.version,
+            'status': 'loaded',
+            'error': None,
+            # From the first write of the burst to the manifest being ready for sessions
+            'latency_ms': round((finished - first_event) * 1000, 1),
+            'parse_ms': round((parsed - started) * 1000, 1),
+            'changes': diff.summary() if diff is not None else f"{len(manifest.model_ids)} models"
+        })
+
+
+_watcher: Optional[ManifestWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_manifest_watcher() -> Optional[ManifestWatcher]:
+    """Return the process-wide watcher, or None when ERD_WATCH_DIR is not set.
+
+    ERD_WATCH_DIR is the dbt target directory holding manifest.json and
+    ERD_WATCH_DEBOUNCE the quiet period in seconds before a reload.
+    """
+    global _watcher
+    target_dir = os.environ.get('ERD_WATCH_DIR')
+    if not target_dir:
+        return None
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = ManifestWatcher(
+                target_dir,
+                debounce=float(os.environ.get('ERD_WATCH_DEBOUNCE', DEFAULT_DEBOUNCE))
+            ).start()
+        return _watcher
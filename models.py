@@ -1,5 +1,7 @@
-from typing import Dict, List, Optional, Union
-from pydantic import BaseModel, Field
+import hashlib
+from typing import Any, Dict, FrozenSet, List, Optional, Union
+from pydantic import BaseModel, Field, PrivateAttr
+from instrumentation import instrumented
 
 class ColumnInfo(BaseModel):
     name: str
@@ -19,25 +21,201 @@ class NodePatch(BaseModel):
 
 class TestMetadata(BaseModel):
     name: str
-    kwargs: Dict[str, str]
+    kwargs: Dict[str, Any]
     namespace: Optional[str] = None
 
 class TestNode(BaseModel):
     test_metadata: TestMetadata
     column_name: Optional[str] = None
-    refs: List[List[str]] = Field(default_factory=list)
+    refs: List[Union[List[str], Dict]] = Field(default_factory=list)
+
+class DependsOn(BaseModel):
+    nodes: List[str] = Field(default_factory=list)
 
 class ManifestNode(BaseModel):
     name: str
     schema: str
     database: Optional[str] = None
     description: Optional[str] = None
+    resource_type: Optional[str] = None
+    package_name: Optional[str] = None
     columns: Dict[str, ColumnInfo] = Field(default_factory=dict)
-    refs: List[List[str]] = Field(default_factory=list)
+    refs: List[Union[List[str], Dict]] = Field(default_factory=list)
     tests: List[TestNode] = Field(default_factory=list)
     meta: Dict = Field(default_factory=dict)
+    depends_on: DependsOn = Field(default_factory=DependsOn)
+    # Only set on test nodes
+    test_metadata: Optional[TestMetadata] = None
+    column_name: Optional[str] = None
+    attached_node: Optional[str] = None
+
+class SourceNode(BaseModel):
+    name: str
+    source_name: str
+    schema: str
+    database: Optional[str] = None
+    description: Optional[str] = None
+    columns: Dict[str, ColumnInfo] = Field(default_factory=dict)
+    meta: Dict = Field(default_factory=dict)
     
 class Manifest(BaseModel):
     nodes: Dict[str, ManifestNode]
     parent_map: Dict[str, List[str]]
-    child_map: Dict[str, List[str]] 
\ No newline at end of file
+    child_map: Dict[str, List[str]]
+    sources: Dict[str, SourceNode] = Field(default_factory=dict)
+
+    # Hash of the manifest.json bytes this object was parsed from, set by the cache
+    _content_hash: Optional[str] = PrivateAttr(default=None)
+
+    # Model lookup indexes, built once on first use
+    _display_names: Optional[Dict[str, str]] = PrivateAttr(default=None)
+    _model_ids: Optional[FrozenSet[str]] = PrivateAttr(default=None)
+    _name_index: Optional[Dict[str, str]] = PrivateAttr(default=None)
+    _lineage_graph: Optional[object] = PrivateAttr(default=None)
+    _relationship_index: Optional[object] = PrivateAttr(default=None)
+    _search_index: Optional[object] = PrivateAttr(default=None)
+    _column_index: Optional[object] = PrivateAttr(default=None)
+    _compact_nodes: Optional[object] = PrivateAttr(default=None)
+    _graph_analytics: Optional[object] = PrivateAttr(default=None)
+    # Complete nodes when `nodes` only holds their graph fields, see `node_details`
+    _node_store: Optional[object] = PrivateAttr(default=None)
+    # Per-node content hashes, set by the loaders from the JSON of every kept node
+    # and source, otherwise filled in as nodes are hashed
+    _node_hashes: Dict[str, str] = PrivateAttr(default_factory=dict)
+    # What those hashes were taken over: 'raw' JSON bytes (msgspec loaders), 'value'
+    # for nodes re-encoded after decoding (streaming and dict loaders), 'model' dumps
+    _hash_scheme: str = PrivateAttr(default='model')
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        return self._content_hash
+
+    @property
+    def hash_scheme(self) -> str:
+        """How `node_hash` values were computed; hashes of different schemes never match."""
+        return self._hash_scheme
+
+    def __eq__(self, other) -> bool:
+        # Private attributes are hashes and indexes derived from the fields, which
+        # depend on the loader and on what has been built so far
+        if not isinstance(other, Manifest):
+            return NotImplemented
+        return (self.nodes, self.parent_map, self.child_map, self.sources) == \
+            (other.nodes, other.parent_map, other.child_map, other.sources)
+
+    def _build_indexes(self) -> None:
+        display_names = {}
+        name_index = {}
+        for node_id, node in self.nodes.items():
+            if not node_id.startswith('model.'):
+                continue
+            display_name = f"{node.schema}.{node.name}"
+            display_names[node_id] = display_name
+            # Keep the first model when two packages share a schema and name
+            name_index.setdefault(display_name, node_id)
+        self._name_index = name_index
+        self._model_ids = frozenset(display_names)
+        self._display_names = display_names
+
+    @property
+    def display_names(self) -> Dict[str, str]:
+        """Model unique_id to `schema.name` display name, in manifest order."""
+        if self._display_names is None:
+            self._build_indexes()
+        return self._display_names
+
+    @property
+    def model_ids(self) -> FrozenSet[str]:
+        """Unique ids of all model nodes."""
+        if self._model_ids is None:
+            self._build_indexes()
+        return self._model_ids
+
+    @instrumented('node_lookup')
+    def get_model_id(self, display_name: str) -> Optional[str]:
+        """Look up a model unique_id by its `schema.name` display name."""
+        if self._name_index is None:
+            self._build_indexes()
+        return self._name_index.get(display_name)
+
+    @property
+    def lineage_graph(self):
+        """Compact integer-indexed model lineage graph, see `lineage_graph.LineageGraph`."""
+        if self._lineage_graph is None:
+            from lineage_graph import LineageGraph
+            self._lineage_graph = LineageGraph.from_manifest(self)
+        return self._lineage_graph
+
+    @property
+    def relationship_index(self):
+        """Resolved relationship tests, see `relationship_index.RelationshipIndex`."""
+        if self._relationship_index is None:
+            from relationship_index import RelationshipIndex
+            self._relationship_index = RelationshipIndex.from_manifest(self)
+        return self._relationship_index
+
+    @property
+    def compact_nodes(self):
+        """Model fields the ERD builders read, see `compact_nodes.CompactNodes`."""
+        if self._compact_nodes is None:
+            from compact_nodes import CompactNodes
+            self._compact_nodes = CompactNodes.from_manifest(self)
+        return self._compact_nodes
+
+    @property
+    def column_index(self):
+        """Column-level foreign key graph, see `column_index.ColumnIndex`."""
+        if self._column_index is None:
+            from column_index import ColumnIndex
+            self._column_index = ColumnIndex.from_manifest(self)
+        return self._column_index
+
+    @property
+    def search_index(self):
+        """Full-text index over models and their columns, see `search_index.SearchIndex`."""
+        if self._search_index is None:
+            from search_index import SearchIndex
+            self._search_index = SearchIndex.from_manifest(self)
+        return self._search_index
+
+    @property
+    def graph_analytics(self):
+        """Levels, fan-in/out, longest chains and cycles, see `graph_analytics.GraphAnalytics`."""
+        if self._graph_analytics is None:
+            from graph_analytics import GraphAnalytics
+            self._graph_analytics = GraphAnalytics(self.lineage_graph)
+        return self._graph_analytics
+
+    def node_hash(self, node_id: str) -> str:
+        """Content hash of one node, equal across manifests when the node is unchanged.
+
+        Loaded manifests hash the JSON of each node once while decoding it, so
+        comparing two manifests costs no decoding. Hashes are only comparable
+        between manifests with the same `hash_scheme`; any field of the node
+        counts, including the ones the ERD never reads.
+        """
+        node_hashes = self._node_hashes
+        node_hash = node_hashes.get(node_id)
+        if node_hash is None:
+            node = self.node_details(node_id) if node_id in self.nodes else self.sources[node_id]
+            node_hash = hashlib.blake2b(node.model_dump_json().encode('utf-8'), digest_size=16).hexdigest()
+            node_hashes[node_id] = node_hash
+        return node_hash
+
+    def node_details(self, node_id: str) -> ManifestNode:
+        """The complete node, columns and description included.
+
+        Manifests loaded with a node store (see `manifest_loader.NODE_STORE_DIR`)
+        keep only the graph fields of each node in `nodes` and decode the full
+        node from the memory-mapped manifest.json when it is asked for.
+        """
+        if self._node_store is None:
+            return self.nodes[node_id]
+        return self._node_store.get(node_id)
+
+    def display_name(self, node_id: str) -> Optional[str]:
+        """Display name of any node or source, models come from the prebuilt index."""
+        if node_id in self.display_names:
+            return self.display_names[node_id]
+        node = self.nodes.get(node_id) or self.sources.get(node_id)
+        return f"{node.schema}.{node.name}" if node else None
@@ -0,0 +1,89 @@
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import fast_decoder
+from models import ManifestNode
+
+# Number of fully decoded nodes kept per store
+NODE_CACHE_SIZE = 256
+
+
+def store_file(data: bytes, store_dir: str) -> str:
+    """Path of a content-addressed copy of manifest.json bytes in `store_dir`, written once.
+
+    The store maps its own copy rather than the original, which dbt rewrites in place.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.json")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path
+
+
+class NodeStore:
+    """Complete nodes of a manifest, decoded on demand from a memory-mapped manifest.json.
+
+    `spans` maps node ids to the (start, end) byte offsets of their JSON in the
+    file at `path`. A node is decoded with msgspec when it is first asked for
+    and the last `cache_size` nodes stay decoded; the file's pages are left to
+    the OS page cache. Stores pickle as their path and spans, so a manifest
+    snapshot restored from disk maps the same file again.
+    """
+
+    def __init__(self, path: str, spans: Dict[str, Tuple[int, int]], cache_size: int = NODE_CACHE_SIZE):
+        self.path = path
+        self.spans = spans
+        self.cache_size = cache_size
+        self.decodes = 0
+        self._nodes: 'OrderedDict[str, ManifestNode]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+
+    def _map(self) -> mmap.mmap:
+        if self._mmap is None:
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def get(self, node_id: str) -> ManifestNode:
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is not None:
+                self._nodes.move_to_end(node_id)
+                return node
+            start, end = self.spans[node_id]
+            raw = self._map()[start:end]
+
+        node = fast_decoder.to_node(fast_decoder.decode_node(raw))
+        with self._lock:
+            self.decodes += 1
+            self._nodes[node_id] = node
+            if len(self._nodes) > self.cache_size:
+                self._nodes.popitem(last=False)
+        return node
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.spans
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NodeStore) and (self.path, self.spans) == (other.path, other.spans)
+
+    def __getstate__(self) -> dict:
+        return {'path': self.path, 'spans': self.spans, 'cache_size': self.cache_size}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['path'], state['spans'], state['cache_size'])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._nodes.clear()
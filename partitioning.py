@@ -0,0 +1,68 @@
+from fnmatch import fnmatch
+from typing import Dict, Iterable, List, Optional
+
+# Ways to split the models of a manifest into separately rendered pieces
+PARTITION_KINDS = ('all', 'layer', 'schema', 'component', 'neighborhood')
+
+
+def partition_models(manifest, by: str = 'all', depth: int = 1,
+                     select: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """Split the models of a manifest into named groups of unique ids.
+
+    `layer` and `schema` group models by `meta.layer` or schema, `component`
+    by weakly connected component of the lineage graph, largest first. `neighborhood`
+    makes one group per model with everything within `depth` hops up- and
+    downstream of it; `select` limits those centre models to ones whose unique
+    id, display name or model name matches any of the glob patterns.
+    """
+    graph = manifest.lineage_graph
+    if by == 'all':
+        return {'all': list(graph.node_ids)}
+
+    if by in ('layer', 'schema'):
+        value_of = graph.layer if by == 'layer' else graph.schema
+        partitions: Dict[str, List[str]] = {}
+        for i, node_id in enumerate(graph.node_ids):
+            partitions.setdefault(value_of(i) or 'none', []).append(node_id)
+        return partitions
+
+    if by == 'component':
+        components = sorted(_components(graph), key=len, reverse=True)
+        return {
+            f"component_{n}": [graph.node_ids[i] for i in sorted(members)]
+            for n, members in enumerate(components, start=1)
+        }
+
+    if by == 'neighborhood':
+        patterns = list(select or ())
+        partitions = {}
+        for i, node_id in enumerate(graph.node_ids):
+            name = graph.display_names[i]
+            candidates = (node_id, name, node_id.rsplit('.', 1)[-1])
+            if patterns and not any(fnmatch(c, p) for c in candidates for p in patterns):
+                continue
+            members = graph.lineage(node_id, depth, depth)
+            partitions[name] = [graph.node_ids[j] for j in sorted(graph.index[other] for other in members)]
+        return partitions
+
+    raise ValueError(f"Unsupported partition kind: {by}")
+
+
+def _components(graph) -> List[List[int]]:
+    """Weakly connected components of a `LineageGraph` as lists of model indices."""
+    seen = bytearray(len(graph))
+    components = []
+    for start in range(len(graph)):
+        if seen[start]:
+            continue
+        seen[start] = 1
+        members, stack = [], [start]
+        while stack:
+            i = stack.pop()
+            members.append(i)
+            for other in (*graph.parents(i), *graph.children(i)):
+                if not seen[other]:
+                    seen[other] = 1
+                    stack.append(other)
+        components.append(members)
+    return components
@@ -0,0 +1,25 @@
+from typing import List, Tuple
+
+try:
+    import pypdf
+except ImportError:  # Only needed to combine paginated exports into one file
+    pypdf = None
+
+
+def merge_pdf_pages(pages: List[Tuple[str, str]], path: str) -> int:
+    """Concatenate PDFs into one document at `path` and return its page count.
+
+    `pages` lists (title, pdf path) in page order; every part gets an entry in
+    the document outline, which PDF viewers show as a clickable table of contents.
+    """
+    if pypdf is None:
+        raise RuntimeError("Combining pages into one PDF requires pypdf (pip install pypdf)")
+
+    writer = pypdf.PdfWriter()
+    for title, page_path in pages:
+        first_page = len(writer.pages)
+        writer.append(page_path)
+        writer.add_outline_item(title, first_page)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return len(writer.pages)
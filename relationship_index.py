@@ -0,0 +1,216 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# ref('model'), ref('package', 'model') and ref('model', v=2)
+_REF_PATTERN = re.compile(
+    r"""ref\(\s*['"]([^'"]+)['"]\s*(?:,\s*['"]([^'"]+)['"]\s*)?"""
+    r"""(?:,\s*v(?:ersion)?\s*=\s*['"]?([^'")\s]+)['"]?\s*)?\)"""
+)
+# source('source_name', 'table_name')
+_SOURCE_PATTERN = re.compile(r"""source\(\s*['"]([^'"]+)['"]\s*,\s*['"]([^'"]+)['"]\s*\)""")
+
+
+class Relationship(NamedTuple):
+    """A column of one model referencing a column of another model or source."""
+    test_id: Optional[str]
+    from_id: str
+    from_column: str
+    to_id: str
+    to_column: str
+
+
+class RelationshipIndex:
+    """Relationship tests of a manifest resolved to the unique ids they connect.
+
+    Built in one pass over the test nodes (and the legacy `tests` list embedded
+    in model nodes). `ref()` and `source()` targets are resolved by name across
+    packages and schemas, preferring the nodes the test itself depends on. The
+    `relationships`, `relationship_labels` and `column_relationships` attributes
+    have the shapes returned by `erd_generator.extract_relationships`.
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self.tests_by_model: Dict[str, List[str]] = {}
+        self.edges: List[Relationship] = []
+        self.relationships: Dict[str, Set[str]] = {}
+        self.relationship_labels: Dict[str, Dict[str, str]] = {}
+        self.column_relationships: List[Tuple] = []
+        self._foreign_keys: Dict[str, Dict[str, str]] = {}
+        self._edges_by_model: Dict[str, List[Relationship]] = {}
+        # Read once, manifest attributes are slow to reach per node
+        self._model_ids = manifest.model_ids
+        self._display_names = manifest.display_names
+
+        self._models_by_name: Dict[str, List[str]] = {}
+        for node_id in manifest.display_names:
+            self._models_by_name.setdefault(manifest.nodes[node_id].name, []).append(node_id)
+        self._sources_by_name = {
+            (source.source_name, source.name): source_id
+            for source_id, source in manifest.sources.items()
+        }
+
+    @classmethod
+    def from_manifest(cls, manifest) -> 'RelationshipIndex':
+        index = cls(manifest)
+        index._build()
+        return index
+
+    def resolve(self, expression: str, package: Optional[str] = None,
+                candidates: Tuple[str, ...] = ()) -> Optional[str]:
+        """Resolve a `ref(...)` or `source(...)` expression to a unique id.
+
+        Among several models with the same name, one in `candidates` wins, then
+        one from `package`, then the first in manifest order.
+        """
+        if not isinstance(expression, str):
+            return None
+
+        match = _SOURCE_PATTERN.search(expression)
+        if match:
+            return self._sources_by_name.get(match.groups())
+
+        match = _REF_PATTERN.search(expression)
+        if not match:
+            return None
+        first, second, version = match.groups()
+        ref_package, name = (first, second) if second else (None, first)
+
+        matches = self._models_by_name.get(name, [])
+        if version:
+            matches = [node_id for node_id in matches if node_id.endswith(f".v{version}")]
+        if ref_package:
+            matches = [node_id for node_id in matches if self.manifest.nodes[node_id].package_name in (ref_package, None)]
+        if not matches:
+            return None
+        for node_id in matches:
+            if node_id in candidates:
+                return node_id
+        for node_id in matches:
+            if package and self.manifest.nodes[node_id].package_name == package:
+                return node_id
+        return matches[0]
+
+    def _tested_model(self, test) -> Optional[str]:
+        """The model a relationship test node is attached to."""
+        if test.attached_node in self._model_ids:
+            return test.attached_node
+        candidates = tuple(test.depends_on.nodes)
+        model_id = self.resolve(test.test_metadata.kwargs.get('model'), test.package_name, candidates)
+        if model_id in self._model_ids:
+            return model_id
+        # Older manifests: the tested model is the dependency that is not the target
+        target_id = self.resolve(test.test_metadata.kwargs.get('to'), test.package_name, candidates)
+        for node_id in candidates:
+            if node_id in self._model_ids and node_id != target_id:
+                return node_id
+        return None
+
+    def _add(self, relationship: Relationship) -> None:
+        from_name = self._display_names.get(relationship.from_id) or self.manifest.display_name(relationship.from_id)
+        to_name = self._display_names.get(relationship.to_id) or self.manifest.display_name(relationship.to_id)
+        self.edges.append(relationship)
+        self._edges_by_model.setdefault(relationship.from_id, []).append(relationship)
+        self.relationships.setdefault(from_name, set()).add(to_name)
+        self.relationship_labels.setdefault(from_name, {})[to_name] = relationship.from_column
+        self.column_relationships.append((
+            (from_name, relationship.from_column),
+            (to_name, relationship.to_column)
+        ))
+        self._foreign_keys.setdefault(relationship.from_id, {})[relationship.from_column] = to_name
+
+    def _index_model_tests(self, node_id: str, node) -> None:
+        """Relationship tests embedded in a model node, as legacy manifests have them."""
+        for test in node.tests:
+            kwargs = test.test_metadata.kwargs
+            if test.test_metadata.name != 'relationships' or 'to' not in kwargs or 'field' not in kwargs:
+                continue
+            to_id = self.resolve(kwargs['to'], node.package_name)
+            if to_id and test.column_name:
+                self._add(Relationship(None, node_id, test.column_name, to_id, kwargs['field']))
+
+    def _index_test(self, node_id: str, node) -> None:
+        """A relationship test node."""
+        kwargs = node.test_metadata.kwargs
+        from_id = self._tested_model(node)
+        if from_id is None:
+            return
+        self.tests_by_model.setdefault(from_id, []).append(node_id)
+
+        candidates = tuple(other for other in node.depends_on.nodes if other != from_id)
+        to_id = self.resolve(kwargs.get('to'), node.package_name, candidates)
+        from_column = node.column_name or kwargs.get('column_name')
+        to_column = kwargs.get('field')
+        if to_id and from_column and to_column:
+            self._add(Relationship(node_id, from_id, from_column, to_id, to_column))
+
+    def _init_models(self) -> None:
+        # Every model gets an entry, as extract_relationships always did
+        for model_name in self._display_names.values():
+            self.relationships[model_name] = set()
+            self.relationship_labels[model_name] = {}
+
+    def _build(self) -> None:
+        manifest = self.manifest
+        self._init_models()
+        for node_id, node in manifest.nodes.items():
+            if node_id in self._model_ids:
+                self._index_model_tests(node_id, node)
+            elif node.test_metadata is not None and node.test_metadata.name == 'relationships':
+                self._index_test(node_id, node)
+
+    @classmethod
+    def updated(cls, previous: 'RelationshipIndex', manifest, diff) -> 'RelationshipIndex':
+        """Index of `manifest` reusing the resolved tests of `previous` that `diff` leaves intact.
+
+        A resolved test is kept when the test node and both models it connects
+        are unchanged and no model with the name of either end was added or
+        removed, since that could change what its `ref()` resolves to. Every
+        other relationship test, including those that did not resolve before, is
+        resolved again. Any change to the sources rebuilds the whole index.
+        """
+        index = cls(manifest)
+        if diff.sources_changed:
+            index._build()
+            return index
+
+        old_nodes = previous.manifest.nodes
+        touched_names = {old_nodes[node_id].name for node_id in diff.removed_models}
+        touched_names.update(manifest.nodes[node_id].name for node_id in diff.added_models)
+        dirty = diff.added_models | diff.removed_models | diff.changed_models
+
+        def intact(node_id: str) -> bool:
+            if node_id in dirty:
+                return False
+            node = manifest.nodes.get(node_id) or manifest.sources.get(node_id)
+            return node is not None and node.name not in touched_names
+
+        kept = {}
+        for relationship in previous.edges:
+            test_id = relationship.test_id
+            # Embedded tests are read again with their models below
+            if test_id is None or test_id in diff.changed_tests or test_id not in manifest.nodes:
+                continue
+            if intact(relationship.from_id) and intact(relationship.to_id):
+                kept[test_id] = relationship
+
+        # Added in manifest order, as `_build` does, so later tests of a column win alike
+        index._init_models()
+        for node_id, node in manifest.nodes.items():
+            relationship = kept.get(node_id)
+            if relationship is not None:
+                index.tests_by_model.setdefault(relationship.from_id, []).append(node_id)
+                index._add(relationship)
+            elif node_id in index._model_ids:
+                index._index_model_tests(node_id, node)
+            elif node.test_metadata is not None and node.test_metadata.name == 'relationships':
+                index._index_test(node_id, node)
+        return index
+
+    def foreign_keys(self, node_id: str) -> Dict[str, str]:
+        """Columns of a model covered by relationship tests, mapped to the target table."""
+        return self._foreign_keys.get(node_id, {})
+
+    def edges_from(self, node_id: str) -> List[Relationship]:
+        """Resolved relationships of a model's columns, in `edges` order."""
+        return self._edges_by_model.get(node_id, [])
@@ -0,0 +1,279 @@
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from instrumentation import instrumented, measure
+
+RENDER_FORMATS = ('pdf', 'svg', 'png')
+RENDER_MIME_TYPES = {'pdf': 'application/pdf', 'svg': 'image/svg+xml', 'png': 'image/png'}
+DEFAULT_TIMEOUT = 600
+# Seconds a finished job stays retrievable by id
+JOB_TTL = 3600
+
+# Job states, the last four are final
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timed_out'
+FINAL_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+def dot_source_hash(dot_source: str) -> str:
+    """Cache key of a rendered artifact."""
+    return hashlib.sha256(dot_source.encode('utf-8')).hexdigest()
+
+
+def artifact_key(*parts) -> str:
+    """Cache key of an artifact identified by what its DOT source is generated from."""
+    return hashlib.sha256('\0'.join(map(str, parts)).encode('utf-8')).hexdigest()
+
+
+@instrumented('dot_render')
+def render_dot_file(dot_source: str, fmt: str, path: str, timeout: float = DEFAULT_TIMEOUT) -> None:
+    """Render a DOT source to `path` with Graphviz, blocking until done.
+
+    Raises subprocess.TimeoutExpired when Graphviz runs longer than `timeout`
+    and RuntimeError with Graphviz's message when it fails.
+    """
+    result = subprocess.run(
+        ['dot', f'-T{fmt}', '-o', path],
+        input=dot_source.encode('utf-8'),
+        capture_output=True,
+        timeout=timeout
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', errors='replace').strip())
+
+
+def _render_stream(chunks: Iterable[str], fmt: str, path: str, timeout: float,
+                   started: Optional[Callable[[subprocess.Popen], None]] = None) -> None:
+    deadline = time.monotonic() + timeout
+    # A file rather than a pipe, so a chatty Graphviz cannot block while we write
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(['dot', f'-T{fmt}', '-o', path], stdin=subprocess.PIPE, stderr=stderr)
+        if started is not None:
+            started(process)
+        try:
+            try:
+                with process.stdin:
+                    for chunk in chunks:
+                        process.stdin.write(chunk.encode('utf-8'))
+                        if time.monotonic() > deadline:
+                            raise subprocess.TimeoutExpired(process.args, timeout)
+            except BrokenPipeError:
+                # Graphviz stopped reading, its exit status and stderr say why
+                pass
+            process.wait(timeout=max(deadline - time.monotonic(), 0))
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        if process.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(message or f"dot exited with status {process.returncode}")
+
+
+@instrumented('dot_render')
+def render_dot_stream(chunks: Iterable[str], fmt: str, path: str, timeout: float = DEFAULT_TIMEOUT) -> None:
+    """Render DOT text to `path`, writing each chunk to Graphviz's stdin as it is produced.
+
+    Unlike `render_dot_file` the source is never held in memory as a whole,
+    and Graphviz parses while the rest is still being generated. Raises the same
+    errors as `render_dot_file`; `timeout` covers generation and rendering.
+    """
+    _render_stream(chunks, fmt, path, timeout)
+
+
+class RenderJob:
+    """A Graphviz render of one DOT source to one output format."""
+
+    def __init__(self, key: str, fmt: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.format = fmt
+        self.path = path
+        self.status = PENDING
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._cancel_requested = False
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATES
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.submitted_at
+
+    def read(self) -> bytes:
+        """Bytes of the finished artifact."""
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class RenderJobManager:
+    """Renders DOT sources with Graphviz off the Streamlit script thread.
+
+    Each job runs the `dot` binary in its own process; at most `max_workers` of
+    them run at once and the rest queue. Finished artifacts are cached in
+    `cache_dir` under the hash of the DOT source, or under a key naming what a
+    streamed source is generated from, so rendering an unchanged graph again
+    returns immediately. Jobs are killed after `timeout` seconds and
+    can be cancelled while queued or running. Finished jobs are forgotten
+    `job_ttl` seconds after they finish; their artifacts stay in the cache.
+    """
+
+    def __init__(self, cache_dir: str, max_workers: int = 2, timeout: float = DEFAULT_TIMEOUT,
+                 job_ttl: float = JOB_TTL):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='erd-render')
+        self._jobs: Dict[str, RenderJob] = {}
+        self._active: Dict[str, RenderJob] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def artifact_path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def submit(self, dot_source: str, fmt: str = 'pdf') -> RenderJob:
+        """Queue a render, or return a finished/in-flight job for the same output."""
+        return self.submit_stream(dot_source_hash(dot_source), lambda: [dot_source], fmt)
+
+    def submit_stream(self, key: str, chunks: Callable[[], Iterable[str]], fmt: str = 'pdf') -> RenderJob:
+        """`submit` for a DOT source generated in pieces by `chunks()` on the worker thread.
+
+        `key` stands for the source, see `artifact_key`; `chunks` is only called
+        when no artifact or in-flight job exists for it, and its chunks are
+        piped into Graphviz as they are generated.
+        """
+        if fmt not in RENDER_FORMATS:
+            raise ValueError(f"Unsupported render format: {fmt}")
+        path = self.artifact_path(key, fmt)
+
+        with self._lock:
+            self._prune()
+            active = self._active.get(f"{key}.{fmt}")
+            if active is not None and not active.done:
+                return active
+
+            job = RenderJob(key, fmt, path)
+            self._jobs[job.id] = job
+            if os.path.exists(path):
+                job.status = DONE
+                job.finished_at = job.submitted_at
+                return job
+            self._active[f"{key}.{fmt}"] = job
+
+        self._executor.submit(self._run, job, chunks)
+        return job
+
+    def _prune(self) -> None:
+        """Drop jobs that finished more than `job_ttl` seconds ago; called with the lock held."""
+        expired_before = time.time() - self.job_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.done and job.finished_at < expired_before]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[RenderJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> None:
+        """Cancel a queued job or kill the Graphviz process of a running one."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return
+        job._cancel_requested = True
+        # The worker thread clears `_process` when the job finishes
+        process = job._process
+        if process is not None:
+            process.kill()
+
+    def _finish(self, job: RenderJob, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job._process = None
+
+    def _run(self, job: RenderJob, chunks: Callable[[], Iterable[str]]) -> None:
+        # Runs on a worker thread, so this only reaches the timings log
+        try:
+            with measure('dot_render', format=job.format, job_id=job.id):
+                self._render(job, chunks)
+        finally:
+            active_key = f"{job.key}.{job.format}"
+            with self._lock:
+                if self._active.get(active_key) is job:
+                    del self._active[active_key]
+
+    def _started(self, job: RenderJob, process: subprocess.Popen) -> None:
+        job._process = process
+        if job._cancel_requested:
+            process.kill()
+
+    def _render(self, job: RenderJob, chunks: Callable[[], Iterable[str]]) -> None:
+        if job._cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        # Render to a temporary name so a killed job never leaves a partial artifact
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=f".{job.format}.tmp")
+        os.close(fd)
+        try:
+            _render_stream(chunks(), job.format, tmp_path, self.timeout,
+                           started=lambda process: self._started(job, process))
+            if job._cancel_requested:
+                self._finish(job, CANCELLED)
+            else:
+                os.replace(tmp_path, job.path)
+                self._finish(job, DONE)
+        except subprocess.TimeoutExpired:
+            self._finish(job, TIMED_OUT, f"Rendering took longer than {self.timeout:g} seconds")
+        except (OSError, RuntimeError) as e:
+            # A killed Graphviz exits with an error too
+            self._finish(job, CANCELLED if job._cancel_requested else FAILED, None if job._cancel_requested else str(e))
+        except Exception as e:
+            # Raised by the DOT generator, e.g. on a node the manifest lacks
+            self._finish(job, FAILED, f"{type(e).__name__}: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_manager: Optional[RenderJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_render_manager() -> RenderJobManager:
+    """Return the process-wide render manager configured from the environment.
+
+    ERD_ARTIFACT_DIR sets the artifact cache directory, ERD_RENDER_WORKERS the
+    number of concurrent Graphviz processes and ERD_RENDER_TIMEOUT the per-job
+    timeout in seconds.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = RenderJobManager(
+                cache_dir=os.environ.get('ERD_ARTIFACT_DIR') or os.path.join(tempfile.gettempdir(), 'dbt-erd-artifacts'),
+                max_workers=int(os.environ.get('ERD_RENDER_WORKERS', 2)),
+                timeout=float(os.environ.get('ERD_RENDER_TIMEOUT', DEFAULT_TIMEOUT))
+            )
+        return _manager
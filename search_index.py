@@ -0,0 +1,182 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Tuple
+
+# Field weights: a hit on the model name outranks one on a column, and so on
+FIELD_WEIGHTS = {
+    'name': 10.0,
+    'column': 4.0,
+    'description': 2.0,
+    'meta': 2.0,
+    'data_type': 1.0
+}
+# Score multipliers for how a query token matched an indexed token
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+MAX_PREFIX_MATCHES = 50
+MAX_FUZZY_MATCHES = 10
+MIN_FUZZY_SIMILARITY = 0.4
+QUERY_CACHE_SIZE = 128
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens, `customer_id` gives `customer` and `id`."""
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def _trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchHit(NamedTuple):
+    node_id: str
+    display_name: str
+    score: float
+    # Where the best match was found, e.g. "column customer_id"
+    matched: str
+
+
+class SearchIndex:
+    """Inverted index over the models of a manifest, with prefix and trigram lookup.
+
+    Model names, column names, column data types, model and column
+    descriptions and `meta` keys are tokenized once. Each token maps to the
+    models containing it with a weighted score and the field it came from.
+    Query tokens match indexed tokens exactly, by prefix through a sorted
+    vocabulary, or, when neither finds anything, by trigram similarity so
+    typos still find the model.
+    """
+
+    def __init__(self, node_ids: List[str], display_names: List[str]):
+        self.node_ids = node_ids
+        self.display_names = display_names
+        # token -> {model index: (score, matched field)}
+        self.postings: Dict[str, Dict[int, Tuple[float, str]]] = {}
+        self.vocabulary: List[str] = []
+        self.trigrams: Dict[str, List[int]] = {}
+        # Indexes are shared between sessions, so the query memo is guarded by a lock
+        self._queries: 'OrderedDict[tuple, List[SearchHit]]' = OrderedDict()
+        self._queries_lock = threading.Lock()
+
+    @classmethod
+    def from_manifest(cls, manifest) -> 'SearchIndex':
+        index = cls(list(manifest.display_names), list(manifest.display_names.values()))
+        for i, node_id in enumerate(index.node_ids):
+            node = manifest.node_details(node_id)
+            index._add(i, node.name, 'name', 'name')
+            index._add(i, node.description, 'description', 'description')
+            for key in node.meta:
+                index._add(i, key, 'meta', f"meta {key}")
+            for column_name, column in node.columns.items():
+                index._add(i, column_name, 'column', f"column {column_name}")
+                index._add(i, column.data_type, 'data_type', f"{column_name} {column.data_type}")
+                index._add(i, column.description, 'description', f"column {column_name}")
+                for key in column.meta:
+                    index._add(i, key, 'meta', f"{column_name} meta {key}")
+        index._finish()
+        return index
+
+    def _add(self, doc: int, text: str, field: str, matched: str) -> None:
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text):
+            postings = self.postings.setdefault(token, {})
+            previous = postings.get(doc)
+            if previous is None or previous[0] < weight:
+                postings[doc] = (weight, matched)
+
+    def _finish(self) -> None:
+        self.vocabulary = sorted(self.postings)
+        for position, token in enumerate(self.vocabulary):
+            for trigram in _trigrams(token):
+                self.trigrams.setdefault(trigram, []).append(position)
+
+    def _matches(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed tokens matching a query token, with their score multiplier."""
+        matches = [(token, EXACT)] if token in self.postings else []
+        start = bisect_left(self.vocabulary, token)
+        for candidate in self.vocabulary[start:start + MAX_PREFIX_MATCHES + 1]:
+            if not candidate.startswith(token):
+                break
+            if candidate != token:
+                matches.append((candidate, PREFIX))
+        if matches:
+            return matches
+
+        query_trigrams = _trigrams(token)
+        shared: Dict[int, int] = {}
+        for trigram in query_trigrams:
+            for position in self.trigrams.get(trigram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        scored = []
+        for position, count in shared.items():
+            candidate = self.vocabulary[position]
+            similarity = count / (len(query_trigrams) + len(candidate) + 1 - count)
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                scored.append((similarity, candidate))
+        scored.sort(reverse=True)
+        return [(candidate, FUZZY * similarity) for similarity, candidate in scored[:MAX_FUZZY_MATCHES]]
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """Models ranked by how many query tokens they match, then by score."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        key = (query.strip().lower(), limit)
+        with self._queries_lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+
+        # Rarest tokens first. Once `limit` models match every token so far and
+        # those are more than half the tokens, no other model can match as many,
+        # so the postings of common tokens like "stg" or "id" only rescore the
+        # models found instead of adding every model that contains them.
+        token_matches = [self._matches(token) for token in tokens]
+        token_matches.sort(key=lambda matches: sum(len(self.postings[candidate]) for candidate, _ in matches))
+
+        # model index -> [query tokens matched, score, (best score, matched field)]
+        results: Dict[int, list] = {}
+        restrict = False
+        for done, matches in enumerate(token_matches):
+            if not restrict and 2 * done > len(token_matches):
+                restrict = sum(1 for result in results.values() if result[0] == done) >= limit
+            best: Dict[int, Tuple[float, str]] = {}
+            for candidate, factor in matches:
+                postings = self.postings[candidate]
+                if restrict and len(results) < len(postings):
+                    entries = [(doc, postings[doc]) for doc in results if doc in postings]
+                else:
+                    entries = postings.items()
+                for doc, (weight, matched) in entries:
+                    score = weight * factor
+                    if doc not in best or best[doc][0] < score:
+                        best[doc] = (score, matched)
+            for doc, (score, matched) in best.items():
+                if restrict and doc not in results:
+                    continue
+                result = results.setdefault(doc, [0, 0.0, (0.0, '')])
+                result[0] += 1
+                result[1] += score
+                result[2] = max(result[2], (score, matched))
+
+        phrase = query.strip().lower()
+        hits = []
+        for doc, (matched_tokens, score, (_, matched)) in results.items():
+            if phrase in self.display_names[doc].lower():
+                score += FIELD_WEIGHTS['name']
+            hits.append((matched_tokens, score, doc, matched))
+        hits.sort(key=lambda hit: (-hit[0], -hit[1], self.display_names[hit[2]]))
+
+        result = [
+            SearchHit(self.node_ids[doc], self.display_names[doc], round(score, 2), matched)
+            for _, score, doc, matched in hits[:limit]
+        ]
+        with self._queries_lock:
+            self._queries[key] = result
+            if len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return result
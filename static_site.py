@@ -0,0 +1,270 @@
+"""Export the Pyvis ERD as a static site that loads model details on demand.
+
+The page itself is the Pyvis ERD without inline data. It fetches `graph.json`,
+a compact index of model names, colors and lineage edges, and fetches the
+gzip-compressed JSON shard of a model from `models/` only when the model is
+clicked. Shards are named after a hash of their content, so re-exporting an
+updated project only writes the shards that changed and everything can be
+cached by a plain file server or CDN:
+
+    python static_site.py target/manifest.json --out site/
+    python -m http.server --directory site
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+from erd_generator import PYVIS_EDGE_STYLE, PYVIS_NODE_STYLE, pyvis_network, write_pyvis_page
+from manifest_loader import load_manifest_fast
+from models import Manifest
+
+GRAPH_INDEX_FILE = 'graph.json'
+SHARD_DIR = 'models'
+# Bump when the layout of graph.json or the shards changes
+SITE_VERSION = 2
+
+# Appended to the Pyvis page, after it has created the empty `nodes`, `edges` and `network`
+_LOADER_SCRIPT = '''
+<div id="model-details" style="display:none; position:fixed; top:16px; right:16px; width:420px;
+     max-height:90vh; overflow:auto; background:#fff; border:1px solid #4A90E2; border-radius:4px;
+     padding:12px; font-family:sans-serif; font-size:13px; box-shadow:0 2px 8px rgba(0,0,0,.2); z-index:10"></div>
+<script type="text/javascript">
+(function () {
+  var shards = {};
+  var index = null;
+  var panel = document.getElementById('model-details');
+
+  function escapeHtml(value) {
+    return String(value == null ? '' : value).replace(/[&<>"']/g, function (c) {
+      return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+    });
+  }
+
+  // Shards are stored gzip-compressed; servers that already decoded them send plain JSON
+  function readJson(response) {
+    return response.arrayBuffer().then(function (buffer) {
+      var bytes = new Uint8Array(buffer);
+      if (bytes[0] !== 0x1f || bytes[1] !== 0x8b) {
+        return JSON.parse(new TextDecoder().decode(bytes));
+      }
+      var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+      return new Response(stream).json();
+    });
+  }
+
+  function loadShard(i) {
+    if (!shards[i]) {
+      shards[i] = fetch('models/' + index.shards[i] + '.json.gz').then(function (response) {
+        if (!response.ok) { throw new Error(response.status + ' ' + response.statusText); }
+        return readJson(response);
+      });
+    }
+    return shards[i];
+  }
+
+  function list(title, items) {
+    if (!items.length) { return ''; }
+    return '<h4>' + title + '</h4><ul>' + items.map(function (item) {
+      return '<li>' + escapeHtml(item) + '</li>';
+    }).join('') + '</ul>';
+  }
+
+  function render(model) {
+    var rows = model.columns.map(function (column) {
+      return '<tr><td>' + escapeHtml(column[0]) + '</td><td>' + escapeHtml(column[1]) + '</td><td>' +
+        escapeHtml(column[2]) + '</td><td>' + escapeHtml(column[3]) + '</td><td>' + escapeHtml(column[4]) + '</td></tr>';
+    }).join('');
+    panel.innerHTML =
+      '<div style="float:right; cursor:pointer" onclick="this.parentNode.style.display=\\'none\\'">&#10005;</div>' +
+      '<h3>' + escapeHtml(model.name) + '</h3>' +
+      '<p>' + escapeHtml(model.description) + '</p>' +
+      '<p>Schema: ' + escapeHtml(model.schema) + ' &middot; Layer: ' + escapeHtml(model.layer) +
+      (model.dv_type ? ' &middot; Type: ' + escapeHtml(model.dv_type) : '') + '</p>' +
+      '<table border="1" cellspacing="0" cellpadding="3"><tr><th>Column</th><th>Type</th><th>Key</th>' +
+      '<th>References</th><th>Description</th></tr>' + rows + '</table>' +
+      list('Tests', model.tests) + list('Referenced by', model.referenced_by) +
+      list('Upstream', model.parents) + list('Downstream', model.children);
+    panel.style.display = 'block';
+  }
+
+  fetch('graph.json').then(function (response) { return response.json(); }).then(function (graph) {
+    index = graph;
+    nodes.add(graph.names.map(function (name, i) {
+      return Object.assign({id: i, label: name, color: graph.colors[graph.color_codes[i]], level: graph.levels[i]},
+                           graph.node_style);
+    }));
+    var pairs = [];
+    for (var k = 0; k < graph.edges.length; k += 2) {
+      pairs.push(Object.assign({from: graph.edges[k], to: graph.edges[k + 1]}, graph.edge_style));
+    }
+    edges.add(pairs);
+    network.on('click', function (params) {
+      if (!params.nodes.length) { return; }
+      var i = params.nodes[0];
+      panel.innerHTML = 'Loading ' + escapeHtml(index.names[i]) + '&hellip;';
+      panel.style.display = 'block';
+      loadShard(i).then(render, function (error) {
+        panel.innerHTML = 'Could not load ' + escapeHtml(index.names[i]) + ': ' + escapeHtml(error.message);
+      });
+    });
+  });
+})();
+</script>
+'''
+
+
+def graph_index(manifest: Manifest, selected: List[int], shards: List[str]) -> Dict:
+    """The site's graph.json: what is needed to draw the ERD, and the shard name of every model.
+
+    Models are numbered by their position in `names`, edges are a flat list of
+    (child, parent) number pairs and colors are codes into a small palette.
+    `levels` pins the hierarchical level of every model, see
+    `GraphAnalytics.vis_levels`.
+    """
+    graph = manifest.lineage_graph
+    compact = manifest.compact_nodes
+    position = {i: n for n, i in enumerate(selected)}
+    palette: Dict[str, int] = {}
+    color_codes = []
+    for i in selected:
+        color_codes.append(palette.setdefault(compact.color(i), len(palette)))
+    edges = []
+    for child, parent in graph.edges(selected):
+        edges.extend((position[child], position[parent]))
+    return {
+        'version': SITE_VERSION,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'names': [graph.display_names[i] for i in selected],
+        'colors': list(palette),
+        'color_codes': color_codes,
+        'shards': shards,
+        'levels': manifest.graph_analytics.vis_levels(selected),
+        'edges': edges,
+        'node_style': PYVIS_NODE_STYLE,
+        'edge_style': PYVIS_EDGE_STYLE
+    }
+
+
+def model_shard(manifest: Manifest, node_id: str) -> Dict:
+    """Details of one model shown when it is clicked: columns, tests, references and lineage."""
+    graph = manifest.lineage_graph
+    node = manifest.node_details(node_id)
+    i = graph.index[node_id]
+    column_index = manifest.column_index
+    relationship_index = manifest.relationship_index
+
+    columns = []
+    for column_name, info in node.columns.items():
+        references = column_index.references(node_id, column_name)
+        key = 'PK' if info.meta.get('is_key') else 'FK' if references else ''
+        columns.append([
+            column_name,
+            info.data_type or 'unknown',
+            key,
+            ', '.join(f"{manifest.display_name(link.to_id)}.{link.to_column}" for link in references),
+            info.description or ''
+        ])
+
+    tests = [
+        f"{test.test_metadata.name}({test.column_name})" if test.column_name else test.test_metadata.name
+        for test in node.tests
+    ]
+    for test_id in relationship_index.tests_by_model.get(node_id, []):
+        test = manifest.nodes[test_id]
+        tests.append(f"{test.test_metadata.name}({test.column_name})" if test.column_name else test.test_metadata.name)
+
+    referenced_by = [
+        f"{manifest.display_name(link.from_id)}.{link.from_column} → {link.to_column}"
+        for column_name in node.columns
+        for link in column_index.referenced_by(node_id, column_name)
+    ]
+    return {
+        'id': node_id,
+        'name': graph.display_names[i],
+        'description': node.description or '',
+        'schema': node.schema,
+        'layer': graph.layer(i),
+        'dv_type': graph.dv_type(i),
+        'columns': columns,
+        'tests': tests,
+        'referenced_by': referenced_by,
+        'parents': [graph.display_names[p] for p in graph.parents(i)],
+        'children': [graph.display_names[c] for c in graph.children(i)]
+    }
+
+
+def _json_bytes(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def export_static_site(manifest: Manifest, out_dir: str, selected_layers=None) -> Dict:
+    """Write the page, graph index and model shards of an ERD site to `out_dir`.
+
+    Shards already present from an earlier export are kept, shards no longer
+    referenced are removed. Returns sizes for reporting.
+    """
+    graph = manifest.lineage_graph
+    selected = graph.select(selected_layers)
+    shard_dir = os.path.join(out_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    shards = []
+    written = shard_bytes = 0
+    for i in selected:
+        payload = _json_bytes(model_shard(manifest, graph.node_ids[i]))
+        shard = hashlib.blake2b(payload, digest_size=12).hexdigest()
+        shards.append(shard)
+        path = os.path.join(shard_dir, f"{shard}.json.gz")
+        if not os.path.exists(path):
+            # mtime=0 keeps the file of an unchanged shard byte-identical
+            with open(path, 'wb') as f:
+                f.write(gzip.compress(payload, mtime=0))
+            written += 1
+        shard_bytes += os.path.getsize(path)
+    wanted = {f"{shard}.json.gz" for shard in shards}
+    for name in os.listdir(shard_dir):
+        if name not in wanted:
+            os.remove(os.path.join(shard_dir, name))
+
+    index_bytes = _json_bytes(graph_index(manifest, selected, shards))
+    with open(os.path.join(out_dir, GRAPH_INDEX_FILE), 'wb') as f:
+        f.write(index_bytes)
+    page = pyvis_network().generate_html().replace('</body>', _LOADER_SCRIPT + '</body>', 1)
+    write_pyvis_page(page, os.path.join(out_dir, 'index.html'))
+
+    return {
+        'models': len(selected),
+        'page_bytes': len(page.encode('utf-8')),
+        'index_bytes': len(index_bytes),
+        'shard_bytes': shard_bytes,
+        'shards_written': written
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifest', help='Path to a dbt manifest.json file')
+    parser.add_argument('--out', default='erd-site', help='Output directory')
+    parser.add_argument('--layer', action='append', dest='layers',
+                        help='Only include models of this layer, can be repeated')
+    args = parser.parse_args(argv)
+
+    with open(args.manifest, 'rb') as f:
+        manifest = load_manifest_fast(f)
+    stats = export_static_site(manifest, args.out, args.layers)
+    print(
+        f"{stats['models']} models written to {args.out}: page {stats['page_bytes'] / 1024:.0f} KB, "
+        f"graph index {stats['index_bytes'] / 1024:.0f} KB, "
+        f"{stats['shards_written']} new shards, {stats['shard_bytes'] / 1024:.0f} KB of shards in total",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""`ColumnIndex.trace` follows foreign keys both ways, up to a number of hops."""
+import pytest
+
+from column_index import ColumnIndex, ColumnLink
+from manifest_loader import manifest_from_dict
+
+# fct.customer_key -> dim.customer_key -> hub.customer_hk <- sat.customer_hk, and fct.date_key -> date.date_key
+FACT_TO_DIM = ColumnLink('fct', 'customer_key', 'dim', 'customer_key', 'test')
+DIM_TO_HUB = ColumnLink('dim', 'customer_key', 'hub', 'customer_hk', 'meta')
+SAT_TO_HUB = ColumnLink('sat', 'customer_hk', 'hub', 'customer_hk', 'test')
+FACT_TO_DATE = ColumnLink('fct', 'date_key', 'date', 'date_key', 'test')
+
+
+@pytest.fixture
+def index() -> ColumnIndex:
+    index = ColumnIndex()
+    for link in (FACT_TO_DIM, DIM_TO_HUB, SAT_TO_HUB, FACT_TO_DATE):
+        index._add(link)
+    return index
+
+
+@pytest.mark.parametrize('max_hops, expected', [
+    (0, []),
+    (1, [FACT_TO_DIM]),
+    (2, [FACT_TO_DIM, DIM_TO_HUB]),
+    (3, [FACT_TO_DIM, DIM_TO_HUB, SAT_TO_HUB]),
+    (None, [FACT_TO_DIM, DIM_TO_HUB, SAT_TO_HUB]),
+])
+def test_trace_hops(index, max_hops, expected):
+    assert index.trace('fct', 'customer_key', max_hops) == expected
+
+
+def test_trace_follows_incoming_links(index):
+    # From the hub both referencing columns are found, then the fact behind the dimension
+    assert index.trace('hub', 'customer_hk', 1) == [DIM_TO_HUB, SAT_TO_HUB]
+    assert index.trace('hub', 'customer_hk') == [DIM_TO_HUB, SAT_TO_HUB, FACT_TO_DIM]
+
+
+def test_trace_of_unlinked_column(index):
+    assert index.trace('fct', 'amount') == []
+    assert index.trace('missing', 'id') == []
+
+
+def test_test_and_meta_links_are_kept_once():
+    nodes = {
+        'model.p.dim': {'name': 'dim', 'schema': 'core', 'columns': {'id': {'name': 'id'}}},
+        'model.p.fct': {'name': 'fct', 'schema': 'core', 'package_name': 'p', 'columns': {
+            'dim_id': {'name': 'dim_id', 'meta': {'is_foreign_key': True, 'references': 'core.dim',
+                                                 'references_field': 'id'}},
+            'other_id': {'name': 'other_id', 'meta': {'is_foreign_key': True, 'references': 'dim',
+                                                     'references_field': 'id'}},
+        }},
+        'test.p.relationships_fct_dim_id': {
+            'name': 'relationships_fct_dim_id', 'schema': 'core', 'package_name': 'p',
+            'column_name': 'dim_id', 'attached_node': 'model.p.fct',
+            'test_metadata': {'name': 'relationships', 'kwargs': {'to': "ref('dim')", 'field': 'id'}},
+            'depends_on': {'nodes': ['model.p.dim', 'model.p.fct']},
+        },
+    }
+    manifest = manifest_from_dict({'nodes': nodes, 'parent_map': {}, 'child_map': {}})
+    index = manifest.column_index
+    assert index.references('model.p.fct', 'dim_id') == [
+        ColumnLink('model.p.fct', 'dim_id', 'model.p.dim', 'id', 'test')
+    ]
+    # A bare model name in `references` resolves like ref()
+    assert index.references('model.p.fct', 'other_id') == [
+        ColumnLink('model.p.fct', 'other_id', 'model.p.dim', 'id', 'meta')
+    ]
+    assert [link.from_column for link in index.referenced_by('model.p.dim', 'id')] == ['dim_id', 'other_id']
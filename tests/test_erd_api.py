@@ -0,0 +1,106 @@
+"""`ErdApi.handle`: ETags, manifests that fail to parse, and errors as JSON."""
+import json
+import os
+import subprocess
+from http import HTTPStatus
+
+import pytest
+
+import erd_api
+from erd_api import ErdApi
+from manifest_cache import ManifestCache
+from workspace import Workspace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def example() -> bytes:
+    with open(os.path.join(ROOT, 'manifest_example.json'), 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def manifest_path(tmp_path) -> str:
+    return str(tmp_path / 'manifest.json')
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _api(path: str) -> ErdApi:
+    return ErdApi(Workspace({'shop': path}, ManifestCache()))
+
+
+def test_etag_and_not_modified(manifest_path, example):
+    _write(manifest_path, example)
+    api = _api(manifest_path)
+    status, headers, body = api.handle('/models', {})
+    assert status == HTTPStatus.OK
+    assert json.loads(body)
+    etag = headers['ETag']
+
+    status, headers, body = api.handle('/models', {}, if_none_match=f'"other", {etag}')
+    assert status == HTTPStatus.NOT_MODIFIED
+    assert headers['ETag'] == etag
+    assert body == b''
+    # Another request, or the same one on another manifest, has another tag
+    assert api.handle('/models', {'q': ['customer']})[1]['ETag'] != etag
+    _write(manifest_path, example.replace(b'"description": "', b'"description": "Changed: ', 1))
+    status, headers, _ = api.handle('/models', {}, if_none_match=etag)
+    assert status == HTTPStatus.OK
+    assert headers['ETag'] != etag
+
+
+def test_unavailable_before_the_first_good_parse(manifest_path, example):
+    _write(manifest_path, example[:len(example) // 2])
+    status, headers, body = _api(manifest_path).handle('/models', {})
+    assert status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert headers['Content-Type'] == 'application/json'
+    assert 'Cannot parse the manifest of shop' in json.loads(body)['error']
+
+
+def test_last_good_manifest_while_rewritten(manifest_path, example):
+    _write(manifest_path, example)
+    api = _api(manifest_path)
+    good = api.handle('/relationships', {})
+
+    _write(manifest_path, example[:len(example) // 3])
+    status, headers, body = api.handle('/relationships', {})
+    assert status == HTTPStatus.OK
+    assert (headers['ETag'], body) == (good[1]['ETag'], good[2])
+    assert api.handle('/relationships', {}, if_none_match=good[1]['ETag'])[0] == HTTPStatus.NOT_MODIFIED
+
+
+def test_render_timeout_is_gateway_timeout(manifest_path, example, monkeypatch):
+    def render_dot_stream(chunks, fmt, path, timeout):
+        raise subprocess.TimeoutExpired(['dot'], timeout)
+
+    monkeypatch.setattr(erd_api, 'render_dot_stream', render_dot_stream)
+    _write(manifest_path, example)
+    status, _, body = _api(manifest_path).handle('/erd.svg', {})
+    assert status == HTTPStatus.GATEWAY_TIMEOUT
+    assert 'longer than' in json.loads(body)['error']
+
+
+def test_unexpected_error_is_a_json_500(manifest_path, example, monkeypatch, capsys):
+    def models(manifest, query):
+        raise KeyError('model.shop.missing')
+
+    _write(manifest_path, example)
+    api = _api(manifest_path)
+    monkeypatch.setattr(api, 'models', models)
+    status, headers, body = api.handle('/models', {})
+    assert status == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert headers['Content-Type'] == 'application/json'
+    assert json.loads(body) == {'error': "KeyError: 'model.shop.missing'"}
+    assert 'Traceback' in capsys.readouterr().err
+
+
+def test_unknown_endpoint(manifest_path, example):
+    _write(manifest_path, example)
+    status, _, body = _api(manifest_path).handle('/nope', {})
+    assert status == HTTPStatus.NOT_FOUND
+    assert json.loads(body) == {'error': 'No endpoint /nope'}
@@ -0,0 +1,78 @@
+"""`GraphAnalytics` cycles, levels and chains on small graphs and against networkx."""
+import random
+
+import networkx as nx
+import pytest
+
+from graph_analytics import GraphAnalytics
+from manifest_loader import manifest_from_dict
+
+# Child to parents: a -> b <-> c -> d, e depends on itself, f stands alone
+PARENTS = {'a': [], 'b': ['a', 'c'], 'c': ['b'], 'd': ['c'], 'e': ['e'], 'f': []}
+
+
+def _analytics(parents: dict) -> GraphAnalytics:
+    model_id = 'model.analytics.{}'.format
+    nodes = {model_id(name): {'name': name, 'schema': 'core'} for name in parents}
+    parent_map = {model_id(name): [model_id(p) for p in ps] for name, ps in parents.items()}
+    child_map = {model_id(name): [model_id(c) for c, ps in parents.items() if name in ps] for name in parents}
+    manifest = manifest_from_dict({'nodes': nodes, 'parent_map': parent_map, 'child_map': child_map})
+    return GraphAnalytics(manifest.lineage_graph)
+
+
+def _model_names(analytics: GraphAnalytics, indices) -> list:
+    return [analytics.graph.display_names[i].split('.')[1] for i in indices]
+
+
+def _names(analytics: GraphAnalytics, indices) -> str:
+    return ''.join(_model_names(analytics, indices))
+
+
+@pytest.fixture
+def analytics() -> GraphAnalytics:
+    return _analytics(PARENTS)
+
+
+def test_cycles(analytics):
+    assert sorted(_names(analytics, cycle) for cycle in analytics.cycles) == ['bc', 'e']
+
+
+def test_levels_and_heights(analytics):
+    # The b <-> c cycle counts as one node one level below a
+    assert list(analytics.level) == [0, 1, 1, 2, 0, 0]
+    assert list(analytics.height) == [2, 1, 1, 0, 0, 0]
+    assert analytics.max_level == 2
+    assert analytics.vis_levels([0, 1, 3]) == [2, 1, 0]
+    assert analytics.vis_levels([0, 3]) == [1, 0]
+
+
+def test_fan_and_chains(analytics):
+    assert list(analytics.fan_in) == [0, 2, 1, 1, 1, 0]
+    assert list(analytics.fan_out) == [1, 1, 2, 0, 1, 0]
+    assert _names(analytics, analytics.hot_spots(2)) == 'bc'
+    assert [_names(analytics, chain) for chain in analytics.longest_chains] == ['acd', 'e', 'f']
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_networkx(seed):
+    rng = random.Random(seed)
+    names = [f"m{i}" for i in range(60)]
+    parents = {name: sorted({rng.choice(names) for _ in range(rng.randint(0, 3))}) for name in names}
+    analytics = _analytics(parents)
+
+    graph = nx.DiGraph()
+    graph.add_nodes_from(names)
+    graph.add_edges_from((parent, child) for child, ps in parents.items() for parent in ps)
+    expected_cycles = sorted(
+        sorted(component) for component in nx.strongly_connected_components(graph)
+        if len(component) > 1 or graph.has_edge(*(next(iter(component)),) * 2)
+    )
+    assert sorted(sorted(_model_names(analytics, cycle)) for cycle in analytics.cycles) == expected_cycles
+
+    condensation = nx.condensation(graph)
+    component_level = {}
+    for c in nx.topological_sort(condensation):
+        component_level[c] = max((component_level[p] + 1 for p in condensation.predecessors(c)), default=0)
+    mapping = condensation.graph['mapping']
+    assert [analytics.level[i] for i in range(len(names))] == \
+        [component_level[mapping[name]] for name in names]
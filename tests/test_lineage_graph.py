@@ -0,0 +1,67 @@
+"""`LineageGraph.lineage` honours the depth limits and the node budget."""
+import pytest
+
+from manifest_loader import manifest_from_dict
+
+# Child to parents: a <- b <- c <- d <- e, and c <- f
+PARENTS = {'a': [], 'b': ['a'], 'c': ['b'], 'd': ['c'], 'e': ['d'], 'f': ['c']}
+
+
+def _model_id(name: str) -> str:
+    return f"model.lineage.{name}"
+
+
+@pytest.fixture
+def graph():
+    nodes = {_model_id(name): {'name': name, 'schema': 'core'} for name in PARENTS}
+    parent_map = {_model_id(name): [_model_id(p) for p in parents] for name, parents in PARENTS.items()}
+    child_map = {_model_id(name): [_model_id(c) for c, parents in PARENTS.items() if name in parents]
+                 for name in PARENTS}
+    manifest = manifest_from_dict({'nodes': nodes, 'parent_map': parent_map, 'child_map': child_map})
+    return manifest.lineage_graph
+
+
+def _names(ids) -> set:
+    return {node_id.rsplit('.', 1)[1] for node_id in ids}
+
+
+@pytest.mark.parametrize('upstream, downstream, expected', [
+    (0, 0, 'c'),
+    (1, 0, 'bc'),
+    (0, 1, 'cdf'),
+    (1, 1, 'bcdf'),
+    (2, 1, 'abcdf'),
+    (None, None, 'abcdef'),
+    (None, 0, 'abc'),
+])
+def test_lineage_depths(graph, upstream, downstream, expected):
+    assert _names(graph.lineage(_model_id('c'), upstream, downstream)) == set(expected)
+
+
+def test_lineage_of_unknown_node_is_empty(graph):
+    assert graph.lineage('model.lineage.missing', None, None) == frozenset()
+
+
+@pytest.mark.parametrize('max_nodes', [1, 2, 3, 4, 5])
+def test_lineage_budget_truncates(graph, max_nodes):
+    full = graph.lineage(_model_id('c'), None, None)
+    limited = graph.lineage(_model_id('c'), None, None, max_nodes)
+    assert len(limited) == max_nodes
+    assert _model_id('c') in limited
+    assert limited <= full
+
+
+def test_lineage_budget_keeps_both_directions(graph):
+    # Upstream and downstream advance in lock step, so a small budget still sees both
+    limited = _names(graph.lineage(_model_id('c'), None, None, 3))
+    assert 'b' in limited
+    assert limited & {'d', 'f'}
+
+
+def test_lineage_budget_larger_than_lineage(graph):
+    assert graph.lineage(_model_id('c'), 1, 1, 100) == graph.lineage(_model_id('c'), 1, 1)
+
+
+def test_lineage_is_memoized(graph):
+    first = graph.lineage(_model_id('c'), 2, 2, 4)
+    assert graph.lineage(_model_id('c'), 2, 2, 4) is first
@@ -0,0 +1,125 @@
+"""The msgspec, streaming and dict loaders build the same Manifest and the same ERD."""
+import gc
+import io
+import json
+import os
+
+import pydantic
+import pytest
+
+import manifest_loader
+from erd_generator import create_erd, extract_relationships, iter_erd_dot
+from synthetic_manifest import generate_manifest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+requires_msgspec = pytest.mark.skipif(manifest_loader.fast_decoder is None, reason='msgspec is not installed')
+
+
+def _example() -> bytes:
+    with open(os.path.join(ROOT, 'manifest_example.json'), 'rb') as f:
+        return f.read()
+
+
+def _synthetic() -> bytes:
+    return json.dumps(generate_manifest(n_models=300, columns_per_model=6, code_size=200)).encode('utf-8')
+
+
+@pytest.fixture(params=[_example, _synthetic], ids=['example', 'synthetic'])
+def data(request) -> bytes:
+    return request.param()
+
+
+def _loaders(data: bytes):
+    return {
+        'msgspec': manifest_loader.decode_manifest(data),
+        'streaming': manifest_loader.load_manifest(io.BytesIO(data)),
+        'dict': manifest_loader.manifest_from_dict(json.loads(data))
+    }
+
+
+def _derived(manifest):
+    return create_erd(manifest).source, extract_relationships(manifest), manifest.relationship_index.edges
+
+
+@requires_msgspec
+def test_loaders_build_equal_manifests(data):
+    manifests = _loaders(data)
+    reference = manifests.pop('dict')
+    assert reference.nodes, 'the manifest has no models'
+    for name, manifest in manifests.items():
+        assert manifest == reference, f"{name} differs from json + pydantic"
+        assert list(manifest.nodes) == list(reference.nodes), f"{name} keeps the nodes in another order"
+
+
+@requires_msgspec
+def test_loaders_build_equal_erds(data):
+    manifests = _loaders(data)
+    expected = _derived(manifests.pop('dict'))
+    for name, manifest in manifests.items():
+        assert _derived(manifest) == expected, f"{name} draws another ERD"
+
+
+@requires_msgspec
+def test_streamed_dot_matches_create_erd(data):
+    manifest = manifest_loader.decode_manifest(data)
+    assert ''.join(iter_erd_dot(manifest)) == create_erd(manifest).source
+
+
+@requires_msgspec
+def test_indexed_loader_completes_nodes_on_demand(data, tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_loader, 'NODE_STORE_DIR', str(tmp_path))
+    indexed = manifest_loader.decode_manifest(data)
+    reference = manifest_loader.manifest_from_dict(json.loads(data))
+    try:
+        assert indexed._node_store is not None
+        assert (indexed.parent_map, indexed.child_map, indexed.sources) == \
+            (reference.parent_map, reference.child_map, reference.sources)
+        assert {node_id: indexed.node_details(node_id) for node_id in indexed.nodes} == reference.nodes
+        assert create_erd(indexed).source == create_erd(reference).source
+    finally:
+        indexed._node_store.close()
+
+
+@requires_msgspec
+def test_indexed_loader_falls_back_when_nodes_are_not_found(data, tmp_path, monkeypatch):
+    decode = manifest_loader.fast_decoder.decode
+    # Nodes decoded from a re-indented copy do not occur in `data` byte for byte
+    monkeypatch.setattr(manifest_loader.fast_decoder, 'decode',
+                        lambda data: decode(json.dumps(json.loads(data), indent=1).encode('utf-8')))
+    monkeypatch.setattr(manifest_loader, 'NODE_STORE_DIR', str(tmp_path))
+    manifest = manifest_loader.decode_manifest(data)
+    assert manifest._node_store is None
+    assert manifest == manifest_loader.manifest_from_dict(json.loads(data))
+
+
+@requires_msgspec
+@pytest.mark.parametrize('enabled', [True, False])
+def test_decoding_restores_the_collector_state(enabled):
+    was_enabled = gc.isenabled()
+    (gc.enable if enabled else gc.disable)()
+    try:
+        manifest_loader.decode_manifest(_example())
+        assert gc.isenabled() == enabled
+    finally:
+        (gc.enable if was_enabled else gc.disable)()
+
+
+@requires_msgspec
+def test_decode_error_falls_back_to_pydantic(data, monkeypatch):
+    def reject(_data):
+        raise manifest_loader.fast_decoder.DecodeError[0]('rejected by msgspec')
+
+    monkeypatch.setattr(manifest_loader.fast_decoder, 'decode', reject)
+    manifest = manifest_loader.decode_manifest(data)
+    assert manifest == manifest_loader.manifest_from_dict(json.loads(data))
+    assert _derived(manifest) == _derived(manifest_loader.manifest_from_dict(json.loads(data)))
+
+
+@requires_msgspec
+def test_invalid_manifest_is_reported_by_pydantic():
+    manifest = json.loads(_example())
+    node_id = next(node_id for node_id in manifest['nodes'] if node_id.startswith('model.'))
+    del manifest['nodes'][node_id]['schema']
+    with pytest.raises(pydantic.ValidationError, match='schema'):
+        manifest_loader.decode_manifest(json.dumps(manifest).encode('utf-8'))
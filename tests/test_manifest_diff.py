@@ -0,0 +1,50 @@
+"""`diff_manifests` and `refresh_manifest` between two loads of a manifest."""
+import io
+import json
+
+import pytest
+
+import manifest_loader
+from manifest_cache import _restore, _snapshot
+from manifest_diff import diff_manifests, refresh_manifest
+from synthetic_manifest import generate_manifest
+
+requires_msgspec = pytest.mark.skipif(manifest_loader.fast_decoder is None, reason='msgspec is not installed')
+
+
+@pytest.fixture(scope='module')
+def data() -> bytes:
+    return json.dumps(generate_manifest(n_models=200, columns_per_model=4, code_size=100)).encode('utf-8')
+
+
+def test_same_loader_finds_no_changes(data):
+    old = manifest_loader.load_manifest(io.BytesIO(data))
+    new = manifest_loader.manifest_from_dict(json.loads(data))
+    assert old.hash_scheme == new.hash_scheme == 'value'
+    diff = diff_manifests(old, new)
+    assert diff.is_empty
+    assert not diff.full_rebuild
+
+
+@requires_msgspec
+def test_different_hash_schemes_rebuild_in_full(data):
+    old = manifest_loader.decode_manifest(data)
+    new = manifest_loader.load_manifest(io.BytesIO(data))
+    assert old.hash_scheme == 'raw'
+    old.relationship_index
+
+    diff = refresh_manifest(old, new)
+    assert diff.full_rebuild
+    assert diff.changed_models == old.model_ids
+    assert diff.sources_changed
+    # The index is not carried over from hashes that cannot be compared
+    assert new._relationship_index is None
+    assert new.relationship_index.edges == old.relationship_index.edges
+
+
+@requires_msgspec
+def test_snapshot_keeps_hash_scheme(data):
+    manifest = manifest_loader.decode_manifest(data)
+    restored = _restore(_snapshot(manifest), 'key')
+    assert restored.hash_scheme == 'raw'
+    assert diff_manifests(manifest, restored).is_empty
@@ -0,0 +1,97 @@
+"""`RelationshipIndex.updated` resolves the same relationships as a full rebuild."""
+import copy
+
+import pytest
+
+from manifest_diff import refresh_manifest
+from manifest_loader import manifest_from_dict
+from relationship_index import RelationshipIndex
+from synthetic_manifest import generate_manifest
+
+
+@pytest.fixture(scope='module')
+def base() -> dict:
+    return generate_manifest(n_models=120, columns_per_model=4, code_size=50, relationship_density=0.5)
+
+
+def _relationship_tests(data: dict):
+    return [node_id for node_id, node in data['nodes'].items()
+            if (node.get('test_metadata') or {}).get('name') == 'relationships']
+
+
+def _first_target(data: dict) -> str:
+    test = data['nodes'][_relationship_tests(data)[0]]
+    return next(node_id for node_id in test['depends_on']['nodes'] if node_id != test['attached_node'])
+
+
+def _drop(data: dict, node_id: str) -> None:
+    del data['nodes'][node_id]
+    for edges in (data['parent_map'], data['child_map']):
+        edges.pop(node_id, None)
+        for others in edges.values():
+            if node_id in others:
+                others.remove(node_id)
+
+
+def change_model(data):
+    data['nodes'][_first_target(data)]['description'] = 'Changed'
+
+
+def remove_model(data):
+    _drop(data, _first_target(data))
+
+
+def add_model_with_same_name(data):
+    target = data['nodes'][_first_target(data)]
+    twin = dict(target, package_name='other', unique_id=f"model.other.{target['name']}")
+    data['nodes'][twin['unique_id']] = twin
+    data['parent_map'][twin['unique_id']] = []
+    data['child_map'][twin['unique_id']] = []
+
+
+def remove_test(data):
+    _drop(data, _relationship_tests(data)[0])
+
+
+def retarget_test(data):
+    test = data['nodes'][_relationship_tests(data)[0]]
+    test['test_metadata']['kwargs']['field'] = 'col_1'
+
+
+def add_source(data):
+    data['sources']['source.synthetic.raw.events'] = {
+        'name': 'events', 'source_name': 'raw', 'schema': 'raw', 'columns': {}
+    }
+
+
+def _resolved(index: RelationshipIndex):
+    return (
+        index.edges,
+        index.relationships,
+        index.relationship_labels,
+        {node_id: index.foreign_keys(node_id) for node_id in index.manifest.model_ids},
+        index.tests_by_model,
+    )
+
+
+@pytest.mark.parametrize('mutate', [
+    change_model, remove_model, add_model_with_same_name, remove_test, retarget_test, add_source
+])
+def test_updated_equals_rebuild(base, mutate):
+    old = manifest_from_dict(base)
+    old.relationship_index
+    data = copy.deepcopy(base)
+    mutate(data)
+    new = manifest_from_dict(data)
+
+    refresh_manifest(old, new)
+    assert new._relationship_index is not None, 'the index was not carried over'
+    assert _resolved(new._relationship_index) == _resolved(RelationshipIndex.from_manifest(new))
+
+
+def test_unchanged_manifest_keeps_every_relationship(base):
+    old = manifest_from_dict(base)
+    assert old.relationship_index.edges
+    new = manifest_from_dict(copy.deepcopy(base))
+    refresh_manifest(old, new)
+    assert _resolved(new._relationship_index) == _resolved(old.relationship_index)
@@ -0,0 +1,69 @@
+"""`RenderJobManager` job states, with a stand-in `dot` that copies its input."""
+import os
+import stat
+import time
+
+import pytest
+
+from render_jobs import DONE, FAILED, RenderJobManager
+
+FAKE_DOT = """#!/bin/sh
+# dot -T<format> -o <path>
+cat > "$3"
+"""
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    dot = bin_dir / 'dot'
+    dot.write_text(FAKE_DOT)
+    dot.chmod(dot.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    manager = RenderJobManager(str(tmp_path / 'artifacts'), max_workers=1, timeout=10)
+    yield manager
+    manager._executor.shutdown(wait=True)
+
+
+def _wait(job, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.01)
+    return job
+
+
+def test_render_and_cache(manager):
+    job = _wait(manager.submit_stream('k', lambda: iter(['digraph {', '}']), 'svg'))
+    assert job.status == DONE
+    assert job.read() == b'digraph {}'
+    again = manager.submit_stream('k', lambda: pytest.fail('rendered twice'), 'svg')
+    assert again.status == DONE
+
+
+def test_failing_generator_fails_the_job(manager):
+    def chunks():
+        yield 'digraph {'
+        raise KeyError('model.p.missing')
+
+    job = _wait(manager.submit_stream('k', chunks, 'svg'))
+    assert job.status == FAILED
+    assert 'KeyError' in job.error and 'model.p.missing' in job.error
+    assert not os.path.exists(job.path)
+    assert not manager._active
+
+    # The failed job is not returned as in flight, the next submit renders again
+    retry = _wait(manager.submit_stream('k', lambda: iter(['digraph {}']), 'svg'))
+    assert retry is not job
+    assert retry.status == DONE
+
+
+def test_failing_chunks_factory_fails_the_job(manager):
+    def chunks():
+        raise AttributeError("'NoneType' object has no attribute 'columns'")
+
+    job = _wait(manager.submit_stream('k', chunks, 'pdf'))
+    assert job.status == FAILED
+    assert job.error.startswith('AttributeError')
+    assert not manager._active
@@ -0,0 +1,33 @@
+"""`SearchIndex.search` ranks by matched tokens however small the limit."""
+import json
+
+import pytest
+
+from manifest_loader import manifest_from_dict
+from search_index import SearchIndex
+from synthetic_manifest import generate_manifest
+
+
+def test_more_matched_tokens_outrank_the_rarest_token():
+    index = SearchIndex(['a', 'b', 'c', 'd'], ['core.a', 'core.b', 'core.c', 'core.d'])
+    index._add(0, 'xenon', 'name', 'name')
+    index._add(1, 'yttrium zinc', 'description', 'description')
+    index._add(2, 'yttrium zinc', 'description', 'description')
+    index._add(3, 'zinc', 'description', 'description')
+    index._finish()
+    # xenon is the rarest token, but b and c match two of the three
+    assert [hit.node_id for hit in index.search('xenon yttrium zinc', limit=1)] == ['b']
+
+
+@pytest.fixture(scope='module')
+def index() -> SearchIndex:
+    data = generate_manifest(n_models=400, columns_per_model=6, code_size=0)
+    return manifest_from_dict(json.loads(json.dumps(data))).search_index
+
+
+@pytest.mark.parametrize('query', [
+    'staging model', 'core model id', 'col 1 id', 'mart model col 2 varchar', 'raw modle', 'model 12 col'
+])
+@pytest.mark.parametrize('limit', [1, 5, 20])
+def test_limit_takes_the_top_of_the_full_ranking(index, query, limit):
+    assert index.search(query, limit) == index.search(query, len(index.node_ids))[:limit]
@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from manifest_cache import ManifestCache, content_hash, get_manifest_cache
+from models import Manifest
+
+
+class Workspace:
+    """A fixed set of dbt projects whose manifests every session of the process shares.
+
+    Parsed manifests live in the process-wide `ManifestCache`, so projects and
+    uploads share one memory budget and cold projects are evicted least recently
+    used first. A project is read and parsed on first use, and again only when
+    its manifest file changed or the cache evicted it; a restart with a spill
+    directory restores it from disk instead. Concurrent sessions asking for the
+    same cold project wait for a single load. The returned manifests, and the
+    indexes derived from them, are shared and must be treated as read-only.
+    """
+
+    def __init__(self, projects: Dict[str, str], cache: ManifestCache):
+        self.projects = dict(projects)
+        self.cache = cache
+        # Project -> (file signature, content hash) of the last load
+        self._loaded: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._locks = {name: threading.Lock() for name in self.projects}
+        self.loads = 0
+
+    @classmethod
+    def from_file(cls, path: str, cache: Optional[ManifestCache] = None) -> 'Workspace':
+        """Read a JSON object mapping project names to manifest paths.
+
+        Relative manifest paths are resolved against the file's directory.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            projects = json.load(f)
+        if not isinstance(projects, dict) or not projects:
+            raise ValueError(f"{path} must map project names to manifest.json paths")
+        base = os.path.dirname(os.path.abspath(path))
+        return cls(
+            {name: os.path.join(base, os.path.expanduser(manifest)) for name, manifest in projects.items()},
+            cache or get_manifest_cache()
+        )
+
+    def names(self) -> List[str]:
+        return list(self.projects)
+
+    def get(self, name: str) -> Manifest:
+        """The parsed manifest of a project, loading it when it is not in memory."""
+        path = self.projects[name]
+        with self._locks[name]:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            loaded = self._loaded.get(name)
+            if loaded is not None and loaded[0] == signature:
+                manifest = self.cache.get(loaded[1])
+                if manifest is not None:
+                    return manifest
+
+            with open(path, 'rb') as f:
+                data = f.read()
+            key = content_hash(data)
+            manifest = self.cache.get_or_load(data, key=key)
+            self._loaded[name] = (signature, key)
+            self.loads += 1
+            return manifest
+
+    def status(self) -> List[dict]:
+        """Per project whether its manifest is in memory, for display."""
+        return [
+            {
+                'project': name,
+                'resident': name in self._loaded and self._loaded[name][1] in self.cache,
+                'path': path
+            }
+            for name, path in self.projects.items()
+        ]
+
+
+_workspace: Optional[Workspace] = None
+_workspace_lock = threading.Lock()
+
+
+def get_workspace() -> Optional[Workspace]:
+    """Return the process-wide workspace, or None when ERD_WORKSPACE is not set.
+
+    ERD_WORKSPACE is the path of a JSON file mapping project names to the
+    manifest.json of each project.
+    """
+    global _workspace
+    path = os.environ.get('ERD_WORKSPACE')
+    if not path:
+        return None
+    with _workspace_lock:
+        if _workspace is None:
+            _workspace = Workspace.from_file(path)
+        return _workspace